@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Batch μετατροπή NONAN CSV -> OpenSim .mot για ολόκληρο δέντρο φακέλων.
+
+Η δομή των φακέλων διατηρείται στο output (π.χ. S135/S135_G03_D01_B01_T01.csv
+-> <output_root>/S135/S135_G03_D01_B01_T01.mot) και τα αρχεία μοιράζονται σε
+process pool.
+
+Usage:
+    python batch_csv_to_mot.py <input_root> <output_root>
+        [--pattern "S*/S*_G*_D*_B*_T*.csv"] [--workers N]
+        [--profile REPORT.json] [--cprofile OUT.prof]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from csv_to_gait2392_mot import convert_csv_to_mot
+from instrumentation import add_profile_args, profiling
+
+DEFAULT_PATTERN = "S*/S*_G*_D*_B*_T*.csv"
+
+
+def find_trials(input_root, pattern=DEFAULT_PATTERN):
+    """CSV paths (σχετικά με το input_root) που ταιριάζουν στο pattern."""
+    paths = glob.glob(os.path.join(input_root, pattern), recursive=True)
+    return sorted(os.path.relpath(p, input_root) for p in paths)
+
+
+def _convert_one(src, dst):
+    t0 = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        n_rows, _ = convert_csv_to_mot(src, dst, verbose=False)
+        return {"trial": src, "status": "ok", "rows": n_rows,
+                "seconds": time.perf_counter() - t0, "error": ""}
+    except Exception as exc:  # ένα χαλασμένο αρχείο δεν σταματά το batch
+        return {"trial": src, "status": "failed", "rows": 0,
+                "seconds": time.perf_counter() - t0,
+                "error": f"{type(exc).__name__}: {exc}"}
+
+
+def convert_tree(input_root, output_root, pattern=DEFAULT_PATTERN, workers=None):
+    """
+    Returns:
+        λίστα από records (trial, status, rows, seconds, error)
+    """
+    rel_paths = find_trials(input_root, pattern)
+    jobs = []
+    for rel in rel_paths:
+        src = os.path.join(input_root, rel)
+        dst = os.path.join(output_root, os.path.splitext(rel)[0] + ".mot")
+        jobs.append((src, dst))
+
+    records = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_convert_one, src, dst) for src, dst in jobs]
+        for fut in as_completed(futures):
+            rec = fut.result()
+            records.append(rec)
+            if rec["status"] == "ok":
+                print(f"  ✅ {rec['trial']}: {rec['rows']} rows in {rec['seconds']:.2f} s")
+            else:
+                print(f"  ❌ {rec['trial']}: {rec['error']}")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a tree of NONAN CSVs to .mot files.")
+    parser.add_argument("input_root")
+    parser.add_argument("output_root")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN,
+                        help="glob relative to input_root (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: CPU count)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_root):
+        print(f"❌ Folder not found: {args.input_root}")
+        sys.exit(1)
+
+    print(f"📄 Input root: {args.input_root}")
+    print(f"📄 Output root: {args.output_root}")
+
+    t0 = time.perf_counter()
+    info = {}
+    # οι conversions τρέχουν σε άλλα processes: μετράμε το pool συνολικά (+ children peak RSS)
+    with profiling(args, extra=info) as timer:
+        with timer.stage("convert (process pool)"):
+            records = convert_tree(args.input_root, args.output_root, args.pattern,
+                                   args.workers)
+        info["files"] = len(records)
+        info["rows"] = sum(r["rows"] for r in records)
+    wall = time.perf_counter() - t0
+
+    if not records:
+        print(f"❌ No files matched {args.pattern}")
+        sys.exit(1)
+
+    n_failed = sum(r["status"] == "failed" for r in records)
+    n_rows = sum(r["rows"] for r in records)
+    print(f"\n➡ {len(records) - n_failed}/{len(records)} files converted, "
+          f"{n_rows} rows in {wall:.1f} s")
+    if n_failed:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Batch driver για το run_muscle_lengths: τρέχει πολλά trials σε process pool.
+
+Κάθε worker φορτώνει το Gait2392 μία φορά (warm Model/State) και μετά
+επεξεργάζεται όσα trials του δοθούν. Ένα trial που αποτυγχάνει καταγράφεται
+στο report χωρίς να σταματά όλο το batch.
+
+Usage:
+    python batch_muscle_lengths.py <model.osim> <out_dir> <manifest.txt | glob> [...]
+        [--workers N] [--report report.csv] [--muscles all|PATTERNS] [--float32]
+        [--profile REPORT.json] [--cprofile OUT.prof]
+
+Το manifest είναι ένα txt με ένα CSV path ανά γραμμή (γραμμές με # αγνοούνται).
+Οτιδήποτε άλλο ερμηνεύεται ως glob, π.χ. "S*/S*_G03_*.csv".
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import run_muscle_lengths as rml
+from columnar_io import save_table
+from instrumentation import add_profile_args, profiling
+from result_cache import DEFAULT_CACHE_DIR, ResultCache, cache_key
+from trial_loader import load_trial
+
+# Warm evaluator ανά worker process (γεμίζει στο _init_worker)
+_EVALUATOR = None
+_MODEL_PATH = None
+_CACHE = None
+_KEY_MUSCLES = None
+
+
+def _init_worker(model_path, cache_dir=None, muscles=None, dtype=np.float64):
+    global _EVALUATOR, _MODEL_PATH, _CACHE, _KEY_MUSCLES
+    _EVALUATOR = rml.FrameEvaluator(model_path, muscles or rml.MUSCLES, dtype=dtype)
+    # ίδια λίστα μυών στο cache key με το run_muscle_lengths (κοινά entries)
+    _KEY_MUSCLES = rml.cache_muscle_names(model_path, muscles or rml.MUSCLES)
+    _MODEL_PATH = model_path
+    _CACHE = ResultCache(cache_dir) if cache_dir else None
+
+
+def collect_trials(sources):
+    """
+    Επιστρέφει ταξινομημένη λίστα από CSV paths (χωρίς διπλότυπα)
+    από manifest αρχεία ή glob patterns.
+    """
+    trials = []
+    for src in sources:
+        if os.path.isfile(src) and not src.lower().endswith(".csv"):
+            with open(src) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        trials.append(line)
+        else:
+            trials.extend(sorted(glob.glob(src)))
+
+    seen = set()
+    unique = []
+    for t in trials:
+        if t not in seen:
+            seen.add(t)
+            unique.append(t)
+    return unique
+
+
+def output_path_for(csv_path, out_dir, ext=".csv"):
+    """S135/S135_G03_D01_B01_T01.csv -> <out_dir>/S135_G03_D01_B01_T01_muscles.csv"""
+    stem = os.path.splitext(os.path.basename(csv_path.rstrip("/\\")))[0]
+    return os.path.join(out_dir, stem + "_muscles" + ext)
+
+
+def process_trial(csv_path, out_csv):
+    """
+    Τρέχει ένα trial στο warm μοντέλο του worker.
+
+    Returns:
+        dict με trial, status, frames, seconds, fps, error
+    """
+    t0 = time.perf_counter()
+    record = {"trial": csv_path, "status": "ok", "frames": 0,
+              "seconds": 0.0, "fps": 0.0, "error": ""}
+    try:
+        key = None
+        meta = rml.output_meta(_MODEL_PATH, csv_path)
+        if _CACHE is not None:
+            extra = {"dtype": "float32"} if _EVALUATOR.dtype == np.float32 else None
+            key = cache_key(_MODEL_PATH, csv_path, rml.COLUMN_MAP,
+                            _KEY_MUSCLES, extra)
+            cached = _CACHE.get_frame(key)
+            if cached is not None:
+                # ίδιοι dtypes/τιμές με ένα φρέσκο run (π.χ. float32 σε .cols)
+                save_table(out_csv, cached, meta=meta)
+                record["status"] = "cached"
+                record["seconds"] = time.perf_counter() - t0
+                return record
+
+        df = load_trial(csv_path, ["time"], optional=list(rml.COLUMN_MAP))
+
+        available_map, _ = rml.find_available_columns(df)
+        if not available_map:
+            raise ValueError("None of the expected angle columns were found.")
+
+        coord_names, angles = rml.angles_matrix(df, available_map)
+        lengths = _EVALUATOR.evaluate(angles, coord_names)
+        results = rml.lengths_to_columns(df["time"].values, lengths,
+                                         _EVALUATOR.muscle_names)
+        out_df = pd.DataFrame(results)
+        save_table(out_csv, out_df, meta=meta)
+        record["frames"] = len(df)
+    except Exception as exc:  # ένα χαλασμένο trial δεν ρίχνει όλο το batch
+        record["status"] = "failed"
+        record["error"] = f"{type(exc).__name__}: {exc}"
+    else:
+        if key is not None:
+            # το output έχει ήδη σωθεί: ένα πρόβλημα στο cache δεν κάνει το trial failed
+            try:
+                _CACHE.put_frame(key, out_df, {"model": os.path.abspath(_MODEL_PATH),
+                                               "input_csv": os.path.abspath(csv_path)})
+            except OSError as exc:
+                record["error"] = f"cache store skipped: {type(exc).__name__}: {exc}"
+
+    record["seconds"] = time.perf_counter() - t0
+    if record["frames"] and record["seconds"] > 0:
+        record["fps"] = record["frames"] / record["seconds"]
+    return record
+
+
+def run_batch(model_path, trials, out_dir, workers=None, cache_dir=None, ext=".csv",
+              muscles=None, dtype=np.float64):
+    """
+    Μοιράζει τα trials σε process pool με warm μοντέλο ανά worker.
+
+    Returns:
+        λίστα από records (ένα ανά trial, με τη σειρά ολοκλήρωσης)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    records = []
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(model_path, cache_dir, muscles, dtype)) as pool:
+        futures = {
+            pool.submit(process_trial, csv_path, output_path_for(csv_path, out_dir, ext)): csv_path
+            for csv_path in trials
+        }
+        for fut in as_completed(futures):
+            csv_path = futures[fut]
+            try:
+                record = fut.result()
+            except Exception as exc:
+                # π.χ. worker που πέθανε (BrokenProcessPool)
+                record = {"trial": csv_path, "status": "failed", "frames": 0,
+                          "seconds": 0.0, "fps": 0.0,
+                          "error": f"{type(exc).__name__}: {exc}"}
+            records.append(record)
+
+            if record["status"] == "cached":
+                print(f"  ♻ {csv_path}: cached result")
+            elif record["status"] == "ok":
+                print(f"  ✅ {csv_path}: {record['frames']} frames in "
+                      f"{record['seconds']:.1f} s ({record['fps']:.0f} frames/s)")
+            else:
+                print(f"  ❌ {csv_path}: {record['error']}")
+
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute muscle lengths for many trials on a process pool.")
+    parser.add_argument("model", help="Gait2392 .osim model")
+    parser.add_argument("out_dir", help="folder for the *_muscles.csv outputs")
+    parser.add_argument("sources", nargs="+",
+                        help="manifest .txt file(s) and/or glob pattern(s) of trial CSVs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--report", default=None,
+                        help="optional CSV with per-trial throughput and failures")
+    parser.add_argument("--format", choices=["csv", "cols", "parquet"], default="csv",
+                        help="output format of the *_muscles files (default: csv)")
+    parser.add_argument("--muscles", default=None, metavar="PATTERNS",
+                        help="comma-separated muscle names / fnmatch patterns, or 'all' "
+                             "(default: the six muscles in run_muscle_lengths.MUSCLES)")
+    parser.add_argument("--float32", action="store_true",
+                        help="store the muscle lengths as float32 instead of float64")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="content-addressed result cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always recompute and do not store results")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.model):
+        print(f"❌ Model not found: {args.model}")
+        sys.exit(1)
+
+    trials = collect_trials(args.sources)
+    if not trials:
+        print("❌ No trial CSVs matched.")
+        sys.exit(1)
+
+    print(f"📄 Model: {args.model}")
+    print(f"📄 Trials: {len(trials)}")
+    print(f"📄 Output folder: {args.out_dir}")
+
+    t0 = time.perf_counter()
+    info = {}
+    # οι workers είναι άλλα processes: εδώ μετράμε το pool συνολικά (+ children peak RSS)
+    with profiling(args, extra=info) as timer:
+        with timer.stage("batch (process pool)"):
+            records = run_batch(args.model, trials, args.out_dir, workers=args.workers,
+                                cache_dir=None if args.no_cache else args.cache_dir,
+                                ext="." + args.format,
+                                muscles=rml.parse_muscle_arg(args.muscles),
+                                dtype=np.float32 if args.float32 else np.float64)
+        info["trials"] = records
+    wall = time.perf_counter() - t0
+
+    n_cached = sum(r["status"] == "cached" for r in records)
+    n_failed = sum(r["status"] == "failed" for r in records)
+    n_ok = len(records) - n_failed
+    total_frames = sum(r["frames"] for r in records)
+
+    print(f"\n➡ {n_ok}/{len(records)} trials ok ({n_cached} from cache), {n_failed} failed")
+    print(f"➡ {total_frames} frames in {wall:.1f} s "
+          f"({total_frames / wall if wall > 0 else 0.0:.0f} frames/s overall)")
+
+    if args.report:
+        pd.DataFrame(records).sort_values("trial").to_csv(args.report, index=False)
+        print(f"✅ Saved batch report to: {args.report}")
+
+    if n_failed:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Frames/s: FrameEvaluator vs το παλιό iterrows loop του run_muscle_lengths.
+
+Usage:
+    python benchmarks/bench_frame_evaluator.py <model.osim> <input_csv> [--frames N] [--repeat R]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import run_muscle_lengths as rml  # noqa: E402
+
+
+def legacy_loop(model, state, df, available_map, muscle_names):
+    """Αντίγραφο του αρχικού βρόχου (iterrows + string lookups) για σύγκριση."""
+    coord_set = model.getCoordinateSet()
+    muscles = model.getMuscles()
+    results = {m_name + "_length": np.zeros(len(df)) for m_name in muscle_names}
+
+    for i, row in df.iterrows():
+        for src_col, coord_name in available_map.items():
+            angle_rad = np.deg2rad(row[src_col])
+            coord = coord_set.get(coord_name)
+            coord.setValue(state, float(angle_rad), False)
+        model.realizePosition(state)
+        for m_name in muscle_names:
+            m = muscles.get(m_name)
+            results[m_name + "_length"][i] = m.getLength(state)
+
+    return np.column_stack([results[m + "_length"] for m in muscle_names])
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("model")
+    parser.add_argument("csv")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="use only the first N frames")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    if args.frames:
+        df = df.iloc[:args.frames].reset_index(drop=True)
+    available_map, _ = rml.find_available_columns(df)
+
+    evaluator = rml.FrameEvaluator(args.model)
+    n = len(df)
+
+    t_old, old = best_of(lambda: legacy_loop(evaluator.model, evaluator.state, df,
+                                             available_map, rml.MUSCLES), args.repeat)
+
+    def run_new():
+        coord_names, angles = rml.angles_matrix(df, available_map)
+        return evaluator.evaluate(angles, coord_names)
+
+    t_new, new = best_of(run_new, args.repeat)
+
+    print(f"Frames: {n}")
+    print(f"iterrows loop:  {n / t_old:10.0f} frames/s  ({t_old:.3f} s)")
+    print(f"FrameEvaluator: {n / t_new:10.0f} frames/s  ({t_new:.3f} s)")
+    print(f"Speed-up: {t_old / t_new:.2f}x")
+    print(f"Identical results: {np.array_equal(old, new)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Heel-strike detection: κοινός NumPy detector vs τα παλιά Python loops,
+σε συνθετικά σήματα πολλών εκατομμυρίων δειγμάτων.
+
+Usage:
+    python benchmarks/bench_heel_strikes.py [--samples 5000000] [--rate 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from heel_strikes import contact_heel_strikes, trajectory_heel_strikes  # noqa: E402
+
+
+def legacy_contact(contact):
+    """Το αρχικό loop του plot_all_subjects.detect_heel_strikes (Contact RT)."""
+    hs = []
+    for i in range(1, len(contact)):
+        if contact[i - 1] < 0.5 and contact[i] >= 0.5:
+            hs.append(i)
+    return hs
+
+
+def legacy_trajectory(y, min_distance=50):
+    """Το αρχικό loop του plot_all_subjects.detect_heel_strikes (heel y minima)."""
+    hs = []
+    for i in range(1, len(y) - 1):
+        if y[i] < y[i - 1] and y[i] < y[i + 1]:
+            if not hs or (i - hs[-1]) > min_distance:
+                hs.append(i)
+    return hs
+
+
+def synthetic_signals(n, rate, seed=0):
+    """~1 Hz βάδισμα: τετραγωνικό Contact RT και θορυβώδης τροχιά φτέρνας."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / rate
+    # μικρή διακύμανση στη διάρκεια του κύκλου
+    phase = 2 * np.pi * (t + 0.05 * np.sin(2 * np.pi * 0.1 * t))
+    contact = ((phase / (2 * np.pi)) % 1.0 < 0.6).astype(float)
+    heel_y = 50 + 40 * np.cos(phase) + rng.normal(0, 0.5, n)
+    return contact, heel_y
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5_000_000)
+    parser.add_argument("--rate", type=float, default=100.0, help="sample rate (Hz)")
+    parser.add_argument("--min-distance", type=int, default=50)
+    args = parser.parse_args()
+
+    contact, heel_y = synthetic_signals(args.samples, args.rate)
+    n = args.samples
+    print(f"Samples: {n}")
+
+    t_old, old = timed(legacy_contact, contact)
+    t_new, new = timed(contact_heel_strikes, contact)
+    print(f"Contact RT   loop {n / t_old / 1e6:8.2f} Msamples/s | "
+          f"numpy {n / t_new / 1e6:8.2f} Msamples/s | "
+          f"x{t_old / t_new:6.1f} | same: {np.array_equal(old, new)}")
+
+    t_old, old = timed(legacy_trajectory, heel_y, args.min_distance)
+    t_new, new = timed(trajectory_heel_strikes, heel_y, args.min_distance)
+    print(f"Heel minima  loop {n / t_old / 1e6:8.2f} Msamples/s | "
+          f"numpy {n / t_new / 1e6:8.2f} Msamples/s | "
+          f"x{t_old / t_new:6.1f} | same: {np.array_equal(old, new)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Throughput ανά στάδιο σε συνθετικά NONAN trials, με JSON αποτελέσματα και
+σύγκριση με αποθηκευμένο baseline.
+
+Στάδια (best of --repeat):
+    load            trial_loader: time + γωνίες + Contact RT          frames/s
+    mot             csv_to_gait2392_mot: NONAN CSV -> .mot             frames/s
+    muscle lengths  FrameEvaluator (Gait2392 ή stand_in_model)         frames/s
+    cycles          heel strikes + resample_cycles                     frames/s, cycles/s
+    subject stats   CycleStats.update                                  cycles/s
+    plots           render_muscle_figure μέσω render_scheduler         figures/s
+
+Χωρίς OpenSim (ή χωρίς --model) το muscle lengths στάδιο τρέχει τον ίδιο
+FrameEvaluator πάνω στο ντετερμινιστικό stand_in_model.
+
+Usage:
+    python benchmarks/bench_stages.py [--model gait2392_simbody.osim]
+        [--frames 30000] [--trials 3] [--repeat 3] [--figures 6] [--muscles all]
+        [--json results.json] [--baseline baseline.json] [--tolerance 0.2]
+
+Με --baseline, κάθε rate που έπεσε περισσότερο από --tolerance (κλάσμα)
+σημειώνεται ως regression και το script βγαίνει με exit code 2.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render_scheduler import FigureJob, render_jobs  # noqa: E402  (Agg, πριν από το pyplot)
+
+import heel_strikes  # noqa: E402
+import run_muscle_lengths as rml  # noqa: E402
+from csv_to_gait2392_mot import convert_csv_to_mot  # noqa: E402
+from cycle_stats import CycleStats  # noqa: E402
+from gait_cycle_muscle_lengths import resample_cycles  # noqa: E402
+from plot_muscle_lengths import render_muscle_figure  # noqa: E402
+from trial_loader import load_trial  # noqa: E402
+
+from stand_in_model import stand_in_model  # noqa: E402
+from synthetic_trials import write_synthetic_dataset  # noqa: E402
+
+N_PHASE_POINTS = 101
+RATE_KEYS = ("frames_per_s", "cycles_per_s", "figures_per_s")
+
+
+def best_of(fn, repeat):
+    """Ο μικρότερος χρόνος από repeat εκτελέσεις και το αποτέλεσμα της τελευταίας."""
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def stage_record(seconds, frames=None, cycles=None, figures=None):
+    rec = {"seconds": seconds}
+    for key, count in (("frames", frames), ("cycles", cycles), ("figures", figures)):
+        if count is not None:
+            rec[key] = int(count)
+            rec[f"{key}_per_s"] = count / seconds if seconds > 0 else float("inf")
+    return rec
+
+
+def make_evaluator(model_path, muscles):
+    """FrameEvaluator στο Gait2392 αν γίνεται, αλλιώς στο stand-in. Returns: (ev, label)"""
+    if model_path and rml.opensim is not None:
+        return rml.FrameEvaluator(model_path, muscles), os.path.basename(model_path)
+    if model_path:
+        print("⚠ OpenSim is not installed: using the deterministic stand-in model.")
+    model, state = stand_in_model()
+    return rml.FrameEvaluator(model=model, state=state, muscle_names=muscles), "stand-in"
+
+
+def run_stages(trials, evaluator, tmp_dir, repeat=3, n_figures=6):
+    """
+    Returns:
+        dict stage -> record (seconds, counts, rates)
+    """
+    angle_cols = list(rml.COLUMN_MAP)
+    cycle_cols = [heel_strikes.CONTACT_COLUMN, heel_strikes.HEEL_Y_COLUMN]
+    stages = {}
+
+    # load
+    def load_all():
+        return [load_trial(p, ["time"], optional=angle_cols + cycle_cols) for p in trials]
+
+    seconds, frames = best_of(load_all, repeat)
+    n_frames = sum(len(df) for df in frames)
+    stages["load"] = stage_record(seconds, frames=n_frames)
+
+    # mot
+    def mot_all():
+        for k, p in enumerate(trials):
+            convert_csv_to_mot(p, os.path.join(tmp_dir, f"trial{k}.mot"), verbose=False)
+
+    seconds, _ = best_of(mot_all, repeat)
+    stages["mot"] = stage_record(seconds, frames=n_frames)
+
+    # muscle lengths
+    inputs = []
+    for df in frames:
+        available_map, _ = rml.find_available_columns(df)
+        inputs.append(rml.angles_matrix(df, available_map))
+
+    def lengths_all():
+        return [evaluator.evaluate(angles, coord_names) for coord_names, angles in inputs]
+
+    seconds, lengths = best_of(lengths_all, repeat)
+    stages["muscle lengths"] = stage_record(seconds, frames=n_frames)
+
+    # cycles
+    def cycles_all():
+        out = []
+        for df, values in zip(frames, lengths):
+            hs_idx = heel_strikes.detect_heel_strikes(df, count_start=True)
+            cycles, _ = resample_cycles(df["time"].values, values, hs_idx,
+                                        n_points=N_PHASE_POINTS)
+            out.append(cycles)
+        return out
+
+    seconds, cycles = best_of(cycles_all, repeat)
+    n_cycles = sum(len(c) for c in cycles)
+    stages["cycles"] = stage_record(seconds, frames=n_frames, cycles=n_cycles)
+
+    # subject stats
+    def stats_all():
+        engine = CycleStats([m + "_length" for m in evaluator.muscle_names], N_PHASE_POINTS)
+        for c in cycles:
+            engine.update("S901", c)
+        return engine
+
+    seconds, _ = best_of(stats_all, repeat)
+    stages["subject stats"] = stage_record(seconds, cycles=n_cycles)
+
+    # plots: ένα figure ανά μυ του πρώτου trial, σειριακά (figures/s ανά πυρήνα)
+    if n_figures and len(cycles[0]):
+        x = np.linspace(0, 100, N_PHASE_POINTS)
+        jobs = []
+        for k in range(min(n_figures, len(evaluator.muscle_names))):
+            muscle = evaluator.muscle_names[k] + "_length"
+            jobs.append(FigureJob(os.path.join(tmp_dir, f"{muscle}.png"), render_muscle_figure,
+                                  {"muscle": muscle, "x": x,
+                                   "data": np.ascontiguousarray(cycles[0][:, :, k])}))
+        seconds, _ = best_of(lambda: render_jobs(jobs, workers=1, verbose=False), 1)
+        stages["plots"] = stage_record(seconds, figures=len(jobs))
+
+    return stages
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Returns:
+        λίστα από (stage, rate, baseline, current, ratio, regression)
+    """
+    rows = []
+    for stage, rec in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base is None:
+            continue
+        for key in RATE_KEYS:
+            if key in rec and key in base and base[key] > 0:
+                ratio = rec[key] / base[key]
+                rows.append((stage, key, base[key], rec[key], ratio, ratio < 1 - tolerance))
+    return rows
+
+
+def fmt_rate(value):
+    return f"{value:,.0f}" if value >= 100 else f"{value:.2f}"
+
+
+def print_results(results):
+    meta = results["meta"]
+    print(f"➡ {meta['trials']} trials x {meta['frames_per_trial']} frames, "
+          f"{meta['muscles']} muscles, model: {meta['model']}")
+    for stage, rec in results["stages"].items():
+        rates = ", ".join(f"{fmt_rate(rec[k])} {k.replace('_per_s', '')}/s"
+                          for k in RATE_KEYS if k in rec)
+        print(f"  - {stage:<15} {rec['seconds']:8.3f} s  {rates}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=None,
+                        help="Gait2392 .osim (default / without OpenSim: stand-in model)")
+    parser.add_argument("--frames", type=int, default=30_000, help="frames per trial")
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=100.0, help="sample rate (Hz)")
+    parser.add_argument("--extra-columns", type=int, default=100)
+    parser.add_argument("--muscles", default=None, metavar="PATTERNS",
+                        help="muscle names / patterns, or 'all' (default: MUSCLES)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--figures", type=int, default=6,
+                        help="figures rendered in the plots stage (0 = skip)")
+    parser.add_argument("--json", default=None, help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="JSON of a previous run to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown as a fraction (default: %(default)s)")
+    args = parser.parse_args()
+
+    evaluator, model_label = make_evaluator(
+        args.model, rml.parse_muscle_arg(args.muscles) or rml.MUSCLES)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        trials = write_synthetic_dataset(tmp_dir, ("S901",), args.trials, args.frames,
+                                         args.rate, args.extra_columns)
+        stages = run_stages(trials, evaluator, tmp_dir, args.repeat, args.figures)
+
+    results = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "model": model_label,
+            "muscles": len(evaluator.muscle_names),
+            "trials": args.trials,
+            "frames_per_trial": args.frames,
+            "repeat": args.repeat,
+        },
+        "stages": stages,
+    }
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"✅ Saved results to: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        base_meta = baseline.get("meta", {})
+        for key in ("model", "muscles", "frames_per_trial"):
+            if base_meta.get(key) != results["meta"][key]:
+                print(f"⚠ Baseline {key} = {base_meta.get(key)}, this run = "
+                      f"{results['meta'][key]}: rates are not directly comparable.")
+        rows = compare_to_baseline(results, baseline, args.tolerance)
+        print(f"\n➡ Against baseline {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for stage, key, base, cur, ratio, regression in rows:
+            flag = "❌ regression" if regression else "✅"
+            print(f"  - {stage:<15} {key:<14} {fmt_rate(base):>12} -> {fmt_rate(cur):>12}  "
+                  f"x{ratio:5.2f}  {flag}")
+        if any(r[-1] for r in rows):
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Φόρτωση trial: πλήρες pd.read_csv vs trial_loader (μόνο οι στήλες κάθε σταδίου).
+Μετράει χρόνο και peak μνήμη (tracemalloc).
+
+Χωρίς --csv φτιάχνεται συνθετικό "φαρδύ" CSV με τις στήλες του COLUMN_MAP,
+Contact RT και πολλές επιπλέον Noraxon-like στήλες.
+
+Usage:
+    python benchmarks/bench_trial_loader.py [--csv TRIAL.csv]
+        [--frames 60000] [--extra-columns 300]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_muscle_lengths import COLUMN_MAP  # noqa: E402
+from trial_loader import load_trial  # noqa: E402
+
+
+def synthetic_trial(path, n_frames, n_extra, rate=100.0, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {"time": np.arange(n_frames) / rate}
+    for col in COLUMN_MAP:
+        data[col] = rng.normal(0, 20, n_frames)
+    data["Contact RT"] = ((data["time"] % 1.0) < 0.6).astype(float)
+    for k in range(n_extra):
+        data[f"Noraxon channel {k} (mV)"] = rng.normal(0, 1, n_frames)
+    pd.DataFrame(data).to_csv(path, index=False)
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    df = fn()
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, df.shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default=None, help="real NONAN trial (default: synthetic)")
+    parser.add_argument("--frames", type=int, default=60_000)
+    parser.add_argument("--extra-columns", type=int, default=300)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    csv_path = args.csv
+    if csv_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        csv_path = os.path.join(tmp_dir.name, "trial.csv")
+        synthetic_trial(csv_path, args.frames, args.extra_columns)
+
+    angles = list(COLUMN_MAP)
+    cases = [
+        ("full read_csv", lambda: pd.read_csv(csv_path)),
+        ("angles (float64)", lambda: load_trial(csv_path, ["time"], optional=angles)),
+        ("angles (float32)", lambda: load_trial(csv_path, ["time"], optional=angles,
+                                                dtype=np.float32)),
+        ("cycle (Contact RT)", lambda: load_trial(csv_path, ["time"],
+                                                  optional=["Contact RT"])),
+    ]
+
+    print(f"Trial: {csv_path} ({os.path.getsize(csv_path) / 1024 / 1024:.1f} MB)")
+    base_t = base_m = None
+    for name, fn in cases:
+        seconds, peak, shape = measure(fn)
+        if base_t is None:
+            base_t, base_m = seconds, peak
+        print(f"{name:<20} {seconds:7.3f} s  peak {peak / 1024 / 1024:8.1f} MB  "
+              f"shape {shape}  | x{base_t / seconds:5.1f} faster, "
+              f"x{base_m / max(peak, 1):6.1f} less memory")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
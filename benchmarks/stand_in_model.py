@@ -0,0 +1,133 @@
+"""
+Ντετερμινιστικό stand-in για το Gait2392 όταν δεν υπάρχει OpenSim.
+
+Υλοποιεί το μικρό κομμάτι του OpenSim API που χρησιμοποιεί ο FrameEvaluator
+(MuscleSet, CoordinateSet, State, realizePosition), ώστε τα benchmarks να
+τρέχουν τον ίδιο κώδικα με το πραγματικό μοντέλο:
+
+    model, state = stand_in_model()
+    ev = FrameEvaluator(model=model, state=state, muscle_names=["all"])
+
+Οι 92 μύες έχουν τα ονόματα του Gait2392 και το μήκος κάθε μυός είναι ομαλή
+συνάρτηση μόνο των συντεταγμένων που διασχίζει (σταθεροί συντελεστές από το
+όνομα), άρα τα αποτελέσματα είναι ίδια σε κάθε run και μηχάνημα. Οι απόλυτες
+τιμές frames/s ΔΕΝ είναι του OpenSim· χρησιμεύουν για σύγκριση μεταξύ commits.
+"""
+import math
+import zlib
+
+COORDINATES = ["hip_flexion", "hip_adduction", "hip_rotation", "knee_angle", "ankle_angle"]
+
+_HIP = ["hip_flexion", "hip_adduction", "hip_rotation"]
+# μυς (χωρίς _r/_l) -> συντεταγμένες που διασχίζει
+MUSCLE_COORDS = {
+    **{m: _HIP for m in [
+        "glut_med1", "glut_med2", "glut_med3", "glut_min1", "glut_min2", "glut_min3",
+        "add_long", "add_brev", "add_mag1", "add_mag2", "add_mag3", "pect",
+        "glut_max1", "glut_max2", "glut_max3", "iliacus", "psoas", "quad_fem",
+        "gem", "peri"]},
+    **{m: _HIP + ["knee_angle"] for m in [
+        "semimem", "semiten", "bifemlh", "sar", "tfl", "grac", "rect_fem"]},
+    **{m: ["knee_angle"] for m in ["bifemsh", "vas_med", "vas_int", "vas_lat"]},
+    **{m: ["knee_angle", "ankle_angle"] for m in ["med_gas", "lat_gas"]},
+    **{m: ["ankle_angle"] for m in [
+        "soleus", "tib_post", "flex_dig", "flex_hal", "tib_ant", "per_brev",
+        "per_long", "per_tert", "ext_dig", "ext_hal"]},
+    # κορμός: καμία από τις συντεταγμένες του COLUMN_MAP
+    **{m: [] for m in ["ercspn", "intobl", "extobl"]},
+}
+
+
+class State:
+    def __init__(self, coord_names):
+        self.q = {c: 0.0 for c in coord_names}
+        self.realized = False
+
+
+class Coordinate:
+    def __init__(self, name):
+        self._name = name
+
+    def getName(self):
+        return self._name
+
+    def setValue(self, state, value, enforce_constraints=True):
+        state.q[self._name] = value
+        state.realized = False
+
+    def getValue(self, state):
+        return state.q[self._name]
+
+    def getDefaultValue(self):
+        return 0.0
+
+    def getRangeMin(self):
+        return -math.pi / 2
+
+    def getRangeMax(self):
+        return math.pi / 2
+
+
+class Muscle:
+    def __init__(self, name, coords):
+        self._name = name
+        self._coords = list(coords)
+        # σταθεροί συντελεστές από το όνομα (crc32, όχι το hash() που αλλάζει ανά process)
+        seed = zlib.crc32(name.encode())
+        self._l0 = 0.15 + (seed % 1000) / 2000.0
+        self._terms = []
+        for k, c in enumerate(self._coords):
+            r = 0.01 + ((seed >> (3 * k)) % 50) / 1000.0  # ~"moment arm" σε m
+            phi = ((seed >> (5 * k)) % 628) / 100.0
+            self._terms.append((c, r, phi))
+
+    def getName(self):
+        return self._name
+
+    def getLength(self, state):
+        if not state.realized:
+            raise RuntimeError("State must be realized to Position before getLength().")
+        q = state.q
+        return self._l0 + sum(r * math.sin(q[c] + phi) for c, r, phi in self._terms)
+
+
+class _Set:
+    def __init__(self, items):
+        self._items = list(items)
+        self._by_name = {it.getName(): it for it in self._items}
+
+    def get(self, key):
+        return self._items[key] if isinstance(key, int) else self._by_name[key]
+
+    def getSize(self):
+        return len(self._items)
+
+    def contains(self, name):
+        return name in self._by_name
+
+
+class StandInModel:
+    def __init__(self):
+        coord_names = [f"{c}_{s}" for s in ("r", "l") for c in COORDINATES]
+        self._coord_names = coord_names
+        self._coords = _Set(Coordinate(c) for c in coord_names)
+        self._muscles = _Set(Muscle(f"{m}_{s}", [f"{c}_{s}" for c in coords])
+                             for s in ("r", "l") for m, coords in MUSCLE_COORDS.items())
+
+    def initSystem(self):
+        return State(self._coord_names)
+
+    def getCoordinateSet(self):
+        return self._coords
+
+    def getMuscles(self):
+        return self._muscles
+
+    def realizePosition(self, state):
+        state.realized = True
+
+
+def stand_in_model():
+    """(model, state) όπως το run_muscle_lengths.load_model."""
+    model = StandInModel()
+    return model, model.initSystem()
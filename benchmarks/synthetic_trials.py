@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Συνθετικά NONAN trials για benchmarks: ίδιο layout και ονόματα στηλών με το
+Noraxon export (γωνίες του COLUMN_MAP, Contact RT, τροχιά φτέρνας και
+επιπλέον κανάλια), με περιοδικό βάδισμα και ρυθμιζόμενο μήκος.
+
+Usage:
+    python benchmarks/synthetic_trials.py <dataset_root> [--subjects S901,S902]
+        [--trials 3] [--frames 30000] [--rate 100] [--extra-columns 100] [--seed 0]
+
+Γράφει <dataset_root>/S901/S901_G03_D01_B01_T01.csv κ.λπ. (βλ. trial_queue discover).
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from heel_strikes import CONTACT_COLUMN, HEEL_Y_COLUMN  # noqa: E402
+
+# (mean, amplitude, phase offset σε κλάσματα κύκλου) ανά άρθρωση, σε deg
+JOINT_PROFILES = {
+    "Hip Flexion": (10.0, 25.0, 0.00),
+    "Hip Abduction": (0.0, 5.0, 0.10),
+    "Hip Rotation Ext": (2.0, 6.0, 0.20),
+    "Knee Flexion": (25.0, 30.0, 0.35),
+    "Ankle Dorsiflexion": (2.0, 12.0, 0.55),
+}
+STANCE_FRACTION = 0.6
+
+
+def synthetic_trial(n_frames, rate=100.0, cadence_hz=0.95, n_extra=100, seed=0):
+    """
+    Ένα trial ως DataFrame. Η φάση του δεξιού ποδιού ξεκινά με heel strike στο
+    t = 0, το αριστερό πόδι είναι μισό κύκλο πίσω, και η διάρκεια κάθε κύκλου
+    διακυμαίνεται ελαφρά (όπως στο πραγματικό βάδισμα).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_frames) / rate
+    # κλάσμα κύκλων από την αρχή: λίγο αργή διακύμανση του cadence
+    cycles_r = cadence_hz * t + 0.03 * np.sin(2 * np.pi * 0.05 * t)
+    cycles_l = cycles_r + 0.5
+
+    data = {"time": t}
+    for side, cyc in (("LT", cycles_l), ("RT", cycles_r)):
+        for joint, (mean, amp, offset) in JOINT_PROFILES.items():
+            angle = mean + amp * np.sin(2 * np.pi * (cyc - offset))
+            data[f"{joint} {side} (deg)"] = angle + rng.normal(0, 0.3, n_frames)
+
+    phase_r = cycles_r % 1.0
+    data[CONTACT_COLUMN] = (phase_r < STANCE_FRACTION).astype(float)
+    # ελάχιστο ύψος φτέρνας στο heel strike
+    data[HEEL_Y_COLUMN] = 50 - 40 * np.cos(2 * np.pi * phase_r) + rng.normal(0, 0.2, n_frames)
+    for k in range(n_extra):
+        data[f"Noraxon channel {k} (mV)"] = rng.normal(0, 1, n_frames)
+    return pd.DataFrame(data)
+
+
+def trial_name(subject, k):
+    return f"{subject}_G03_D01_B01_T{k:02d}"
+
+
+def write_synthetic_dataset(root, subjects=("S901",), n_trials=3, n_frames=30_000,
+                            rate=100.0, n_extra=100, seed=0):
+    """
+    Returns:
+        λίστα με τα paths των CSVs, με τη σειρά που γράφτηκαν
+    """
+    paths = []
+    for s_idx, subject in enumerate(subjects):
+        os.makedirs(os.path.join(root, subject), exist_ok=True)
+        for k in range(1, n_trials + 1):
+            df = synthetic_trial(n_frames, rate, cadence_hz=0.9 + 0.05 * s_idx,
+                                 n_extra=n_extra, seed=seed + 100 * s_idx + k)
+            path = os.path.join(root, subject, trial_name(subject, k) + ".csv")
+            df.to_csv(path, index=False)
+            paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("root", help="dataset root to write S*/S*_G03_*.csv into")
+    parser.add_argument("--subjects", default="S901",
+                        help="comma-separated subject ids (default: %(default)s)")
+    parser.add_argument("--trials", type=int, default=3, help="trials per subject")
+    parser.add_argument("--frames", type=int, default=30_000, help="frames per trial")
+    parser.add_argument("--rate", type=float, default=100.0, help="sample rate (Hz)")
+    parser.add_argument("--extra-columns", type=int, default=100,
+                        help="extra Noraxon-like channels (width of the export)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    subjects = [s.strip() for s in args.subjects.split(",") if s.strip()]
+    paths = write_synthetic_dataset(args.root, subjects, args.trials, args.frames,
+                                    args.rate, args.extra_columns, args.seed)
+    print(f"✅ Wrote {len(paths)} synthetic trials ({args.frames} frames each) to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Binary columnar intermediate format για τα στάδια του pipeline.
+
+Μορφές (διαλέγονται από την κατάληξη του path):
+    .cols     φάκελος με ένα .npy ανά στήλη + header.json (zero-copy memmap reads)
+    .parquet  Parquet, αν υπάρχει pyarrow
+    άλλο      CSV (export / συμβατότητα)
+
+Usage:
+    python columnar_io.py convert <input> <output>
+    python columnar_io.py info <path>
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import add_profile_args, profiling
+
+COLUMNAR_EXT = ".cols"
+PARQUET_EXT = ".parquet"
+HEADER_FILE = "header.json"
+FORMAT_VERSION = 1
+
+
+def table_format(path):
+    """'cols', 'parquet' ή 'csv' ανάλογα με την κατάληξη."""
+    lower = str(path).lower().rstrip("/\\")
+    if lower.endswith(COLUMNAR_EXT):
+        return "cols"
+    if lower.endswith(PARQUET_EXT):
+        return "parquet"
+    return "csv"
+
+
+def _require_parquet():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("Parquet needs pyarrow (pip install pyarrow); "
+                          "use a .cols folder instead.")
+
+
+def _read_header(path):
+    with open(os.path.join(path, HEADER_FILE)) as f:
+        return json.load(f)
+
+
+def save_table(path, data, meta=None):
+    """
+    Γράφει DataFrame ή dict στήλη -> array στη μορφή που δείχνει το path.
+    meta: προαιρετικό dict που μπαίνει στο header.json (μόνο για .cols)
+    """
+    fmt = table_format(path)
+    if fmt == "csv":
+        pd.DataFrame(data).to_csv(path, index=False)
+        return
+    if fmt == "parquet":
+        _require_parquet()
+        pd.DataFrame(data).to_parquet(path, index=False)
+        return
+
+    if isinstance(data, pd.DataFrame):
+        items = [(c, data[c].to_numpy()) for c in data.columns]
+    else:
+        items = [(c, np.asarray(v)) for c, v in data.items()]
+
+    os.makedirs(path, exist_ok=True)
+    columns = []
+    n_rows = len(items[0][1]) if items else 0
+    for k, (name, values) in enumerate(items):
+        if values.dtype == object:
+            values = values.astype(str)
+        # αριθμημένα ονόματα αρχείων: οι στήλες του NONAN έχουν κενά και παρενθέσεις
+        fname = f"{k:04d}.npy"
+        np.save(os.path.join(path, fname), np.ascontiguousarray(values))
+        columns.append({"name": str(name), "file": fname, "dtype": str(values.dtype)})
+
+    header = {"version": FORMAT_VERSION, "n_rows": n_rows,
+              "columns": columns, "meta": meta or {}}
+    tmp = os.path.join(path, HEADER_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(header, f, indent=1)
+    # το header γράφεται τελευταίο, ώστε ένας μισογραμμένος φάκελος να μη διαβάζεται
+    os.replace(tmp, os.path.join(path, HEADER_FILE))
+
+
+def table_columns(path):
+    """Ονόματα στηλών χωρίς να διαβαστούν τα δεδομένα."""
+    fmt = table_format(path)
+    if fmt == "cols":
+        return [c["name"] for c in _read_header(path)["columns"]]
+    if fmt == "parquet":
+        _require_parquet()
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def open_columns(path, columns=None):
+    """
+    Zero-copy πρόσβαση σε στήλες ενός .cols φακέλου.
+
+    Returns:
+        dict όνομα -> np.memmap (read-only)
+    """
+    header = _read_header(path)
+    by_name = {c["name"]: c for c in header["columns"]}
+    if columns is None:
+        columns = list(by_name)
+    missing = [c for c in columns if c not in by_name]
+    if missing:
+        raise KeyError(f"Columns not found in {path}: {missing}")
+    return {c: np.load(os.path.join(path, by_name[c]["file"]), mmap_mode="r")
+            for c in columns}
+
+
+def load_table(path, columns=None):
+    """Διαβάζει (προαιρετικά μόνο κάποιες στήλες) σε DataFrame από CSV/.cols/Parquet."""
+    fmt = table_format(path)
+    if fmt == "cols":
+        return pd.DataFrame(open_columns(path, columns), copy=False)
+    if fmt == "parquet":
+        _require_parquet()
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_table_chunks(path, columns=None, chunksize=10_000):
+    """Κομμάτια (DataFrames) των chunksize γραμμών, για online/streaming επεξεργασία."""
+    fmt = table_format(path)
+    if fmt == "csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+        return
+    if fmt == "parquet":
+        _require_parquet()
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize,
+                                                       columns=columns):
+            yield batch.to_pandas()
+        return
+
+    cols = open_columns(path, columns)
+    n_rows = _read_header(path)["n_rows"]
+    for start in range(0, n_rows, chunksize):
+        yield pd.DataFrame({c: v[start:start + chunksize] for c, v in cols.items()},
+                           copy=False)
+
+
+def find_table(base):
+    """
+    Για ένα path χωρίς κατάληξη επιστρέφει το πρώτο υπαρκτό από
+    base.cols, base.parquet, base.csv (ή None). Προτιμάμε τα binary.
+    """
+    for ext in (COLUMNAR_EXT, PARQUET_EXT, ".csv"):
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert or inspect CSV / .cols / .parquet tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("convert", help="rewrite a table in the format of the output extension")
+    p.add_argument("input")
+    p.add_argument("output")
+    add_profile_args(p)
+    p = sub.add_parser("info", help="print the format, columns (and dtypes for .cols)")
+    p.add_argument("path")
+    add_profile_args(p)
+    args = parser.parse_args()
+
+    with profiling(args) as timer, timer.stage(args.command):
+        if args.command == "convert":
+            convert(args.input, args.output)
+        else:
+            print_info(args.path)
+
+
+def convert(src, dst):
+    df = load_table(src)
+    save_table(dst, df, meta={"source": os.path.basename(src)})
+    print(f"✅ Converted {src} -> {dst} ({df.shape[0]} rows, {df.shape[1]} columns)")
+
+
+def print_info(path):
+    cols = table_columns(path)
+    print(f"📄 {path} ({table_format(path)})")
+    if table_format(path) == "cols":
+        header = _read_header(path)
+        print(f"➡ Rows: {header['n_rows']}")
+        for c in header["columns"]:
+            print(f"  - {c['name']} [{c['dtype']}]")
+    else:
+        print(f"➡ Columns ({len(cols)}):")
+        for c in cols:
+            print(f"  - {c}")
+
+
+if __name__ == "__main__":
+    main()
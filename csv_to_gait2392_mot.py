@@ -1,7 +1,12 @@
 import sys
 import os
+import argparse
+import numpy as np
 import pandas as pd
 
+from instrumentation import StageTimer, add_profile_args, profiling
+from trial_loader import load_trial
+
 # Mapping from NONAN column names -> Gait2392 coordinate names
 COLUMN_MAP = {
     # LEFT leg
@@ -20,7 +25,7 @@ COLUMN_MAP = {
 }
 
 
-def write_opensim_mot(df, out_path):
+def write_opensim_mot(df, out_path, chunk_rows=20_000):
     """
     Γράφει ένα OpenSim .mot file με κλασικό Storage format:
     name ...
@@ -30,14 +35,19 @@ def write_opensim_mot(df, out_path):
     endheader
     time col2 col3 ...
     ...
+
+    Οι τιμές γράφονται ανά κομμάτια γραμμών με ένα μόνο %-format ανά κομμάτι
+    (ίδιο κείμενο με f"{val:.6f}"), αντί για iterrows ανά γραμμή.
     """
     n_rows, n_cols = df.shape
     t0 = float(df["time"].iloc[0])
     t1 = float(df["time"].iloc[-1])
 
     name = os.path.splitext(os.path.basename(out_path))[0]
+    values = df.to_numpy(dtype=np.float64)
+    row_fmt = "\t".join(["%.6f"] * n_cols) + "\n"
 
-    with open(out_path, "w") as f:
+    with open(out_path, "w", buffering=1 << 20) as f:
         f.write(f"name {name}\n")
         f.write(f"datarows {n_rows}\n")
         f.write(f"datacolumns {n_cols}\n")
@@ -46,29 +56,39 @@ def write_opensim_mot(df, out_path):
         # header line with column names
         f.write("\t".join(df.columns) + "\n")
         # data rows
-        for _, row in df.iterrows():
-            f.write("\t".join(f"{float(val):.6f}" for val in row.values) + "\n")
+        for start in range(0, n_rows, chunk_rows):
+            chunk = values[start:start + chunk_rows]
+            f.write((row_fmt * len(chunk)) % tuple(chunk.ravel().tolist()))
 
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: python csv_to_gait2392_mot.py <input_csv> <output_mot>")
-        sys.exit(1)
+def read_opensim_mot(mot_path):
+    """
+    Διαβάζει .mot/.sto (Storage format) γρήγορα: header ως dict και τα δεδομένα
+    με τον C parser του pandas.
 
-    csv_path = sys.argv[1]
-    mot_path = sys.argv[2]
+    Returns:
+        df (DataFrame), header (dict, π.χ. name, datarows, datacolumns, range)
+    """
+    header = {}
+    with open(mot_path) as f:
+        for line in f:
+            line = line.strip()
+            if line.lower() == "endheader":
+                break
+            key, _, value = line.partition(" ")
+            if "=" in line and not value:
+                key, _, value = line.partition("=")
+            header[key] = value.strip()
+        else:
+            raise ValueError(f"No 'endheader' line in {mot_path}")
+        df = pd.read_csv(f, sep="\t", engine="c")
 
-    if not os.path.isfile(csv_path):
-        print(f"❌ File not found: {csv_path}")
-        sys.exit(1)
+    df.columns = [c.strip() for c in df.columns]
+    return df, header
 
-    print(f"📄 Reading CSV: {csv_path}")
-    df = pd.read_csv(csv_path)
-
-    if "time" not in df.columns:
-        print("❌ Column 'time' not found in CSV.")
-        sys.exit(1)
 
+def build_mot_frame(df, verbose=True):
+    """time + mapped joint angles από ένα NONAN DataFrame."""
     # φτιάχνουμε dict με time + mapped joint angles
     data = {"time": df["time"].values}
     missing = []
@@ -79,20 +99,58 @@ def main():
         else:
             missing.append(src_col)
 
-    if missing:
+    if missing and verbose:
         print("⚠ Warning: The following expected columns were NOT found in the CSV:")
         for m in missing:
             print("  -", m)
         print("Θα συνεχίσουμε μόνο με τις διαθέσιμες στήλες.\n")
 
-    mot_df = pd.DataFrame(data)
+    return pd.DataFrame(data)
+
+
+def convert_csv_to_mot(csv_path, mot_path, verbose=True, timer=None):
+    """NONAN CSV -> .mot. Returns: το shape του .mot πίνακα."""
+    timer = timer or StageTimer()
+    # μόνο time + οι στήλες του COLUMN_MAP (όχι όλο το Noraxon export)
+    with timer.stage("load csv"):
+        df = load_trial(csv_path, ["time"], optional=list(COLUMN_MAP))
+
+    mot_df = build_mot_frame(df, verbose)
+    if verbose:
+        print("➡ Output columns in .mot:")
+        print(list(mot_df.columns))
+        print("➡ Shape:", mot_df.shape)
+
+    with timer.stage("write mot"):
+        write_opensim_mot(mot_df, mot_path)
+    return mot_df.shape
 
-    print("➡ Output columns in .mot:")
-    print(list(mot_df.columns))
-    print("➡ Shape:", mot_df.shape)
 
-    write_opensim_mot(mot_df, mot_path)
-    print(f"\n✅ Wrote OpenSim .mot file to: {mot_path}")
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python csv_to_gait2392_mot.py <input_csv> <output_mot> "
+              "[--profile REPORT.json] [--cprofile OUT.prof]")
+    parser.add_argument("csv_path")
+    parser.add_argument("mot_path")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    csv_path = args.csv_path
+    mot_path = args.mot_path
+
+    if not os.path.exists(csv_path):
+        print(f"❌ File not found: {csv_path}")
+        sys.exit(1)
+
+    print(f"📄 Reading CSV: {csv_path}")
+    info = {}
+    with profiling(args, extra=info) as timer:
+        try:
+            info["frames"] = convert_csv_to_mot(csv_path, mot_path, timer=timer)[0]
+        except ValueError as exc:
+            print(f"❌ {exc}")
+            sys.exit(1)
+        print(f"\n✅ Wrote OpenSim .mot file to: {mot_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+"""
+Streaming στατιστικά κύκλων (mean, SD, count) ανά group–phase–muscle.
+
+Κάθε trial δίνει ένα (n_cycles, n_points, n_muscles) array που ενώνεται στους
+accumulators του group (π.χ. subject) με τον κανόνα των Chan/Welford. Η μνήμη
+είναι σταθερή ως προς τον αριθμό των trials: κρατάμε μόνο count, mean και M2
+(άθροισμα τετραγώνων αποκλίσεων) ανά κελί. Τα NaN αγνοούνται όπως στο pandas.
+
+Οι κύκλοι που μπαίνουν στα subject stats βγαίνουν πάντα από το subject_cycles,
+ώστε plot_all_subjects και pipeline να γράφουν τον ίδιο subject_stats πίνακα.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import heel_strikes
+from gait_cycle_muscle_lengths import resample_cycles
+
+# Κύκλοι με end <= start + 5 (λιγότεροι από 7 δείγματα) είναι artefacts
+SUBJECT_MIN_SAMPLES = 7
+
+
+def subject_cycles(imu_df, values, n_points=101):
+    """
+    Ο κανόνας κύκλων των subject stats (όπως το αρχικό plot_all_subjects):
+    heel strikes από Contact RT 0→1 (ή minima της τροχιάς φτέρνας, min 50
+    δείγματα απόσταση), χωρίς το πρώτο frame ως heel strike, και κανονικοποίηση
+    στο sample-index domain (time = 0..n-1).
+
+    imu_df: IMU frames ήδη ευθυγραμμισμένα γραμμή-γραμμή με το values
+    values: (n_frames, n_cols) μήκη μυών
+
+    Returns:
+        cycles (n_cycles, n_points, n_cols)
+    Raises:
+        ValueError αν βρεθούν λιγότερα από 2 heel strikes
+    """
+    hs_idx = heel_strikes.detect_heel_strikes(imu_df, thresh=0.5, min_distance=50)
+    if len(hs_idx) < 2:
+        raise ValueError(f"Not enough heel strikes for subject stats (found {len(hs_idx)}).")
+    cycles, _ = resample_cycles(np.arange(len(values)), values, hs_idx,
+                                n_points=n_points, min_samples=SUBJECT_MIN_SAMPLES)
+    return cycles
+
+
+class CycleStats:
+    def __init__(self, value_cols, n_points=101):
+        self.value_cols = list(value_cols)
+        self.n_points = n_points
+        self.phase = np.linspace(0, 100, n_points)
+        # group -> [count, mean, M2], το καθένα (n_points, n_cols)
+        self._acc = OrderedDict()
+
+    def _empty(self):
+        shape = (self.n_points, len(self.value_cols))
+        return [np.zeros(shape, dtype=np.int64), np.zeros(shape), np.zeros(shape)]
+
+    def update(self, group, cycles):
+        """Προσθέτει τους κύκλους (n_cycles, n_points, n_cols) ενός trial στο group."""
+        cycles = np.asarray(cycles, dtype=float)
+        if cycles.ndim != 3 or cycles.shape[1:] != (self.n_points, len(self.value_cols)):
+            raise ValueError(f"Expected cycles of shape (n, {self.n_points}, "
+                             f"{len(self.value_cols)}), got {cycles.shape}.")
+        if cycles.shape[0] == 0:
+            return
+
+        valid = ~np.isnan(cycles)
+        n_b = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(n_b > 0, np.nansum(cycles, axis=0) / n_b, 0.0)
+        m2_b = np.nansum((cycles - mean_b) ** 2, axis=0)
+        self._merge(group, n_b, mean_b, m2_b)
+
+    def _merge(self, group, n_b, mean_b, m2_b):
+        acc = self._acc.get(group)
+        if acc is None:
+            acc = self._acc[group] = self._empty()
+        n_a, mean_a, m2_a = acc
+        n = n_a + n_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean_b - mean_a
+            frac = np.where(n > 0, n_b / n, 0.0)
+            acc[1] = mean_a + delta * frac
+            acc[2] = m2_a + m2_b + delta ** 2 * n_a * frac
+        acc[0] = n
+
+    def merge(self, other):
+        """Ενώνει τους accumulators ενός άλλου CycleStats (π.χ. από άλλον worker)."""
+        if other.value_cols != self.value_cols or other.n_points != self.n_points:
+            raise ValueError("Cannot merge CycleStats with different columns/points.")
+        for group, (n_b, mean_b, m2_b) in other._acc.items():
+            self._merge(group, n_b, mean_b, m2_b)
+
+    def groups(self):
+        return list(self._acc)
+
+    def result(self, group):
+        """
+        Returns:
+            mean, sd (ddof=1, NaN όπου count < 2), count — το καθένα (n_points, n_cols)
+        """
+        n, mean, m2 = self._acc[group]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, mean, np.nan)
+            sd = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+        return mean, sd, n
+
+    def to_frame(self, group_name="subject"):
+        """
+        Ο πίνακας stats όπως το groupby του plot_all_subjects:
+        subject, muscle, phase, mean_length, sd_length, n_cycles.
+        """
+        parts = []
+        for group in self._acc:
+            mean, sd, n = self.result(group)
+            for k, col in enumerate(self.value_cols):
+                parts.append(pd.DataFrame({
+                    group_name: group, "muscle": col, "phase": self.phase,
+                    "mean_length": mean[:, k], "sd_length": sd[:, k],
+                    "n_cycles": n[:, k],
+                }))
+        if not parts:
+            return pd.DataFrame(columns=[group_name, "muscle", "phase", "mean_length",
+                                         "sd_length", "n_cycles"])
+        out = pd.concat(parts, ignore_index=True)
+        return out.sort_values([group_name, "muscle", "phase"], kind="stable",
+                               ignore_index=True)
@@ -1,118 +1,351 @@
-import sys
+import argparse
+from itertools import zip_longest
+
 import pandas as pd
 import numpy as np
 
-def detect_heel_strikes(contact_rt: pd.Series, time: pd.Series, thresh=0.5):
+from columnar_io import save_table, table_format
+from heel_strikes import contact_heel_strikes
+from instrumentation import add_profile_args, profiling
+from run_muscle_lengths import parse_muscle_arg
+from time_alignment import DEFAULT_TIME_TOL, align_time_bases
+from trial_loader import iter_trial_chunks, length_columns, load_trial
+
+def detect_heel_strikes(contact_rt, time, thresh=0.5):
     """
     Heel strikes: μεταβάσεις 0 -> 1 στο Contact RT.
-    contact_rt: 0/1 ή ποσοστό επαφής
+    contact_rt: 0/1 ή ποσοστό επαφής (Series ή array)
     """
-    # Αν δεν είναι ακριβώς 0/1, κάνε threshold
-    c = (contact_rt > thresh).astype(int)
-    hs_indices = np.where((c.shift(1, fill_value=0) == 0) & (c == 1))[0]
-    hs_times = time.iloc[hs_indices].values
+    # Αν δεν είναι ακριβώς 0/1, κάνε threshold (κοινός detector, βλ. heel_strikes.py)
+    hs_indices = contact_heel_strikes(np.asarray(contact_rt), thresh, count_start=True)
+    hs_times = np.asarray(time)[hs_indices]
     return hs_indices, hs_times
 
+def resample_arrays(t, y, n_points=101):
+    """
+    Resample ενός κύκλου από πίνακες: t (n,), y (n, n_cols) -> (n_points, n_cols).
+    """
+    t = np.asarray(t, dtype=float)
+    t_norm = (t - t[0]) / (t[-1] - t[0])  # 0–1
+    phases = np.linspace(0, 1, n_points)
+    y = np.asarray(y, dtype=float)
+    out = np.empty((n_points, y.shape[1]))
+    for k in range(y.shape[1]):
+        out[:, k] = np.interp(phases, t_norm, y[:, k])
+    return out
+
+
 def resample_cycle(df_cycle, n_points=101, time_col="time", value_cols=None):
     """Resample ενός κύκλου σε 0–100% (n_points)."""
     if value_cols is None:
         value_cols = [c for c in df_cycle.columns if c != time_col]
 
-    t = df_cycle[time_col].values
-    t_norm = (t - t[0]) / (t[-1] - t[0])  # 0–1
-
     phases = np.linspace(0, 1, n_points)
     out = {"phase": phases * 100}  # σε %
 
-    for col in value_cols:
-        y = df_cycle[col].values
-        out[col] = np.interp(phases, t_norm, y)
+    values = resample_arrays(df_cycle[time_col].values,
+                             df_cycle[value_cols].values, n_points)
+    for k, col in enumerate(value_cols):
+        out[col] = values[:, k]
+
+    return pd.DataFrame(out)
+
+
+def resample_cycles(time, values, hs_idx, n_points=101, min_samples=10):
+    """
+    Batched resampling όλων των κύκλων ενός trial σε ένα vectorized πέρασμα.
+
+    time: (n,) αύξων χρόνος (ή απλώς np.arange(n) για normalization ανά δείγμα)
+    values: (n, n_cols) σήματα (π.χ. μήκη μυών)
+    hs_idx: δείκτες των heel strikes· ο κύκλος i είναι hs_idx[i]..hs_idx[i+1] (inclusive)
+    min_samples: κύκλοι με λιγότερα δείγματα προσπερνιούνται
+
+    Returns:
+        cycles (n_cycles, n_points, n_cols),
+        meta (dict από arrays: cycle, start_index, end_index, start_time, duration)
+    """
+    time = np.asarray(time, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    hs_idx = np.asarray(hs_idx, dtype=np.int64)
+    if np.any(np.diff(time) <= 0):
+        raise ValueError("Time base must be strictly increasing for cycle resampling.")
+
+    starts = hs_idx[:-1]
+    ends = hs_idx[1:]
+    numbers = np.arange(1, len(starts) + 1)
+    keep = (ends - starts + 1) >= min_samples
+    starts, ends, numbers = starts[keep], ends[keep], numbers[keep]
+
+    t0 = time[starts]
+    t1 = time[ends]
+    phases = np.linspace(0, 1, n_points)
+    # (n_cycles, n_points) χρόνοι στους οποίους θέλουμε τιμές
+    query = t0[:, None] + phases[None, :] * (t1 - t0)[:, None]
+
+    # Αριστερό δείγμα κάθε query, περιορισμένο μέσα στον δικό του κύκλο
+    left = np.searchsorted(time, query, side="right") - 1
+    left = np.clip(left, starts[:, None], ends[:, None] - 1)
+    right = left + 1
+
+    t_left = time[left]
+    w = (query - t_left) / (time[right] - t_left)
+    cycles = values[left] + w[..., None] * (values[right] - values[left])
 
+    meta = {
+        "cycle": numbers,
+        "start_index": starts,
+        "end_index": ends,
+        "start_time": t0,
+        "duration": t1 - t0,
+    }
+    return cycles, meta
+
+
+def cycles_to_frame(cycles, meta, value_cols):
+    """Export του (n_cycles, n_points, n_cols) στο long layout: cycle, phase, cols…"""
+    n_cycles, n_points, _ = cycles.shape
+    out = {
+        "cycle": np.repeat(meta["cycle"], n_points),
+        "phase": np.tile(np.linspace(0, 100, n_points), n_cycles),
+    }
+    flat = cycles.reshape(n_cycles * n_points, -1)
+    for k, col in enumerate(value_cols):
+        out[col] = flat[:, k]
     return pd.DataFrame(out)
 
+
+def save_cycles_npz(path, cycles, meta, value_cols):
+    """Dense tensor + metadata κύκλων σε .npz."""
+    np.savez(path, cycles=cycles, columns=np.array(value_cols),
+             phase=np.linspace(0, 100, cycles.shape[1]), **meta)
+
+
+class OnlineCycleNormalizer:
+    """
+    Online εκδοχή του detect_heel_strikes + resample_cycle.
+
+    Δέχεται δείγματα (time, Contact RT, μήκη μυών) ένα-ένα, βρίσκει τις
+    μεταβάσεις 0 -> 1 (ίδιος κανόνας με το contact_heel_strikes) και μόλις κλείσει ένας κύκλος τον επιστρέφει ήδη
+    resampled σε n_points. Κρατάει στη μνήμη μόνο τον τρέχοντα κύκλο.
+
+    Οι κύκλοι αριθμούνται όπως στο main (1, 2, ... ανά ζεύγος heel strikes)
+    και όσοι έχουν λιγότερα από min_samples δείγματα προσπερνιούνται.
+    """
+
+    def __init__(self, n_points=101, thresh=0.5, min_samples=10):
+        self.n_points = n_points
+        self.thresh = thresh
+        self.min_samples = min_samples
+        self.phase = np.linspace(0, 100, n_points)
+
+        self._prev_on = False  # σαν το shift(fill_value=0) του detect_heel_strikes
+        self._times = None     # None μέχρι το πρώτο heel strike
+        self._values = None
+        self.n_heel_strikes = 0
+        self.n_cycles_emitted = 0
+
+    def push(self, t, contact, values):
+        """
+        Returns:
+            (cycle_number, resampled (n_points, n_values)) όταν κλείνει κύκλος, αλλιώς None
+        """
+        on = contact >= self.thresh
+        heel_strike = on and not self._prev_on
+        self._prev_on = on
+
+        if not heel_strike:
+            if self._times is not None:
+                self._times.append(t)
+                self._values.append(values)
+            return None
+
+        self.n_heel_strikes += 1
+        done = None
+        if self._times is not None:
+            # ο κύκλος κλείνει στο επόμενο heel strike (inclusive, όπως iloc[start:end+1])
+            self._times.append(t)
+            self._values.append(values)
+            if len(self._times) >= self.min_samples:
+                done = (self.n_heel_strikes - 1,
+                        resample_arrays(self._times, self._values, self.n_points))
+                self.n_cycles_emitted += 1
+
+        self._times = [t]
+        self._values = [values]
+        return done
+
+
+def iter_online_cycles(original_csv, muscle_csv, value_cols, n_points=101,
+                       chunksize=10_000, time_tol=1e-9):
+    """
+    Διαβάζει τα δύο CSVs σε κομμάτια (γραμμή-γραμμή συγχρονισμένα, όπως τα
+    γράφει το run_muscle_lengths) και δίνει κάθε κύκλο μόλις κλείσει.
+
+    Yields:
+        (cycle_number, resampled (n_points, len(value_cols)))
+    """
+    engine = OnlineCycleNormalizer(n_points=n_points)
+    orig_iter = iter_trial_chunks(original_csv, ["time", "Contact RT"], chunksize=chunksize)
+    musc_iter = iter_trial_chunks(muscle_csv, ["time"] + list(value_cols), chunksize=chunksize)
+
+    for orig, musc in zip_longest(orig_iter, musc_iter):
+        if orig is None or musc is None:
+            raise ValueError("Original and muscle CSVs have a different number of rows "
+                             f"({'muscle' if orig is None else 'original'} CSV is longer).")
+        if len(orig) != len(musc) or not np.allclose(
+                orig["time"].values, musc["time"].values, rtol=0, atol=time_tol):
+            raise ValueError("Original and muscle CSVs are not row-synchronized "
+                             "(online mode needs the run_muscle_lengths output as is).")
+        times = orig["time"].values.tolist()
+        contact = orig["Contact RT"].values.tolist()
+        values = musc[value_cols].values
+        for k in range(len(times)):
+            done = engine.push(times[k], contact[k], values[k])
+            if done is not None:
+                yield done
+
+
+def write_online_cycles(original_csv, muscle_csv, out_csv, value_cols, n_points=101,
+                        time_tol=1e-9, max_cycles=None):
+    """
+    Online mode: κάθε κύκλος γράφεται στο out_csv μόλις κλείσει, με μνήμη
+    φραγμένη σε έναν κύκλο (για οσοδήποτε μεγάλα trials). Κρατάει όλους τους κύκλους,
+    ή σταματάει (και το διάβασμα) μετά από max_cycles.
+    """
+    phase = np.linspace(0, 100, n_points)
+    n_cycles = 0
+    with open(out_csv, "w") as f:
+        f.write(",".join(["cycle", "phase"] + list(value_cols)) + "\n")
+        for cycle, values in iter_online_cycles(original_csv, muscle_csv, value_cols,
+                                                n_points=n_points, time_tol=time_tol):
+            block = pd.DataFrame(values, columns=value_cols)
+            block.insert(0, "phase", phase)
+            block.insert(0, "cycle", cycle)
+            block.to_csv(f, header=False, index=False)
+            f.flush()
+            n_cycles += 1
+            if n_cycles == max_cycles:
+                break
+    return n_cycles
+
+
 def main():
-    if len(sys.argv) != 4:
-        print("Usage:")
-        print("  python gait_cycle_muscle_lengths.py "
-              "<original_csv> <muscle_lengths_csv> <output_csv>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        usage="python gait_cycle_muscle_lengths.py "
+              "<original_csv> <muscle_lengths_csv> <output_csv> "
+              "[--online] [--max-cycles N] [--tensor cycles.npz] [--time-tol SEC] "
+              "[--muscles PATTERNS] [--profile REPORT.json] [--cprofile OUT.prof]")
+    parser.add_argument("original_csv")
+    parser.add_argument("muscle_csv")
+    parser.add_argument("out_csv")
+    parser.add_argument("--online", action="store_true",
+                        help="detect and write every cycle incrementally "
+                             "(bounded memory; honours --max-cycles, not --tensor)")
+    parser.add_argument("--max-cycles", type=int, default=None,
+                        help="keep only the first N cycles (default: all)")
+    parser.add_argument("--tensor", default=None, metavar="NPZ",
+                        help="also save the (cycles x phase x muscles) array and cycle metadata")
+    parser.add_argument("--time-tol", type=float, default=DEFAULT_TIME_TOL, metavar="SEC",
+                        help="max |dt| when aligning the two time bases (default: %(default)g s)")
+    parser.add_argument("--muscles", default=None, metavar="PATTERNS",
+                        help="comma-separated muscle names / fnmatch patterns "
+                             "(default: every *_length column of the muscles file)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    if args.online and args.tensor:
+        parser.error("--tensor needs every cycle in memory; it cannot be used with --online.")
+
+    info = {}
+    with profiling(args, extra=info) as timer:
+        run(args, timer, info)
 
-    original_csv = sys.argv[1]
-    muscle_csv = sys.argv[2]
-    out_csv = sys.argv[3]
+
+def run(args, timer, info):
+    """Το σώμα του main· timer: StageTimer, info: επιπλέον πεδία για το --profile report."""
+    original_csv = args.original_csv
+    muscle_csv = args.muscle_csv
+    out_csv = args.out_csv
 
     print(f"📄 Original CSV: {original_csv}")
     print(f"📄 Muscle lengths CSV: {muscle_csv}")
     print(f"📄 Output (normalized cycles): {out_csv}")
 
-    # 1. Load data
-    df_orig = pd.read_csv(original_csv)
-    df_musc = pd.read_csv(muscle_csv)
+    # Μύες: όλες οι *_length στήλες του muscles output (ή όσες ταιριάζουν στο --muscles)
+    value_cols = length_columns(muscle_csv, parse_muscle_arg(args.muscles))
+    if not value_cols:
+        raise ValueError(f"No *_length columns found in {muscle_csv}.")
+    print(f"➡ Muscles: {len(value_cols)}")
 
-    # Sanity: πρέπει να έχουν κοινό 'time'
-    if "time" not in df_orig.columns or "time" not in df_musc.columns:
-        raise ValueError("Both CSVs must contain a 'time' column.")
+    if args.online:
+        if table_format(out_csv) != "csv":
+            raise ValueError("--online appends cycles as they close and writes CSV only.")
+        with timer.stage("online cycles"):
+            n = write_online_cycles(original_csv, muscle_csv, out_csv, value_cols,
+                                    time_tol=args.time_tol, max_cycles=args.max_cycles)
+        info["cycles"] = n
+        print(f"✅ Saved {n} normalized muscle-length cycles (online) to: {out_csv}")
+        return
 
-    # 2. Merge on time (inner join)
-    df = pd.merge(df_orig, df_musc, on="time", how="inner")
-    print(f"➡ Merged shape: {df.shape}")
+    # 1. Load data
+    # Μόνο time + Contact RT από το NONAN CSV και time + μύες (βλ. trial_loader)
+    timer.start("load csv")
+    df_orig = load_trial(original_csv, ["time"], optional=["Contact RT"])
+    df_musc = load_trial(muscle_csv, ["time"] + value_cols)
+    timer.stop()
+    info["frames"] = len(df_orig)
 
-    # 3. Heel strikes από Contact RT
-    if "Contact RT" not in df.columns:
+    # 2. Ευθυγράμμιση των δύο time bases (βλ. time_alignment) -> index arrays
+    if "Contact RT" not in df_orig.columns:
         raise ValueError("Column 'Contact RT' not found in original CSV.")
 
-    hs_idx, hs_times = detect_heel_strikes(df["Contact RT"], df["time"])
+    with timer.stage("time alignment"):
+        al = align_time_bases(df_orig["time"].values, df_musc["time"].values,
+                              tol=args.time_tol, left_name="original time",
+                              right_name="muscle time")
+    print(f"➡ Time alignment: {al.summary('original', 'muscle')}")
+    if al.n_matched == 0:
+        raise ValueError("No common time samples between the two CSVs.")
+
+    time = df_orig["time"].values[al.left_idx]
+    contact = df_orig["Contact RT"].values[al.left_idx]
+
+    # 3. Heel strikes από Contact RT
+    with timer.stage("cycle detection"):
+        hs_idx, hs_times = detect_heel_strikes(contact, time)
     print(f"➡ Detected {len(hs_idx)} heel strikes (right).")
 
     if len(hs_idx) < 3:
         raise ValueError("Not enough heel strikes to form at least 2 full gait cycles.")
 
-    # θα πάρουμε τους 2 πρώτους πλήρεις κύκλους
-    n_cycles = 2
-    n_cycles = min(n_cycles, len(hs_idx) - 1)
-
-    # Μυες που μας ενδιαφέρουν (μπορείς να προσθέσεις κι άλλους)
-    muscles = [
-        "med_gas_r_length",
-        "soleus_r_length",
-        "tib_ant_r_length",
-        "vas_lat_r_length",
-        "rect_fem_r_length",
-        "glut_med1_r_length",
-    ]
-
-    value_cols = muscles  # μόνο αυτοί στο output
-
-    all_cycles = []
-
-    for i in range(n_cycles):
-        start = hs_idx[i]
-        end = hs_idx[i + 1]
-        df_cycle = df.iloc[start:end+1].copy()
-        if len(df_cycle) < 10:
-            continue
-
-        df_resampled = resample_cycle(
-            df_cycle[["time"] + value_cols].reset_index(drop=True),
-            n_points=101,
-            time_col="time",
-            value_cols=value_cols,
-        )
-        df_resampled["cycle"] = i + 1
-        all_cycles.append(df_resampled)
-
-    if not all_cycles:
+    # Όλοι οι κύκλοι σε ένα πέρασμα -> (n_cycles, 101, n_muscles)
+    hs_use = hs_idx
+    if args.max_cycles is not None:
+        hs_use = hs_idx[:args.max_cycles + 1]
+    with timer.stage("resampling"):
+        cycles, meta = resample_cycles(time, df_musc[value_cols].values[al.right_idx],
+                                       hs_use, n_points=101)
+    info["cycles"] = len(cycles)
+
+    if len(cycles) == 0:
         raise ValueError("No valid cycles resampled.")
 
-    df_out = pd.concat(all_cycles, ignore_index=True)
-    # Ταξινόμηση στη λογική σειρά: cycle, phase, muscles…
-    cols = ["cycle", "phase"] + value_cols
-    df_out = df_out[cols]
+    print(f"➡ Resampled {len(cycles)} cycles -> tensor {cycles.shape}")
+    timer.start("save")
+    if args.tensor:
+        save_cycles_npz(args.tensor, cycles, meta, value_cols)
+        print(f"✅ Saved cycle tensor to: {args.tensor}")
+
+    # Export στο long layout: cycle, phase, muscles…
+    df_out = cycles_to_frame(cycles, meta, value_cols)
 
-    df_out.to_csv(out_csv, index=False)
+    save_table(out_csv, df_out)
+    timer.stop()
     print(f"✅ Saved normalized muscle-length cycles to: {out_csv}")
     print(f"   Shape: {df_out.shape}")
-    print("   Columns:", df_out.columns.tolist())
+    if len(value_cols) <= 16:
+        print("   Columns:", df_out.columns.tolist())
 
 if __name__ == "__main__":
     main()
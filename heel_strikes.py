@@ -0,0 +1,91 @@
+"""
+Κοινός NumPy detector για heel strikes (δεξί πόδι).
+
+Δύο στρατηγικές, όπως στα gait_cycle_muscle_lengths / plot_all_subjects:
+    1) μεταβάσεις 0 -> 1 στο 'Contact RT'
+    2) τοπικά ελάχιστα του 'Noraxon MyoMotion-Trajectories-Heel RT-y (mm)'
+       με ελάχιστη απόσταση μεταξύ διαδοχικών heel strikes
+
+Όλα χωρίς Python loop πάνω στα δείγματα.
+"""
+import numpy as np
+
+CONTACT_COLUMN = "Contact RT"
+HEEL_Y_COLUMN = "Noraxon MyoMotion-Trajectories-Heel RT-y (mm)"
+
+
+def contact_heel_strikes(contact, thresh=0.5, count_start=False):
+    """
+    Δείκτες όπου το contact περνάει από < thresh σε >= thresh.
+
+    count_start: αν True, ένα trial που ξεκινάει ήδη σε επαφή μετράει heel strike
+                 στο δείγμα 0 (σαν να υπήρχε 0 πριν την αρχή).
+    """
+    on = np.asarray(contact, dtype=float) >= thresh
+    if len(on) == 0:
+        return np.empty(0, dtype=np.int64)
+    prev = np.empty_like(on)
+    prev[0] = not count_start
+    prev[1:] = on[:-1]
+    return np.flatnonzero(on & ~prev)
+
+
+def select_min_distance(candidates, min_distance):
+    """
+    Greedy επιλογή από αριστερά προς δεξιά: κρατάμε έναν υποψήφιο μόνο αν
+    απέχει > min_distance δείγματα από τον προηγούμενο που κρατήσαμε.
+
+    Το "επόμενος αποδεκτός" κάθε υποψηφίου βγαίνει με ένα searchsorted και η
+    αλυσίδα από τον πρώτο ακολουθείται με pointer doubling, άρα δεν υπάρχει
+    Python loop ούτε πάνω στα δείγματα ούτε πάνω στους υποψήφιους.
+    """
+    c = np.asarray(candidates, dtype=np.int64)
+    m = len(c)
+    if m == 0:
+        return c
+
+    # nxt[i]: πρώτος υποψήφιος με c > c[i] + min_distance (m = κανένας)
+    nxt = np.empty(m + 1, dtype=np.int64)
+    nxt[:m] = np.searchsorted(c, c + min_distance, side="right")
+    nxt[m] = m
+
+    path = np.zeros(1, dtype=np.int64)
+    jump = nxt
+    # Σε κάθε βήμα το path διπλασιάζεται: P_2L = P_L ∪ jump^L(P_L)
+    while True:
+        ext = jump[path]
+        ext = ext[ext < m]
+        if len(ext) == 0:
+            break
+        path = np.concatenate([path, ext])
+        jump = jump[jump]
+
+    path = np.unique(path)
+    return c[path]
+
+
+def trajectory_heel_strikes(y, min_distance=50):
+    """Τοπικά ελάχιστα της τροχιάς της φτέρνας με ελάχιστη απόσταση min_distance."""
+    y = np.asarray(y, dtype=float)
+    if len(y) < 3:
+        return np.empty(0, dtype=np.int64)
+    mid = y[1:-1]
+    candidates = np.flatnonzero((mid < y[:-2]) & (mid < y[2:])) + 1
+    return select_min_distance(candidates, min_distance)
+
+
+def detect_heel_strikes(df, thresh=0.5, min_distance=50, count_start=False):
+    """
+    Contact RT αν υπάρχει, αλλιώς τοπικά ελάχιστα της τροχιάς της φτέρνας.
+
+    Returns:
+        np.ndarray με τους δείκτες (θέσεις γραμμών) των heel strikes
+    """
+    if CONTACT_COLUMN in df.columns:
+        return contact_heel_strikes(df[CONTACT_COLUMN].values, thresh, count_start)
+
+    if HEEL_Y_COLUMN not in df.columns:
+        raise ValueError(
+            f"Could not find '{CONTACT_COLUMN}' or '{HEEL_Y_COLUMN}' in IMU CSV."
+        )
+    return trajectory_heel_strikes(df[HEEL_Y_COLUMN].values, min_distance)
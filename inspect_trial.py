@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Γρήγορος έλεγχος ενός NONAN trial: ονόματα στηλών, διάρκεια και δειγματοληψία.
+
+Διαβάζεται μόνο το header και η στήλη 'time' (βλ. trial_loader).
+
+Usage:
+    python inspect_trial.py <trial.csv> [<trial.csv> ...] [--columns]
+"""
+import argparse
+import sys
+
+from instrumentation import add_profile_args, profiling
+from trial_loader import trial_summary
+
+
+def print_summary(info, show_columns):
+    print(f"📄 {info['path']}")
+    print(f"➡ Columns: {info['n_columns']}")
+    if show_columns:
+        for c in info["columns"]:
+            print(f"  - {c}")
+    if "n_rows" not in info:
+        print("⚠ Column 'time' not found: cannot check duration/sampling.")
+        return
+    print(f"➡ Frames: {info['n_rows']}")
+    if "duration_s" in info:
+        print(f"➡ Duration: {info['duration_s']:.2f} s")
+        print(f"➡ Sampling: {info['sample_rate_hz']:.2f} Hz "
+              f"(dt {info['dt_min_s'] * 1000:.3f}–{info['dt_max_s'] * 1000:.3f} ms)")
+        if info["dt_min_s"] <= 0:
+            print("⚠ 'time' is not strictly increasing.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print columns, duration and sampling of NONAN trials.")
+    parser.add_argument("trials", nargs="+")
+    parser.add_argument("--columns", action="store_true", help="list every column name")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    failed = False
+    with profiling(args) as timer, timer.stage("inspect"):
+        for path in args.trials:
+            try:
+                print_summary(trial_summary(path), args.columns)
+            except (OSError, ValueError) as exc:
+                print(f"❌ {path}: {exc}")
+                failed = True
+            print()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Χρονομέτρηση σταδίων, peak μνήμη και προαιρετικό cProfile για όλα τα scripts.
+
+    timer = StageTimer()
+    with timer.stage("load"):
+        df = load_trial(...)
+    timer.add("muscle lengths: realizePosition", seconds, calls=n_frames)
+
+Κάθε στάδιο κρατάει συνολικό χρόνο, αριθμό κλήσεων και το peak RSS του
+process στο τέλος του (ru_maxrss), μαζί με το πόσο ανέβηκε μέσα στο στάδιο.
+Τα sub-stages του hot loop (π.χ. "muscle lengths: getLength") έχουν όνομα
+"<στάδιο>: <κομμάτι>" και περιέχονται ήδη στον χρόνο του σταδίου.
+
+Με add_profile_args τα scripts δέχονται --profile REPORT.json (report σε JSON)
+και --cprofile OUT.prof (dump για pstats / snakeviz).
+"""
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _maxrss_mb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def peak_rss_mb():
+    """Peak resident memory του process σε MB (None αν δεν υποστηρίζεται)."""
+    if resource is None:
+        return None
+    return _maxrss_mb(resource.RUSAGE_SELF)
+
+
+def children_peak_rss_mb():
+    """Το μεγαλύτερο peak RSS από τα child processes που τελείωσαν (π.χ. pool workers)."""
+    if resource is None:
+        return None
+    return _maxrss_mb(resource.RUSAGE_CHILDREN)
+
+
+class StageTimer:
+    """Αθροίζει τον χρόνο κάθε σταδίου (με σειρά πρώτης εμφάνισης)."""
+
+    def __init__(self):
+        self.seconds = OrderedDict()
+        self.calls = {}
+        self.peak_rss = {}
+        self.rss_growth = {}
+        self._stage = None
+        self._t0 = None
+        self._rss0 = None
+        self._created = time.perf_counter()
+
+    def start(self, stage):
+        self.stop()
+        self._stage = stage
+        self._rss0 = peak_rss_mb()
+        self._t0 = time.perf_counter()
+
+    def stop(self):
+        if self._stage is not None:
+            dt = time.perf_counter() - self._t0
+            self.add(self._stage, dt)
+            rss = peak_rss_mb()
+            if rss is not None:
+                self.peak_rss[self._stage] = max(self.peak_rss.get(self._stage, 0.0), rss)
+                self.rss_growth[self._stage] = (self.rss_growth.get(self._stage, 0.0)
+                                                + rss - self._rss0)
+            self._stage = None
+
+    @contextmanager
+    def stage(self, stage):
+        self.start(stage)
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    def add(self, stage, seconds, calls=1):
+        """Χρόνος που μετρήθηκε αλλού (π.χ. αθροιστικά μέσα σε ένα loop)."""
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    def report(self, **extra):
+        """dict έτοιμο για JSON: wall time, peak RSS και ένα record ανά στάδιο."""
+        stages = OrderedDict()
+        for stage, secs in self.seconds.items():
+            rec = {"seconds": secs, "calls": self.calls.get(stage, 0)}
+            if stage in self.peak_rss:
+                rec["peak_rss_mb"] = self.peak_rss[stage]
+                rec["rss_growth_mb"] = self.rss_growth[stage]
+            stages[stage] = rec
+        return {
+            "script": os.path.basename(sys.argv[0]),
+            "argv": sys.argv[1:],
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "wall_s": time.perf_counter() - self._created,
+            "peak_rss_mb": peak_rss_mb(),
+            "children_peak_rss_mb": children_peak_rss_mb(),
+            **extra,
+            "stages": stages,
+        }
+
+
+def print_stage_report(timer, file=None):
+    """
+    Ο πίνακας χρόνων (sub-stages "a: b" με εσοχή κάτω από το στάδιό τους).
+    file: π.χ. sys.stderr για scripts που γράφουν δεδομένα στο stdout
+    """
+    print("\n➡ Stage times:", file=file)
+    subs = {}
+    for stage in timer.seconds:
+        if ": " in stage:
+            subs.setdefault(stage.split(": ", 1)[0], []).append(stage)
+    for stage, secs in timer.seconds.items():
+        if ": " in stage:
+            continue
+        rss = timer.peak_rss.get(stage)
+        mem = f"  peak RSS {rss:8.1f} MB" if rss is not None else ""
+        print(f"  - {stage:<23} {secs:8.3f} s{mem}", file=file)
+        for sub in subs.pop(stage, []):
+            secs, calls = timer.seconds[sub], timer.calls.get(sub, 0)
+            per_call = f"  ({secs / calls * 1e6:8.1f} µs/call)" if calls > 1 else ""
+            print(f"      · {sub.split(': ', 1)[1]:<19} {secs:8.3f} s{per_call}", file=file)
+    for sub in (s for group in subs.values() for s in group):
+        print(f"  - {sub:<23} {timer.seconds[sub]:8.3f} s", file=file)
+
+
+def add_profile_args(parser):
+    parser.add_argument("--profile", default=None, metavar="REPORT.json",
+                        help="write per-stage times and peak memory as JSON "
+                             "(also times coordinate setting / realizePosition / getLength)")
+    parser.add_argument("--cprofile", default=None, metavar="OUT.prof",
+                        help="also run under cProfile and dump the stats to this file")
+
+
+@contextmanager
+def profiling(args, timer=None, extra=None, report=True, file=None):
+    """
+    Γύρω από το main ενός script: cProfile αν ζητήθηκε, και στο τέλος (ακόμη
+    και μετά από exception) γράφει το --profile report.
+
+    extra: dict που συμπληρώνει το script όσο τρέχει (π.χ. frames) και μπαίνει στο report
+    report: τυπώνει και τον πίνακα χρόνων (False αν το script τυπώνει δικό του)
+    file: πού τυπώνονται τα μηνύματα (default stdout)
+    """
+    timer = timer or StageTimer()
+    extra = {} if extra is None else extra
+    prof = cProfile.Profile() if args.cprofile else None
+    if prof is not None:
+        prof.enable()
+    try:
+        yield timer
+    finally:
+        timer.stop()
+        if prof is not None:
+            prof.disable()
+            prof.dump_stats(args.cprofile)
+            print(f"✅ Saved cProfile stats to: {args.cprofile} "
+                  f"(python -m pstats {args.cprofile})", file=file)
+        if args.profile:
+            with open(args.profile, "w") as f:
+                json.dump(timer.report(**extra), f, indent=1)
+            if report:
+                print_stage_report(timer, file=file)
+            print(f"✅ Saved profile report to: {args.profile}", file=file)
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Τοπικό service για μήκη μυών: warm Gait2392 workers πίσω από asyncio HTTP.
+
+Κάθε worker process φορτώνει το μοντέλο και καλεί initSystem() μία φορά
+(FrameEvaluator)· οι αιτήσεις δεν πληρώνουν ποτέ το κόστος φόρτωσης. Ακούει
+σε Unix socket ή στο localhost και δεν χρειάζεται δίκτυο.
+
+Usage:
+    python muscle_service.py <model.osim> [--socket /tmp/muscles.sock | --port 8765]
+        [--workers N] [--muscles all|PATTERNS] [--max-batch-frames 4096]
+        [--batch-window-ms 2] [--max-queue 256]
+        [--profile REPORT.json] [--cprofile OUT.prof]
+
+Endpoints:
+    POST /lengths   {"angles": {"Hip Flexion RT (deg)": [...], ...}, "time": [...]}
+                    στήλες με τα ονόματα του COLUMN_MAP σε deg (όσες υπάρχουν)
+                    -> {"muscles": [...], "lengths": [[m, ...], ...], "time": [...]}
+    GET  /metrics   αιτήσεις, batches, queue, latency p50/p99/max ανά αίτηση
+    GET  /health    {"status": "ok", ...}
+
+Micro-batching: οι αιτήσεις που περιμένουν στην ουρά ενώνονται (μέχρι
+--max-batch-frames frames ή --batch-window-ms αναμονή) σε ένα evaluate ανά
+worker. Backpressure: όταν η ουρά έχει --max-queue αιτήσεις, οι νέες παίρνουν
+αμέσως 503 αντί να μεγαλώνει η καθυστέρηση όλων.
+
+Παράδειγμα:
+    curl --unix-socket /tmp/muscles.sock -d @frames.json http://localhost/lengths
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from instrumentation import add_profile_args, profiling
+from run_muscle_lengths import COLUMN_MAP, MUSCLES, FrameEvaluator, parse_muscle_arg
+
+HTTP_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large",
+               500: "Internal Server Error", 503: "Service Unavailable"}
+
+# Warm evaluator ανά worker process (γεμίζει στο _init_worker)
+_EVALUATOR = None
+
+
+def _init_worker(model_path, muscles=None):
+    global _EVALUATOR
+    _EVALUATOR = FrameEvaluator(model_path, muscles or MUSCLES)
+
+
+def _worker_ready(hold=0.05):
+    # κρατάει τον worker λίγο απασχολημένο ώστε το επόμενο ping να πάει σε άλλον
+    time.sleep(hold)
+    return os.getpid(), _EVALUATOR.muscle_names
+
+
+def _evaluate_batch(angles_rad, coord_names):
+    return _EVALUATOR.evaluate(angles_rad, coord_names)
+
+
+def _number_list(value):
+    """Λίστα αριθμών JSON -> 1-D float array· None για οτιδήποτε άλλο (αριθμό, string, nested)."""
+    if not isinstance(value, list):
+        return None
+    try:
+        arr = np.asarray(value, dtype=float)
+    except (TypeError, ValueError):
+        return None
+    return arr if arr.ndim == 1 else None
+
+
+def parse_angles(payload):
+    """
+    Το JSON μιας αίτησης -> (coord_names, angles_rad (n_frames, n_coords), time ή None).
+    Δέχεται όσες στήλες του COLUMN_MAP υπάρχουν· ValueError για οτιδήποτε άλλο.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("angles"), dict):
+        raise ValueError('Body must be a JSON object with an "angles" object.')
+    angles = payload["angles"]
+    unknown = [c for c in angles if c not in COLUMN_MAP]
+    if unknown:
+        raise ValueError(f"Unknown angle columns: {unknown} (expected COLUMN_MAP names).")
+    src_cols = [c for c in COLUMN_MAP if c in angles]
+    if not src_cols:
+        raise ValueError("None of the expected angle columns are in the request.")
+    cols = [_number_list(angles[c]) for c in src_cols]
+    if any(c is None for c in cols):
+        raise ValueError("Angle columns must be lists of numbers (deg).")
+    n_frames = len(cols[0])
+    if any(len(c) != n_frames for c in cols) or n_frames == 0:
+        raise ValueError("Angle columns must be non-empty lists of the same length.")
+    time_col = payload.get("time")
+    if time_col is not None:
+        times = _number_list(time_col)
+        if times is None or len(times) != n_frames:
+            raise ValueError('"time" must be a list with one number per frame.')
+        time_col = times.tolist()
+    angles_rad = np.ascontiguousarray(np.deg2rad(np.column_stack(cols)))
+    return [COLUMN_MAP[c] for c in src_cols], angles_rad, time_col
+
+
+class ServiceMetrics:
+    """Μετρητές και τα τελευταία latencies (ring buffer) για το /metrics."""
+
+    def __init__(self, window=10_000):
+        self.started = time.time()
+        self.requests = 0
+        self.frames = 0
+        self.rejected = 0
+        self.errors = 0
+        self.batches = 0
+        self.batch_frames = 0
+        self.latency = deque(maxlen=window)
+        self.queue_wait = deque(maxlen=window)
+
+    def record(self, latency_s, wait_s, n_frames):
+        self.requests += 1
+        self.frames += n_frames
+        self.latency.append(latency_s)
+        self.queue_wait.append(wait_s)
+
+    def report(self, queue_depth, max_queue):
+        def pct(values):
+            ms = np.asarray(values) * 1000.0
+            if not len(ms):
+                return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+            return {"p50_ms": float(np.percentile(ms, 50)),
+                    "p99_ms": float(np.percentile(ms, 99)), "max_ms": float(ms.max())}
+
+        return {
+            "uptime_s": time.time() - self.started,
+            "requests": self.requests,
+            "frames": self.frames,
+            "rejected_503": self.rejected,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_frames": self.batch_frames / self.batches if self.batches else 0.0,
+            "queue_depth": queue_depth,
+            "max_queue": max_queue,
+            "latency": pct(self.latency),
+            "queue_wait": pct(self.queue_wait),
+        }
+
+
+class _Pending:
+    """Μία αίτηση στην ουρά: οι γωνίες της και το future της απάντησης."""
+
+    __slots__ = ("coord_names", "angles", "future", "t_received")
+
+    def __init__(self, coord_names, angles, future, t_received):
+        self.coord_names = coord_names
+        self.angles = angles
+        self.future = future
+        self.t_received = t_received
+
+
+class MuscleService:
+    def __init__(self, model_path, muscles=None, workers=1, max_batch_frames=4096,
+                 batch_window=0.002, max_queue=256):
+        self.model_path = model_path
+        self.muscles = muscles
+        self.workers = max(1, workers)
+        self.max_batch_frames = max_batch_frames
+        self.batch_window = batch_window
+        self.max_queue = max_queue
+        self.metrics = ServiceMetrics()
+        self.muscle_names = None
+        self.pool = None
+        self.queue = None
+        self._slots = None
+        self._batcher = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.model_path, self.muscles))
+        # ζεσταίνουμε τους workers (φόρτωση μοντέλου + initSystem) πριν δεχτούμε αιτήσεις
+        pids = set()
+        for _ in range(10):
+            ready = await asyncio.gather(*(loop.run_in_executor(self.pool, _worker_ready)
+                                           for _ in range(self.workers)))
+            pids.update(pid for pid, _ in ready)
+            if len(pids) >= self.workers:
+                break
+        self.muscle_names = ready[0][1]
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        # ένα batch σε εξέλιξη ανά worker· τα υπόλοιπα περιμένουν στην ουρά
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._batch_loop())
+        return len(pids)
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def submit(self, coord_names, angles):
+        """Βάζει την αίτηση στην ουρά· asyncio.QueueFull αν η ουρά είναι γεμάτη."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(_Pending(coord_names, angles, future, time.perf_counter()))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        carry = None
+        while True:
+            await self._slots.acquire()
+            first = carry if carry is not None else await self.queue.get()
+            carry = None
+            batch = [first]
+            n_frames = len(first.angles)
+            deadline = loop.time() + self.batch_window
+            # μαζεύουμε όσες αιτήσεις ίδιων συντεταγμένων χωράνε στο batch
+            while n_frames < self.max_batch_frames:
+                timeout = deadline - loop.time()
+                try:
+                    item = (self.queue.get_nowait() if timeout <= 0
+                            else await asyncio.wait_for(self.queue.get(), timeout))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if (item.coord_names != first.coord_names
+                        or n_frames + len(item.angles) > self.max_batch_frames):
+                    carry = item
+                    break
+                batch.append(item)
+                n_frames += len(item.angles)
+            asyncio.create_task(self._run_batch(batch, n_frames))
+
+    async def _run_batch(self, batch, n_frames):
+        loop = asyncio.get_running_loop()
+        t_start = time.perf_counter()
+        try:
+            angles = batch[0].angles if len(batch) == 1 else np.concatenate(
+                [p.angles for p in batch])
+            lengths = await loop.run_in_executor(self.pool, _evaluate_batch, angles,
+                                                 batch[0].coord_names)
+            self.metrics.batches += 1
+            self.metrics.batch_frames += n_frames
+            offset = 0
+            for p in batch:
+                n = len(p.angles)
+                if not p.future.done():
+                    p.future.set_result((lengths[offset:offset + n], t_start - p.t_received))
+                offset += n
+        except Exception as exc:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(exc)
+        finally:
+            self._slots.release()
+
+    async def handle_lengths(self, body):
+        t0 = time.perf_counter()
+        try:
+            payload = json.loads(body)
+            coord_names, angles, time_col = parse_angles(payload)
+        except (TypeError, ValueError) as exc:  # και json.JSONDecodeError
+            return 400, {"error": str(exc)}
+        try:
+            lengths, wait = await self.submit(coord_names, angles)
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            return 503, {"error": f"Queue is full ({self.max_queue} requests); retry later."}
+        except Exception as exc:
+            self.metrics.errors += 1
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+        self.metrics.record(time.perf_counter() - t0, wait, len(angles))
+        result = {"muscles": [m + "_length" for m in self.muscle_names],
+                  "lengths": lengths.tolist()}
+        if time_col is not None:
+            result["time"] = time_col
+        return 200, result
+
+    async def dispatch(self, method, path, body):
+        if path == "/lengths":
+            if method != "POST":
+                return 405, {"error": "Use POST /lengths."}
+            return await self.handle_lengths(body)
+        if path == "/metrics" and method == "GET":
+            return 200, self.metrics.report(self.queue.qsize(), self.max_queue)
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "model": os.path.basename(self.model_path),
+                         "workers": self.workers, "muscles": len(self.muscle_names)}
+        return 404, {"error": f"No route for {method} {path}."}
+
+
+async def read_request(reader, max_body):
+    """
+    Ένα HTTP/1.1 request από το stream.
+
+    Returns:
+        (method, path, headers, body) ή None αν ο client έκλεισε τη σύνδεση
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ValueError("Malformed request line.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0) or 0)
+    if length > max_body:
+        raise OverflowError(length)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def write_response(writer, status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {HTTP_STATUS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    writer.write(head.encode() + b"\r\n" + body)
+
+
+def make_handler(service, max_body):
+    async def handle(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, max_body)
+                except OverflowError:
+                    write_response(writer, 413, {"error": f"Body larger than {max_body} bytes."},
+                                   keep_alive=False)
+                    break
+                except (ValueError, asyncio.IncompleteReadError):
+                    write_response(writer, 400, {"error": "Malformed HTTP request."},
+                                   keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await service.dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(args, timer, info):
+    muscles = parse_muscle_arg(args.muscles)
+    service = MuscleService(args.model, muscles, args.workers, args.max_batch_frames,
+                            args.batch_window_ms / 1000.0, args.max_queue)
+    t0 = time.perf_counter()
+    # οι workers φορτώνουν το μοντέλο μέσα σε αυτό το στάδιο (children peak RSS στο report)
+    with timer.stage("warm-up"):
+        n_ready = await service.start()
+    print(f"✅ {n_ready}/{service.workers} warm worker(s) ready in "
+          f"{time.perf_counter() - t0:.2f} s ({len(service.muscle_names)} muscles)")
+
+    handler = make_handler(service, args.max_body)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = await asyncio.start_unix_server(handler, path=args.socket)
+        where = f"unix:{args.socket}"
+    else:
+        server = await asyncio.start_server(handler, host=args.host, port=args.port)
+        where = f"http://{args.host}:{args.port}"
+    print(f"➡ Listening on {where} (POST /lengths, GET /metrics, GET /health)")
+    timer.start("serve")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        timer.stop()
+        await service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+        rep = service.metrics.report(0, service.max_queue)
+        info["metrics"] = rep
+        print(f"➡ Requests: {rep['requests']} ({rep['frames']} frames), "
+              f"rejected {rep['rejected_503']}, latency p50 {rep['latency']['p50_ms']:.3f} ms, "
+              f"p99 {rep['latency']['p99_ms']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local muscle-length service with warm model workers.")
+    parser.add_argument("model")
+    parser.add_argument("--socket", default=None, metavar="PATH",
+                        help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="TCP host (default: %(default)s, local only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="warm model processes (default: CPUs - 1)")
+    parser.add_argument("--muscles", default=None, metavar="PATTERNS",
+                        help="comma-separated muscle names / fnmatch patterns, or 'all'")
+    parser.add_argument("--max-batch-frames", type=int, default=4096,
+                        help="max frames merged into one worker call (default: %(default)s)")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="how long a batch waits for more requests (default: %(default)s)")
+    parser.add_argument("--max-queue", type=int, default=256,
+                        help="queued requests before new ones get 503 (default: %(default)s)")
+    parser.add_argument("--max-body", type=int, default=64 << 20,
+                        help="max request body in bytes (default: 64 MiB)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.model):
+        print(f"❌ Model not found: {args.model}")
+        sys.exit(1)
+    info = {}
+    # το report γράφεται όταν σταματήσει το service (Ctrl-C / SIGINT)
+    with profiling(args, extra=info) as timer:
+        try:
+            asyncio.run(serve(args, timer, info))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Surrogate μοντέλο για τα μήκη μυών (χωρίς OpenSim στο loop).
+
+Για κάθε μυ βρίσκουμε από ποιες συντεταγμένες του COLUMN_MAP εξαρτάται,
+δειγματοληπτούμε το Gait2392 στα ranges αυτών των συντεταγμένων και κάνουμε
+fit ένα πολυώνυμο (συνολικού βαθμού <= degree). Το αποτέλεσμα αποθηκεύεται σε
+.npz μαζί με το SHA-256 του .osim και τα σφάλματα σε validation δείγματα.
+Μετά ολόκληρο trial υπολογίζεται με πράξεις πινάκων NumPy.
+
+Usage:
+    python muscle_surrogate.py fit <model.osim> <surrogate.npz>
+        [--degree 4] [--samples 3000] [--ranges-from TRIAL.csv ...]
+        [--muscles all|PATTERNS]
+    python muscle_surrogate.py eval <surrogate.npz> <input_csv> <output_csv>
+    python muscle_surrogate.py validate <model.osim> <surrogate.npz> <input_csv>
+
+Όλα τα subcommands δέχονται [--profile REPORT.json] [--cprofile OUT.prof].
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from columnar_io import save_table
+from instrumentation import add_profile_args, profiling
+from run_muscle_lengths import (
+    COLUMN_MAP,
+    MUSCLES,
+    FrameEvaluator,
+    angles_matrix,
+    find_available_columns,
+    lengths_to_columns,
+    parse_muscle_arg,
+)
+from trial_loader import load_trial
+
+SURROGATE_VERSION = 1
+
+
+def file_sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def monomial_exponents(n_dims, degree):
+    """Όλοι οι εκθέτες (n_terms, n_dims) με συνολικό βαθμό <= degree."""
+    exps = [e for e in itertools.product(range(degree + 1), repeat=n_dims)
+            if sum(e) <= degree]
+    exps.sort(key=lambda e: (sum(e), e))
+    return np.array(exps, dtype=np.int64).reshape(len(exps), n_dims)
+
+
+def design_matrix(x, exponents):
+    """
+    x: (n, n_dims) κανονικοποιημένες τιμές στο [-1, 1]
+    exponents: (n_terms, n_dims)
+
+    Returns:
+        (n, n_terms) με prod_d x[:, d] ** exponents[t, d]
+    """
+    n, n_dims = x.shape
+    max_deg = int(exponents.max()) if exponents.size else 0
+    out = np.ones((n, exponents.shape[0]))
+    for d in range(n_dims):
+        # πίνακας δυνάμεων μία φορά ανά διάσταση, μετά gather
+        powers = x[:, d:d + 1] ** np.arange(max_deg + 1)
+        out *= powers[:, exponents[:, d]]
+    return out
+
+
+def ranges_from_trials(csv_paths, margin=0.1):
+    """
+    Ranges (rad) των συντεταγμένων από πραγματικά trials, με περιθώριο margin
+    (κλάσμα του εύρους) σε κάθε πλευρά.
+    """
+    lo = {}
+    hi = {}
+    for path in csv_paths:
+        df = load_trial(path, [], optional=list(COLUMN_MAP))
+        available_map, _ = find_available_columns(df)
+        coord_names, angles = angles_matrix(df, available_map)
+        for k, c in enumerate(coord_names):
+            lo[c] = min(lo.get(c, np.inf), float(np.nanmin(angles[:, k])))
+            hi[c] = max(hi.get(c, -np.inf), float(np.nanmax(angles[:, k])))
+
+    ranges = {}
+    for c in lo:
+        pad = margin * max(hi[c] - lo[c], 1e-3)
+        ranges[c] = (lo[c] - pad, hi[c] + pad)
+    return ranges
+
+
+def fit_surrogates(evaluator, coord_names, degree=4, n_samples=3000,
+                   ranges=None, holdout=0.2, seed=0):
+    """
+    Κάνει fit ένα πολυώνυμο ανά μυ πάνω στις συντεταγμένες από τις οποίες εξαρτάται.
+
+    ranges: προαιρετικό dict coord -> (lo, hi) σε rad· αλλιώς τα ranges του μοντέλου
+
+    Returns:
+        meta (dict), arrays (dict name -> np.ndarray) για το save_surrogate
+    """
+    info = evaluator.coordinate_info(coord_names)
+    if ranges is None:
+        ranges = {}
+    bounds = {c: ranges.get(c, info[c][:2]) for c in coord_names}
+    defaults = np.array([info[c][2] for c in coord_names])
+
+    deps = evaluator.coordinate_dependencies(coord_names)
+    rng = np.random.default_rng(seed)
+
+    meta = {
+        "version": SURROGATE_VERSION,
+        "coord_names": list(coord_names),
+        "defaults": defaults.tolist(),
+        "degree": degree,
+        "muscles": {},
+    }
+    arrays = {}
+
+    # Μύες με ίδιο σύνολο εξαρτήσεων μοιράζονται τα ίδια δείγματα
+    groups = {}
+    for m_name in evaluator.muscle_names:
+        groups.setdefault(tuple(deps[m_name]), []).append(m_name)
+
+    for dep_coords, group in groups.items():
+        dep_idx = [coord_names.index(c) for c in dep_coords]
+        lo = np.array([bounds[c][0] for c in dep_coords])
+        hi = np.array([bounds[c][1] for c in dep_coords])
+
+        n = n_samples if dep_coords else 1
+        poses = np.tile(defaults, (n, 1))
+        if dep_coords:
+            poses[:, dep_idx] = lo + (hi - lo) * rng.random((n, len(dep_coords)))
+        lengths = evaluator.evaluate(np.ascontiguousarray(poses), coord_names)
+
+        center = (lo + hi) / 2.0
+        half = np.where(hi > lo, (hi - lo) / 2.0, 1.0)
+        x = (poses[:, dep_idx] - center) / half
+        exponents = monomial_exponents(len(dep_coords), degree if dep_coords else 0)
+        A = design_matrix(x, exponents)
+
+        n_fit = n if n < 10 else int(round(n * (1.0 - holdout)))
+        for m_name in group:
+            j = evaluator.muscle_names.index(m_name)
+            y = lengths[:, j]
+            coef, *_ = np.linalg.lstsq(A[:n_fit], y[:n_fit], rcond=None)
+
+            # Σφάλμα στα δείγματα που δεν χρησιμοποιήθηκαν στο fit
+            check = slice(n_fit, None) if n_fit < n else slice(None)
+            err = A[check] @ coef - y[check]
+            meta["muscles"][m_name] = {
+                "coords": list(dep_coords),
+                "max_abs_error": float(np.abs(err).max()),
+                "rms_error": float(np.sqrt(np.mean(err ** 2))),
+            }
+            arrays[f"{m_name}__coef"] = coef
+            arrays[f"{m_name}__exponents"] = exponents
+            arrays[f"{m_name}__center"] = center
+            arrays[f"{m_name}__half_range"] = half
+
+    return meta, arrays
+
+
+def save_surrogate(path, meta, arrays):
+    np.savez_compressed(path, __meta__=np.array(json.dumps(meta)), **arrays)
+
+
+class MuscleSurrogate:
+    """
+    Φορτωμένο surrogate: evaluate() δίνει (n_frames, n_muscles) μήκη σε m
+    από γωνίες σε rad, χωρίς OpenSim.
+    """
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            self.meta = json.loads(str(data["__meta__"]))
+            self._arrays = {k: data[k] for k in data.files if k != "__meta__"}
+        self.coord_names = self.meta["coord_names"]
+        self.defaults = np.array(self.meta["defaults"])
+        self.muscle_names = list(self.meta["muscles"].keys())
+
+    @property
+    def model_sha256(self):
+        return self.meta.get("model_sha256")
+
+    def full_angles(self, angles_rad, coord_names):
+        """Γωνίες στη σειρά του surrogate· ό,τι λείπει παίρνει τη default τιμή."""
+        full = np.tile(self.defaults, (angles_rad.shape[0], 1))
+        for k, c in enumerate(coord_names):
+            if c in self.coord_names:
+                full[:, self.coord_names.index(c)] = angles_rad[:, k]
+        return full
+
+    def out_of_range_fraction(self, angles_rad, coord_names):
+        """Κλάσμα frames με έστω μία συντεταγμένη εκτός του range του fit."""
+        full = self.full_angles(angles_rad, coord_names)
+        outside = np.zeros(full.shape[0], dtype=bool)
+        for m_name in self.muscle_names:
+            idx = [self.coord_names.index(c) for c in self.meta["muscles"][m_name]["coords"]]
+            if not idx:
+                continue
+            x = (full[:, idx] - self._arrays[f"{m_name}__center"]) / self._arrays[f"{m_name}__half_range"]
+            outside |= (np.abs(x) > 1.0 + 1e-9).any(axis=1)
+        return float(outside.mean()) if len(outside) else 0.0
+
+    def evaluate(self, angles_rad, coord_names, muscle_names=None):
+        if muscle_names is None:
+            muscle_names = self.muscle_names
+        full = self.full_angles(angles_rad, coord_names)
+        out = np.empty((full.shape[0], len(muscle_names)))
+        for j, m_name in enumerate(muscle_names):
+            m = self.meta["muscles"][m_name]
+            idx = [self.coord_names.index(c) for c in m["coords"]]
+            x = (full[:, idx] - self._arrays[f"{m_name}__center"]) / self._arrays[f"{m_name}__half_range"]
+            A = design_matrix(x, self._arrays[f"{m_name}__exponents"])
+            out[:, j] = A @ self._arrays[f"{m_name}__coef"]
+        return out
+
+
+def _cmd_fit(args, timer, info):
+    if not os.path.isfile(args.model):
+        print(f"❌ Model not found: {args.model}")
+        sys.exit(1)
+
+    print(f"📄 Model: {args.model}")
+    selection = parse_muscle_arg(args.muscles) or MUSCLES
+    try:
+        with timer.stage("model load"):
+            evaluator = FrameEvaluator(args.model, selection)
+    except ValueError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    print(f"➡ Muscles: {len(evaluator.muscle_names)} selected")
+    coord_names = list(COLUMN_MAP.values())
+
+    timer.start("ranges")
+    ranges = ranges_from_trials(args.ranges_from) if args.ranges_from else None
+    timer.start("fit")
+    meta, arrays = fit_surrogates(evaluator, coord_names, degree=args.degree,
+                                  n_samples=args.samples, ranges=ranges)
+    timer.start("save")
+    meta["model_sha256"] = file_sha256(args.model)
+    # η επιλογή όπως δόθηκε (π.χ. ["all"])· τα ονόματα που βγήκαν είναι τα keys του meta["muscles"]
+    meta["muscle_selection"] = list(selection)
+    save_surrogate(args.out, meta, arrays)
+    timer.stop()
+    info["muscles"] = len(meta["muscles"])
+
+    print(f"✅ Saved surrogate to: {args.out}")
+    for m_name, m in meta["muscles"].items():
+        print(f"  - {m_name:<14} coords={m['coords']}  "
+              f"max={m['max_abs_error'] * 1000:.3f} mm  rms={m['rms_error'] * 1000:.3f} mm")
+
+
+def _cmd_eval(args, timer, info):
+    timer.start("load")
+    surrogate = MuscleSurrogate(args.surrogate)
+    df = load_trial(args.input_csv, ["time"], optional=list(COLUMN_MAP))
+    available_map, _ = find_available_columns(df)
+    coord_names, angles = angles_matrix(df, available_map)
+    timer.stop()
+    info["frames"] = len(df)
+
+    frac = surrogate.out_of_range_fraction(angles, coord_names)
+    if frac > 0:
+        print(f"⚠ Warning: {frac * 100:.1f}% of frames are outside the fitted ranges.")
+
+    with timer.stage("surrogate eval"):
+        lengths = surrogate.evaluate(angles, coord_names)
+    with timer.stage("save"):
+        out_df = pd.DataFrame(lengths_to_columns(df["time"].values, lengths,
+                                                 surrogate.muscle_names))
+        save_table(args.output_csv, out_df)
+    print(f"✅ Saved surrogate muscle lengths to: {args.output_csv}")
+
+
+def _cmd_validate(args, timer, info):
+    timer.start("load")
+    surrogate = MuscleSurrogate(args.surrogate)
+    if surrogate.model_sha256 != file_sha256(args.model):
+        print("⚠ Warning: surrogate was fitted on a different .osim file.")
+
+    df = load_trial(args.input_csv, ["time"], optional=list(COLUMN_MAP))
+    available_map, _ = find_available_columns(df)
+    coord_names, angles = angles_matrix(df, available_map)
+
+    muscle_names = surrogate.muscle_names
+    info["frames"] = len(df)
+    timer.start("model load")
+    exact_evaluator = FrameEvaluator(args.model, muscle_names)
+    timer.start("muscle lengths (exact)")
+    exact = exact_evaluator.evaluate(angles, coord_names)
+    timer.start("surrogate eval")
+    approx = surrogate.evaluate(angles, coord_names, muscle_names)
+    timer.stop()
+    err = approx - exact
+
+    print(f"➡ Frames: {len(df)}  "
+          f"(outside fitted ranges: {surrogate.out_of_range_fraction(angles, coord_names) * 100:.1f}%)")
+    for j, m_name in enumerate(muscle_names):
+        max_err = np.abs(err[:, j]).max()
+        rms_err = np.sqrt(np.mean(err[:, j] ** 2))
+        print(f"  - {m_name:<14} max={max_err * 1000:.3f} mm  rms={rms_err * 1000:.3f} mm")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polynomial surrogate for muscle lengths.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("fit", help="sample the model and fit one polynomial per muscle")
+    p.add_argument("model")
+    p.add_argument("out")
+    p.add_argument("--degree", type=int, default=4)
+    p.add_argument("--samples", type=int, default=3000,
+                   help="model evaluations per group of muscles with the same coordinates")
+    p.add_argument("--ranges-from", nargs="+", default=None, metavar="CSV",
+                   help="fit over the angle ranges seen in these trials instead of the model ranges")
+    p.add_argument("--muscles", default=None, metavar="PATTERNS",
+                   help="comma-separated muscle names / fnmatch patterns, or 'all' "
+                        "(default: the six muscles in MUSCLES)")
+    add_profile_args(p)
+    p.set_defaults(func=_cmd_fit)
+
+    p = sub.add_parser("eval", help="evaluate a trial with the surrogate (no OpenSim)")
+    p.add_argument("surrogate")
+    p.add_argument("input_csv")
+    p.add_argument("output_csv")
+    add_profile_args(p)
+    p.set_defaults(func=_cmd_eval)
+
+    p = sub.add_parser("validate", help="max/RMS error against the exact OpenSim path")
+    p.add_argument("model")
+    p.add_argument("surrogate")
+    p.add_argument("input_csv")
+    add_profile_args(p)
+    p.set_defaults(func=_cmd_validate)
+
+    args = parser.parse_args()
+    info = {}
+    with profiling(args, extra=info) as timer:
+        args.func(args, timer, info)
+
+
+if __name__ == "__main__":
+    main()
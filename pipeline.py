@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Όλα τα στάδια σε ένα process, με NumPy arrays στη μνήμη ανάμεσά τους:
+
+    trial -> muscle lengths -> heel strikes + κύκλοι 0–100% -> plots ανά trial
+          -> mean ± SD ανά subject (cycle_stats, ίδιοι κύκλοι) -> plots ανά subject / σύγκριση
+
+Στον δίσκο γράφονται μόνο τα artifacts που ζητάει το --save. Στο τέλος
+τυπώνεται ο χρόνος κάθε σταδίου, ο συνολικός χρόνος και η peak μνήμη.
+
+Usage:
+    python pipeline.py <model.osim> <out_dir> <trial.csv|glob|manifest.txt> [...]
+        [--save muscles,cycles,tensor,stats,trial-plots,subject-plots]
+        [--format csv|cols|parquet] [--workers N] [--force]
+        [--muscles all|PATTERNS] [--float32] [--profile REPORT.json] [--cprofile OUT.prof]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from render_scheduler import FigureJob, render_jobs  # Agg, πριν από το pyplot
+
+import heel_strikes
+from batch_muscle_lengths import collect_trials
+from columnar_io import save_table
+from cycle_stats import CycleStats, subject_cycles
+from gait_cycle_muscle_lengths import cycles_to_frame, resample_cycles, save_cycles_npz
+from instrumentation import (
+    StageTimer,
+    add_profile_args,
+    peak_rss_mb,
+    print_stage_report,
+    profiling,
+)
+from plot_all_subjects import render_comparison_figure, render_subject_figure
+from plot_muscle_lengths import render_muscle_figure
+from run_muscle_lengths import (
+    COLUMN_MAP,
+    MUSCLES,
+    FrameEvaluator,
+    angles_matrix,
+    find_available_columns,
+    lengths_to_columns,
+    parse_muscle_arg,
+)
+from trial_loader import load_trial
+
+ARTIFACTS = ["muscles", "cycles", "tensor", "stats", "trial-plots", "subject-plots"]
+DEFAULT_SAVE = ["trial-plots", "subject-plots"]
+N_PHASE_POINTS = 101
+
+
+def subject_of(trial_name):
+    """S135_G03_D01_B01_T01 -> S135"""
+    return trial_name.split("_")[0]
+
+
+def process_trial(evaluator, csv_path, timer):
+    """
+    Ένα trial από το NONAN CSV ως τους κανονικοποιημένους κύκλους, χωρίς ενδιάμεσα αρχεία.
+
+    Returns:
+        dict με time, lengths (n_frames, n_muscles), cycles (n_cycles, 101, n_muscles), meta
+        και stats_cycles: οι κύκλοι για τα subject stats (κανόνας του cycle_stats.subject_cycles)
+    """
+    timer.start("load")
+    df = load_trial(csv_path, ["time"], optional=list(COLUMN_MAP) + [
+        heel_strikes.CONTACT_COLUMN, heel_strikes.HEEL_Y_COLUMN])
+    available_map, _ = find_available_columns(df)
+    if not available_map:
+        raise ValueError("None of the expected angle columns were found.")
+    coord_names, angles = angles_matrix(df, available_map)
+
+    timer.start("muscle lengths")
+    lengths = evaluator.evaluate(angles, coord_names)
+
+    timer.start("cycle detection")
+    time_s = df["time"].values
+    hs_idx = heel_strikes.detect_heel_strikes(df, count_start=True)
+    if len(hs_idx) < 2:
+        raise ValueError(f"Not enough heel strikes (found {len(hs_idx)}).")
+    timer.start("resampling")
+    cycles, meta = resample_cycles(time_s, lengths, hs_idx, n_points=N_PHASE_POINTS)
+    # τα subject stats ακολουθούν τον κανόνα του plot_all_subjects, όχι του gait_cycle
+    try:
+        stats_cycles = subject_cycles(df, lengths, n_points=N_PHASE_POINTS)
+    except ValueError:
+        stats_cycles = cycles[:0]
+    timer.stop()
+    return {"time": time_s, "lengths": lengths, "cycles": cycles, "meta": meta,
+            "stats_cycles": stats_cycles}
+
+
+def run_pipeline(model_path, trials, out_dir, save=DEFAULT_SAVE, fmt="csv",
+                 workers=None, force=False, muscles=MUSCLES, dtype=np.float64,
+                 timer=None, frame_timing=False):
+    """
+    Τρέχει όλα τα στάδια για τα trials. Returns: dict με χρόνους, peak μνήμη και αποτυχίες.
+
+    frame_timing: χρόνοι setValue / realizePosition / getLength μέσα στο hot loop
+    """
+    save = set(save)
+    os.makedirs(out_dir, exist_ok=True)
+    timer = timer or StageTimer()
+    t_start = time.perf_counter()
+
+    timer.start("model load")
+    evaluator = FrameEvaluator(model_path, muscles, dtype=dtype)
+    if frame_timing:
+        evaluator.timer = timer
+    value_cols = [m + "_length" for m in evaluator.muscle_names]
+    timer.stop()
+
+    jobs = []
+    engine = CycleStats(value_cols, N_PHASE_POINTS)
+    failed = []
+    n_frames = 0
+
+    for csv_path in trials:
+        trial = os.path.splitext(os.path.basename(csv_path.rstrip("/\\")))[0]
+        try:
+            res = process_trial(evaluator, csv_path, timer)
+        except Exception as exc:  # ένα χαλασμένο trial δεν σταματά τα υπόλοιπα
+            timer.stop()
+            print(f"  ❌ {trial}: {type(exc).__name__}: {exc}")
+            failed.append(csv_path)
+            continue
+
+        n_frames += len(res["time"])
+        cycles, meta = res["cycles"], res["meta"]
+        print(f"  ✅ {trial}: {len(res['time'])} frames, {len(cycles)} cycles")
+        timer.start("subject stats")
+        engine.update(subject_of(trial), res["stats_cycles"])
+        timer.stop()
+
+        timer.start("save")
+        if "muscles" in save:
+            save_table(os.path.join(out_dir, f"{trial}_muscles.{fmt}"),
+                       pd.DataFrame(lengths_to_columns(res["time"], res["lengths"],
+                                                       evaluator.muscle_names)))
+        if "cycles" in save and len(cycles):
+            save_table(os.path.join(out_dir, f"{trial}_normcycles.{fmt}"),
+                       cycles_to_frame(cycles, meta, value_cols))
+        if "tensor" in save:
+            save_cycles_npz(os.path.join(out_dir, f"{trial}_cycles.npz"),
+                            cycles, meta, value_cols)
+        timer.stop()
+
+        if "trial-plots" in save and len(cycles):
+            plot_dir = os.path.join(out_dir, "trial_plots", trial)
+            os.makedirs(plot_dir, exist_ok=True)
+            x = np.linspace(0, 100, N_PHASE_POINTS)
+            for k, muscle in enumerate(value_cols):
+                jobs.append(FigureJob(
+                    os.path.join(plot_dir, f"{muscle}_plots_simple.png"),
+                    render_muscle_figure,
+                    {"muscle": muscle, "x": x, "data": np.ascontiguousarray(cycles[:, :, k])}))
+
+    subjects = engine.groups()
+    if "stats" in save and subjects:
+        timer.start("save")
+        save_table(os.path.join(out_dir, f"subject_stats.{fmt}"), engine.to_frame())
+        timer.stop()
+
+    if "subject-plots" in save and subjects:
+        plot_dir = os.path.join(out_dir, "all_muscle_plots")
+        os.makedirs(plot_dir, exist_ok=True)
+        series = {}
+        for subj in subjects:
+            mean, sd, _ = engine.result(subj)
+            series[subj] = [{"subject": subj, "phase": engine.phase,
+                             "mean": mean[:, k], "sd": sd[:, k]}
+                            for k in range(len(value_cols))]
+        for k, muscle in enumerate(value_cols):
+            for subject in subjects:
+                jobs.append(FigureJob(
+                    os.path.join(plot_dir, f"{muscle}_{subject}_mean_sd.png"),
+                    render_subject_figure, {"muscle": muscle, **series[subject][k]}))
+            if len(subjects) >= 2:
+                subj1, subj2 = subjects[0], subjects[1]
+                jobs.append(FigureJob(
+                    os.path.join(plot_dir, f"{muscle}_{subj1}_vs_{subj2}.png"),
+                    render_comparison_figure,
+                    {"muscle": muscle, "subjects": (subj1, subj2),
+                     "series": [series[subj1][k], series[subj2][k]]}))
+
+    records = []
+    if jobs:
+        timer.start("figures")
+        # ένα pool για όλα τα figures· το manifest (σχετικά paths) μπαίνει στο out_dir
+        records = render_jobs(jobs, workers=workers, verbose=False,
+                              out_dir=out_dir, force=force)
+        timer.stop()
+
+    return {"trials": len(trials), "failed": failed, "frames": n_frames,
+            "figures": len(jobs), "rendered": len(records),
+            "stages": dict(timer.seconds), "timer": timer,
+            "wall": time.perf_counter() - t_start, "peak_rss_mb": peak_rss_mb()}
+
+
+def print_report(summary):
+    print_stage_report(summary["timer"])
+    print(f"➡ Trials: {summary['trials'] - len(summary['failed'])}/{summary['trials']} ok, "
+          f"{summary['frames']} frames, {summary['figures']} figures "
+          f"({summary['rendered']} rendered, {summary['figures'] - summary['rendered']} unchanged)")
+    print(f"➡ Total wall time: {summary['wall']:.2f} s")
+    if summary["peak_rss_mb"] is not None:
+        print(f"➡ Peak memory (RSS): {summary['peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all stages in one process, in memory.")
+    parser.add_argument("model")
+    parser.add_argument("out_dir")
+    parser.add_argument("sources", nargs="+",
+                        help="trial CSVs, glob patterns or a .txt manifest")
+    parser.add_argument("--save", default=",".join(DEFAULT_SAVE),
+                        help=f"comma-separated artifacts to write: {', '.join(ARTIFACTS)} "
+                             "(default: %(default)s)")
+    parser.add_argument("--format", choices=["csv", "cols", "parquet"], default="csv",
+                        help="format of the saved tables (default: csv)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="figure rendering processes (default: CPU count, 1 = serial)")
+    parser.add_argument("--force", action="store_true",
+                        help="re-render every figure, even if its inputs did not change")
+    parser.add_argument("--muscles", default=None, metavar="PATTERNS",
+                        help="comma-separated muscle names / fnmatch patterns, or 'all' "
+                             "(default: the six muscles in run_muscle_lengths.MUSCLES)")
+    parser.add_argument("--float32", action="store_true",
+                        help="keep the muscle lengths as float32 instead of float64")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    save = [s.strip() for s in args.save.split(",") if s.strip()]
+    unknown = [s for s in save if s not in ARTIFACTS]
+    if unknown:
+        parser.error(f"unknown artifact(s) {unknown}; choose from {ARTIFACTS}")
+
+    trials = collect_trials(args.sources)
+    if not trials:
+        print("❌ No trial CSVs found.")
+        sys.exit(1)
+
+    print(f"📄 Model: {args.model}")
+    print(f"📄 Trials: {len(trials)}")
+    print(f"📄 Output: {args.out_dir} (saving: {', '.join(save) or 'nothing'})")
+
+    info = {"trials": len(trials)}
+    with profiling(args, extra=info, report=False) as timer:
+        summary = run_pipeline(args.model, trials, args.out_dir, save, args.format,
+                               args.workers, args.force,
+                               parse_muscle_arg(args.muscles) or MUSCLES,
+                               np.float32 if args.float32 else np.float64,
+                               timer=timer, frame_timing=bool(args.profile))
+        info.update(frames=summary["frames"], failed=summary["failed"],
+                    figures=summary["figures"], rendered=summary["rendered"])
+    print_report(summary)
+    if summary["failed"]:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
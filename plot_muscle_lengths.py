@@ -1,22 +1,150 @@
 #!/usr/bin/env python3
-import sys
+import argparse
 import os
 import numpy as np
-import pandas as pd
+
+from render_scheduler import FigureJob, render_jobs  # Agg, πριν από το pyplot
 import matplotlib.pyplot as plt
 
+from columnar_io import load_table
+from instrumentation import add_profile_args, profiling
+
+
+def muscle_cycles_matrix(df, muscle):
+    """(n_cycles x N) πίνακας με τα lengths ενός μύα + άξονας x (0–100%)."""
+    mdf = df[["cycle", muscle]].copy()
+
+    # Βρίσκουμε πόσα cycles έχουμε
+    cycles = sorted(mdf["cycle"].unique())
+    n_cycles = len(cycles)
+
+    # Υποθέτουμε ότι κάθε cycle έχει ίδιο αριθμό σημείων (normalized)
+    # Παίρνουμε το πρώτο cycle για να βρούμε N
+    N = mdf[mdf["cycle"] == cycles[0]].shape[0]
+    x = np.linspace(0, 100, N)
+
+    # Φτιάχνουμε πίνακα (n_cycles x N) με τα lengths
+    data = np.zeros((n_cycles, N))
+    for i, c in enumerate(cycles):
+        vals = mdf[mdf["cycle"] == c][muscle].values
+        if len(vals) != N:
+            # Σε περίπτωση μικρής απόκλισης κάνουμε απλή παρεμβολή
+            old_x = np.linspace(0, 100, len(vals))
+            vals = np.interp(x, old_x, vals)
+        data[i, :] = vals
+    return x, data
+
+
+def render_muscle_figure(d):
+    """Το 2x2 figure ενός μύα από τα έτοιμα arrays (τρέχει σε worker)."""
+    muscle, x, data = d["muscle"], d["x"], d["data"]
+    n_cycles = data.shape[0]
+
+    mean_len = data.mean(axis=0)
+    std_len = data.std(axis=0)
+
+    # --------- 4-plot figure (2x2) ----------
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    fig.suptitle(f"Muscle: {muscle}", fontsize=16)
+
+    # 1) All cycles + mean
+    ax1 = axes[0, 0]
+    for i in range(n_cycles):
+        ax1.plot(x, data[i, :], alpha=0.4)
+    ax1.plot(x, mean_len, color="green", linewidth=2.0, label="Mean")
+    ax1.set_title(f"{muscle}\nAll cycles + mean")
+    ax1.set_xlabel("Gait cycle (%)")
+    ax1.set_ylabel("Length (m)")
+    ax1.legend(loc="best")
+
+    # 2) Mean ± SD
+    ax2 = axes[0, 1]
+    ax2.plot(x, mean_len, linewidth=2.0)
+    ax2.fill_between(
+        x,
+        mean_len - std_len,
+        mean_len + std_len,
+        alpha=0.3,
+    )
+    ax2.set_title(f"{muscle}\nMean ± SD")
+    ax2.set_xlabel("Gait cycle (%)")
+    ax2.set_ylabel("Length (m)")
+
+    # 3) Cycle-wise Peak / Min / ROM (με σωστή κλίμακα)
+    ax3 = axes[1, 0]
+    peaks = data.max(axis=1)
+    mins = data.min(axis=1)
+    roms = peaks - mins
+
+    # Θα δείξουμε τα **μέσα** + SD για Peak/Min/ROM
+    labels = ["Peak", "Min", "ROM"]
+    vals_mean = [peaks.mean(), mins.mean(), roms.mean()]
+    vals_std = [peaks.std(), mins.std(), roms.std()]
+    xpos = np.arange(3)
+
+    ax3.bar(xpos, vals_mean, yerr=vals_std, capsize=5)
+    ax3.set_xticks(xpos)
+    ax3.set_xticklabels(labels)
+    ax3.set_title(f"{muscle}\nCycle-wise Peak / Min / ROM")
+    ax3.set_ylabel("Length (m)")
+
+    # Δυναμική κλίμακα Υ για να φαίνονται καθαρά οι μπάρες
+    all_vals = np.concatenate([peaks, mins, roms])
+    y_min = all_vals.min()
+    y_max = all_vals.max()
+    if y_max == y_min:
+        # safety: σε περίπτωση σχεδόν σταθερού σήματος
+        margin = 0.01
+    else:
+        margin = 0.1 * (y_max - y_min)
+    ax3.set_ylim(y_min - margin, y_max + margin)
+
+    # 4) Heatmap (cycles x gait %)
+    ax4 = axes[1, 1]
+    im = ax4.imshow(
+        data,
+        aspect="auto",
+        origin="lower",
+        extent=[0, 100, 1, n_cycles + 1],
+    )
+    ax4.set_title(f"{muscle}\nHeatmap (cycles × gait %)")
+    ax4.set_xlabel("Gait cycle (%)")
+    ax4.set_ylabel("Cycle index")
+
+    cbar = fig.colorbar(im, ax=ax4)
+    cbar.set_label("Length (m)")
+
+    fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+    return fig
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python plot_muscle_lengths.py <normcycles_csv> <out_dir>")
-        sys.exit(1)
 
-    csv_path = sys.argv[1]
-    out_dir = sys.argv[2]
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python plot_muscle_lengths.py <normcycles_csv> <out_dir> [--workers N] [--force] "
+              "[--profile REPORT.json] [--cprofile OUT.prof]")
+    parser.add_argument("csv_path")
+    parser.add_argument("out_dir")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="figures rendered in parallel (default: CPU count, 1 = serial)")
+    parser.add_argument("--force", action="store_true",
+                        help="re-render every figure, even if its inputs did not change")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    info = {}
+    with profiling(args, extra=info) as timer:
+        run(args, timer, info)
+
+
+def run(args, timer, info):
+    """Το σώμα του main· timer: StageTimer, info: επιπλέον πεδία για το --profile report."""
+    csv_path = args.csv_path
+    out_dir = args.out_dir
     os.makedirs(out_dir, exist_ok=True)
 
     print(f"📄 Reading: {csv_path}")
-    df = pd.read_csv(csv_path)
+    with timer.stage("load csv"):
+        df = load_table(csv_path)
 
     # Περιμένουμε στήλες: cycle, phase, και _length για τους μύες
     base_cols = {"cycle", "phase", "time", "gait_pct", "gait_cycle_pct"}
@@ -26,109 +154,20 @@ def main():
     for m in muscle_cols:
         print(f"  - {m}")
 
-    # Για κάθε μύα φτιάχνουμε 4 plots
+    # Για κάθε μύα ένα 2x2 figure: τα arrays ετοιμάζονται εδώ, το rendering στους workers
+    jobs = []
+    timer.start("cycle matrices")
     for muscle in muscle_cols:
-        mdf = df[["cycle", muscle]].copy()
-
-        # Βρίσκουμε πόσα cycles έχουμε
-        cycles = sorted(mdf["cycle"].unique())
-        n_cycles = len(cycles)
-
-        # Υποθέτουμε ότι κάθε cycle έχει ίδιο αριθμό σημείων (normalized)
-        # Παίρνουμε το πρώτο cycle για να βρούμε N
-        N = mdf[mdf["cycle"] == cycles[0]].shape[0]
-        x = np.linspace(0, 100, N)
-
-        # Φτιάχνουμε πίνακα (n_cycles x N) με τα lengths
-        data = np.zeros((n_cycles, N))
-        for i, c in enumerate(cycles):
-            vals = mdf[mdf["cycle"] == c][muscle].values
-            if len(vals) != N:
-                # Σε περίπτωση μικρής απόκλισης κάνουμε απλή παρεμβολή
-                old_x = np.linspace(0, 100, len(vals))
-                vals = np.interp(x, old_x, vals)
-            data[i, :] = vals
-
-        mean_len = data.mean(axis=0)
-        std_len = data.std(axis=0)
-
-        # --------- 4-plot figure (2x2) ----------
-        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-        fig.suptitle(f"Muscle: {muscle}", fontsize=16)
-
-        # 1) All cycles + mean
-        ax1 = axes[0, 0]
-        for i in range(n_cycles):
-            ax1.plot(x, data[i, :], alpha=0.4)
-        ax1.plot(x, mean_len, color="green", linewidth=2.0, label="Mean")
-        ax1.set_title(f"{muscle}\nAll cycles + mean")
-        ax1.set_xlabel("Gait cycle (%)")
-        ax1.set_ylabel("Length (m)")
-        ax1.legend(loc="best")
-
-        # 2) Mean ± SD
-        ax2 = axes[0, 1]
-        ax2.plot(x, mean_len, linewidth=2.0)
-        ax2.fill_between(
-            x,
-            mean_len - std_len,
-            mean_len + std_len,
-            alpha=0.3,
-        )
-        ax2.set_title(f"{muscle}\nMean ± SD")
-        ax2.set_xlabel("Gait cycle (%)")
-        ax2.set_ylabel("Length (m)")
-
-        # 3) Cycle-wise Peak / Min / ROM (με σωστή κλίμακα)
-        ax3 = axes[1, 0]
-        peaks = data.max(axis=1)
-        mins = data.min(axis=1)
-        roms = peaks - mins
-
-        # Θα δείξουμε τα **μέσα** + SD για Peak/Min/ROM
-        labels = ["Peak", "Min", "ROM"]
-        vals_mean = [peaks.mean(), mins.mean(), roms.mean()]
-        vals_std = [peaks.std(), mins.std(), roms.std()]
-        xpos = np.arange(3)
-
-        ax3.bar(xpos, vals_mean, yerr=vals_std, capsize=5)
-        ax3.set_xticks(xpos)
-        ax3.set_xticklabels(labels)
-        ax3.set_title(f"{muscle}\nCycle-wise Peak / Min / ROM")
-        ax3.set_ylabel("Length (m)")
-
-        # Δυναμική κλίμακα Υ για να φαίνονται καθαρά οι μπάρες
-        all_vals = np.concatenate([peaks, mins, roms])
-        y_min = all_vals.min()
-        y_max = all_vals.max()
-        if y_max == y_min:
-            # safety: σε περίπτωση σχεδόν σταθερού σήματος
-            margin = 0.01
-        else:
-            margin = 0.1 * (y_max - y_min)
-        ax3.set_ylim(y_min - margin, y_max + margin)
-
-        # 4) Heatmap (cycles x gait %)
-        ax4 = axes[1, 1]
-        im = ax4.imshow(
-            data,
-            aspect="auto",
-            origin="lower",
-            extent=[0, 100, 1, n_cycles + 1],
-        )
-        ax4.set_title(f"{muscle}\nHeatmap (cycles × gait %)")
-        ax4.set_xlabel("Gait cycle (%)")
-        ax4.set_ylabel("Cycle index")
-
-        cbar = fig.colorbar(im, ax=ax4)
-        cbar.set_label("Length (m)")
-
-        plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-
+        x, data = muscle_cycles_matrix(df, muscle)
         out_path = os.path.join(out_dir, f"{muscle}_plots_simple.png")
-        plt.savefig(out_path, dpi=300)
-        plt.close(fig)
-        print(f"✅ Saved plots for {muscle} to {out_path}")
+        jobs.append(FigureJob(out_path, render_muscle_figure,
+                              {"muscle": muscle, "x": x, "data": data}))
+
+    timer.start("figures")
+    records = render_jobs(jobs, workers=args.workers,
+                          out_dir=out_dir, force=args.force)
+    timer.stop()
+    info.update(figures=len(jobs), rendered=len(records))
 
     print("🎉 Done.")
 
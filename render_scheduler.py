@@ -0,0 +1,204 @@
+"""
+Headless, παράλληλο rendering των figures των plotting scripts.
+
+Κάθε figure περιγράφεται από ένα μικρό FigureJob: το path του PNG, μια
+module-level render συνάρτηση (picklable) και ένα dict με τα ήδη υπολογισμένα
+arrays. Τα jobs τρέχουν σε process pool με Agg backend· για κάθε figure
+καταγράφεται ο χρόνος rendering (σχεδίαση + savefig).
+
+Με ένα PlotManifest (plot_manifest.json δίπλα στα PNG) ξαναγίνονται render
+μόνο τα figures που άλλαξε το hash των δεδομένων/παραμέτρων τους.
+
+Το module πρέπει να γίνεται import πριν από το matplotlib.pyplot.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, NamedTuple
+
+import matplotlib
+
+matplotlib.use("Agg")  # χωρίς GUI: ίδιο backend σε κάθε worker
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+MANIFEST_FILE = "plot_manifest.json"
+
+
+class FigureJob(NamedTuple):
+    out_path: str
+    render: Callable[[Dict[str, Any]], Any]  # data -> matplotlib Figure
+    data: Dict[str, Any]
+    dpi: int = 300
+
+
+def _update_hash(h, value):
+    """Σταθερό hash για arrays, dicts, λίστες και απλές τιμές."""
+    if isinstance(value, np.ndarray):
+        h.update(f"nd:{value.dtype.str}:{value.shape}".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        h.update(b"dict")
+        for k in sorted(value, key=str):
+            h.update(str(k).encode())
+            _update_hash(h, value[k])
+    elif isinstance(value, (list, tuple)):
+        h.update(f"seq:{len(value)}".encode())
+        for v in value:
+            _update_hash(h, v)
+    else:
+        h.update(repr(value).encode())
+
+
+def job_hash(job):
+    """SHA-256 των δεδομένων, του dpi και του κώδικα της render συνάρτησης."""
+    h = hashlib.sha256()
+    code = job.render.__code__
+    h.update(f"{job.render.__module__}.{job.render.__qualname__}".encode())
+    h.update(code.co_code)
+    h.update(repr(code.co_consts).encode())
+    h.update(f"dpi:{job.dpi}".encode())
+    _update_hash(h, job.data)
+    return h.hexdigest()
+
+
+class PlotManifest:
+    """
+    plot_manifest.json σε έναν φάκελο εξόδου: όνομα PNG -> hash των inputs του.
+    """
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.path = os.path.join(out_dir, MANIFEST_FILE)
+        self.entries = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f).get("figures", {})
+            except (OSError, ValueError):
+                # χαλασμένο manifest: απλά ξαναφτιάχνουμε όλα τα figures
+                self.entries = {}
+
+    def _name(self, out_path):
+        return os.path.relpath(out_path, self.out_dir)
+
+    def is_current(self, job, digest):
+        return (self.entries.get(self._name(job.out_path)) == digest
+                and os.path.isfile(job.out_path))
+
+    def record(self, job, digest):
+        self.entries[self._name(job.out_path)] = digest
+
+    def save(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"figures": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def _init_render_worker():
+    # με spawn ο worker ξεκινά από την αρχή: ξαναβάζουμε το Agg πριν από οτιδήποτε
+    matplotlib.use("Agg")
+
+
+def render_job(job):
+    """Σχεδιάζει και σώζει ένα figure. Returns: record (path, seconds, error)."""
+    t0 = time.perf_counter()
+    try:
+        fig = job.render(job.data)
+        fig.savefig(job.out_path, dpi=job.dpi)
+        plt.close(fig)
+        error = ""
+    except Exception as exc:  # ένα χαλασμένο figure δεν σταματά τα υπόλοιπα
+        plt.close("all")
+        error = f"{type(exc).__name__}: {exc}"
+    return {"path": job.out_path, "seconds": time.perf_counter() - t0, "error": error}
+
+
+def _print_record(rec):
+    if rec["error"]:
+        print(f"❌ Failed: {rec['path']}: {rec['error']}")
+    else:
+        print(f"✅ Saved: {rec['path']} ({rec['seconds']:.2f} s)")
+
+
+def render_jobs(jobs, workers=None, verbose=True, out_dir=None, force=False):
+    """
+    Renders όλα τα jobs. workers=1 -> σειριακά στο ίδιο process,
+    None -> όσοι οι πυρήνες (αλλά όχι περισσότεροι από τα jobs).
+
+    out_dir: αν δοθεί, χρησιμοποιείται το PlotManifest του φακέλου και
+        παραλείπονται τα figures που δεν άλλαξαν (εκτός αν force=True)
+
+    Returns:
+        λίστα από records (path, seconds, error) για όσα έγιναν render
+    """
+    jobs = list(jobs)
+    manifest = PlotManifest(out_dir) if out_dir is not None else None
+    digests = {}
+    n_skipped = 0
+    if manifest is not None:
+        pending = []
+        for job in jobs:
+            digest = job_hash(job)
+            if not force and manifest.is_current(job, digest):
+                n_skipped += 1
+                continue
+            digests[job.out_path] = digest
+            pending.append(job)
+        jobs = pending
+
+    records = _render_all(jobs, workers, verbose)
+
+    if manifest is not None:
+        for job, rec in zip(jobs, records):
+            if not rec["error"]:
+                manifest.record(job, digests[job.out_path])
+        manifest.save()
+        if verbose:
+            print(f"➡ Figures: {len(records)} rendered, {n_skipped} skipped (unchanged)")
+    return records
+
+
+def _render_all(jobs, workers, verbose):
+    if not jobs:
+        return []
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        records = []
+        for job in jobs:
+            rec = render_job(job)
+            if verbose:
+                _print_record(rec)
+            records.append(rec)
+    else:
+        records = [None] * len(jobs)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_render_worker) as pool:
+            futures = {pool.submit(render_job, job): k for k, job in enumerate(jobs)}
+            for fut in as_completed(futures):
+                rec = fut.result()
+                records[futures[fut]] = rec
+                if verbose:
+                    _print_record(rec)
+    wall = time.perf_counter() - t0
+
+    if verbose:
+        print_render_report(records, wall, workers)
+    return records
+
+
+def print_render_report(records, wall, workers):
+    secs = [r["seconds"] for r in records]
+    n_failed = sum(bool(r["error"]) for r in records)
+    print(f"➡ Rendered {len(records) - n_failed}/{len(records)} figures in {wall:.1f} s "
+          f"with {workers} worker(s) "
+          f"(per figure: mean {sum(secs) / len(secs):.2f} s, max {max(secs):.2f} s)")
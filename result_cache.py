@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache για τα *_muscles outputs του run_muscle_lengths.
+
+Το key είναι SHA-256 πάνω στο περιεχόμενο του .osim, στο περιεχόμενο του
+input CSV, στο COLUMN_MAP και στη λίστα μυών (+ όποιες ρυθμίσεις αλλάζουν το
+αποτέλεσμα). Αν το key υπάρχει ήδη, το αποτέλεσμα ξαναγράφεται χωρίς OpenSim.
+Τα entries είναι .npz (μία στήλη ανά array), άρα κρατούν ακριβώς τις τιμές και
+τον dtype (π.χ. float32) του αρχικού run σε όποια μορφή κι αν ζητηθεί το output.
+Ο φάκελος έχει όριο μεγέθους· όταν το ξεπεράσει σβήνονται πρώτα τα entries
+που χρησιμοποιήθηκαν λιγότερο πρόσφατα (LRU με βάση το mtime).
+
+Usage:
+    python result_cache.py info  [--dir D]
+    python result_cache.py list  [--dir D]
+    python result_cache.py prune [--dir D] [--max-size MB]
+    python result_cache.py clear [--dir D]
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from columnar_io import load_table
+from instrumentation import add_profile_args, profiling
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MUSCLE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "muscle_lengths"),
+)
+DEFAULT_MAX_BYTES = int(float(os.environ.get("MUSCLE_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+DATA_EXT = ".npz"
+# entries από παλιότερες εκδόσεις (CSV): μετράνε στο μέγεθος και σβήνονται, δεν διαβάζονται
+LEGACY_EXTS = (".csv",)
+
+
+def _update_file(h, path, block_size=1 << 20):
+    if os.path.isdir(path):
+        # binary πίνακας (.cols φάκελος): όλα τα αρχεία με σταθερή σειρά
+        for name in sorted(os.listdir(path)):
+            h.update(name.encode("utf-8"))
+            _update_file(h, os.path.join(path, name), block_size)
+        return
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+
+
+def cache_key(model_path, csv_path, column_map, muscle_names, extra=None):
+    """SHA-256 (hex) του μοντέλου, του input CSV και των ρυθμίσεων."""
+    h = hashlib.sha256()
+    for path in (model_path, csv_path):
+        file_hash = hashlib.sha256()
+        _update_file(file_hash, path)
+        h.update(file_hash.digest())
+    settings = {
+        "column_map": column_map,
+        "muscles": list(muscle_names),
+        "extra": extra or {},
+    }
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _write_atomic(path, write, suffix=".tmp"):
+    """write(tmp_path) σε προσωρινό αρχείο δίπλα στο path και os.replace στο τέλος."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=suffix)
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class ResultCache:
+    """
+    Ένα entry = <key>.npz + <key>.json (metadata για το list).
+
+    Πολλοί workers μπορεί να γράφουν/σβήνουν στον ίδιο φάκελο ταυτόχρονα
+    (batch --workers N, trial_queue work): κάθε αρχείο γράφεται με atomic
+    rename και ένα entry που εξαφανίστηκε ή είναι μισό απλώς προσπερνιέται.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + DATA_EXT, base + ".json"
+
+    def get(self, key):
+        """Path του cached αποτελέσματος (και το σημειώνει ως πρόσφατο) ή None."""
+        data_path, _ = self._paths(key)
+        now = time.time()
+        try:
+            os.utime(data_path, (now, now))
+        except OSError:  # δεν υπάρχει (ή το έσβησε μόλις το evict άλλου worker)
+            return None
+        return data_path
+
+    def get_frame(self, key):
+        """Το cached αποτέλεσμα ως DataFrame (ίδιοι dtypes με το αρχικό) ή None."""
+        data_path = self.get(key)
+        if data_path is None:
+            return None
+        try:
+            with np.load(data_path, allow_pickle=False) as data:
+                names = json.loads(str(data["__columns__"]))
+                return pd.DataFrame({name: data[f"c{k}"] for k, name in enumerate(names)})
+        except (OSError, ValueError, KeyError):  # σβήστηκε στο μεταξύ / χαλασμένο entry
+            return None
+
+    def put_frame(self, key, df, meta=None):
+        """Αποθηκεύει το DataFrame (atomic rename) και κάνει eviction."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, meta_path = self._paths(key)
+        arrays = {f"c{k}": np.ascontiguousarray(df[c].to_numpy())
+                  for k, c in enumerate(df.columns)}
+
+        def write_data(tmp):
+            # file object: με path το np.savez θα πρόσθετε .npz στο όνομα
+            with open(tmp, "wb") as f:
+                np.savez(f, __columns__=np.array(json.dumps([str(c) for c in df.columns])),
+                         **arrays)
+
+        _write_atomic(data_path, write_data)
+
+        record = dict(meta or {})
+        record["created"] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        def write_meta(tmp):
+            with open(tmp, "w") as f:
+                json.dump(record, f, indent=2)
+
+        _write_atomic(meta_path, write_meta)
+
+        self.evict()
+        return data_path
+
+    def put(self, key, src_path, meta=None):
+        """Όπως το put_frame, από αρχείο πίνακα (.csv / .cols / .parquet)."""
+        return self.put_frame(key, load_table(src_path), meta)
+
+    def entries(self):
+        """Λίστα από dicts (key, bytes, last_used, meta), πιο πρόσφατα πρώτα."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        out = []
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext != DATA_EXT and ext not in LEGACY_EXTS:
+                continue
+            data_path = os.path.join(self.cache_dir, name)
+            meta_path = self._paths(key)[1]
+            try:
+                st = os.stat(data_path)
+            except OSError:  # σβήστηκε στο μεταξύ
+                continue
+            meta = {}
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                # δεν έχει γραφτεί ακόμη / σβήστηκε: το entry μετράει χωρίς metadata
+                pass
+            out.append({"key": key, "bytes": st.st_size,
+                        "last_used": st.st_mtime, "meta": meta})
+        out.sort(key=lambda e: e["last_used"], reverse=True)
+        return out
+
+    def total_bytes(self):
+        return sum(e["bytes"] for e in self.entries())
+
+    def remove(self, key):
+        base = os.path.join(self.cache_dir, key)
+        for path in self._paths(key) + tuple(base + ext for ext in LEGACY_EXTS):
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # το έσβησε ήδη άλλος worker
+                pass
+
+    def evict(self):
+        """Σβήνει τα λιγότερο πρόσφατα entries μέχρι να χωράμε στο max_bytes."""
+        entries = self.entries()
+        total = sum(e["bytes"] for e in entries)
+        removed = 0
+        while entries and total > self.max_bytes:
+            e = entries.pop()
+            self.remove(e["key"])
+            total -= e["bytes"]
+            removed += 1
+        return removed
+
+    def clear(self):
+        n = 0
+        for e in self.entries():
+            self.remove(e["key"])
+            n += 1
+        return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the muscle-length result cache.")
+    parser.add_argument("command", choices=["info", "list", "prune", "clear"])
+    parser.add_argument("--dir", default=DEFAULT_CACHE_DIR, help="cache folder")
+    parser.add_argument("--max-size", type=float, default=None, metavar="MB",
+                        help="size cap used by prune (default: MUSCLE_CACHE_MAX_MB or 2048)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiling(args) as timer, timer.stage(args.command):
+        run(args)
+
+
+def run(args):
+    """Το σώμα του main για μία εντολή (info, list, prune, clear)."""
+    max_bytes = DEFAULT_MAX_BYTES if args.max_size is None else int(args.max_size * 1024 * 1024)
+    cache = ResultCache(args.dir, max_bytes)
+
+    if args.command == "info":
+        entries = cache.entries()
+        total = sum(e["bytes"] for e in entries)
+        print(f"📄 Cache: {cache.cache_dir}")
+        print(f"➡ Entries: {len(entries)}")
+        print(f"➡ Size: {total / 1024 / 1024:.1f} MB (cap {cache.max_bytes / 1024 / 1024:.0f} MB)")
+    elif args.command == "list":
+        for e in cache.entries():
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(e["last_used"]))
+            src = e["meta"].get("input_csv", "?")
+            print(f"{e['key'][:16]}  {e['bytes'] / 1024:9.1f} KB  {used}  {src}")
+    elif args.command == "prune":
+        n = cache.evict()
+        print(f"✅ Evicted {n} entries.")
+    elif args.command == "clear":
+        n = cache.clear()
+        print(f"✅ Removed {n} entries from {cache.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
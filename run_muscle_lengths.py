@@ -1,8 +1,25 @@
 import sys
 import os
+import argparse
+import fnmatch
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
 import numpy as np
 import pandas as pd
-import opensim
+
+try:
+    import opensim
+except ImportError:
+    # Τα εργαλεία που δεν φορτώνουν μοντέλο (π.χ. muscle_surrogate eval)
+    # δουλεύουν και χωρίς OpenSim· το load_model θα αποτύχει με σαφές μήνυμα.
+    opensim = None
+
+from columnar_io import save_table
+from instrumentation import add_profile_args, profiling
+from result_cache import DEFAULT_CACHE_DIR, ResultCache, cache_key
+from trial_loader import load_trial
 
 # Mapping από NONAN στήλες -> ονόματα συντεταγμένων στο Gait2392
 COLUMN_MAP = {
@@ -21,7 +38,7 @@ COLUMN_MAP = {
     "Ankle Dorsiflexion RT (deg)": "ankle_angle_r",
 }
 
-# Μύες που θα υπολογίσουμε (μπορούμε να προσθέσουμε κι άλλους αργότερα)
+# Μύες που θα υπολογίσουμε by default (--muscles all / "*_l,*_r" για όλο το μοντέλο)
 MUSCLES = [
     "med_gas_r",
     "soleus_r",
@@ -32,40 +49,922 @@ MUSCLES = [
 ]
 
 
+# Ποσότητες ανά μυ που βγαίνουν από το ίδιο realized State (βλ. FrameEvaluator)
+QUANTITIES = [
+    "length",                   # μήκος MTU (το κλασικό output)
+    "fiber_length",
+    "tendon_length",
+    "normalized_fiber_length",
+    "hip_flexion_moment_arm",   # ως προς τη συντεταγμένη της ίδιας πλευράς (_r/_l)
+    "knee_angle_moment_arm",
+    "ankle_angle_moment_arm",
+]
+# Αυτές θέλουν equilibrateMuscles μετά το realizePosition (κατάσταση των ινών)
+EQUILIBRIUM_QUANTITIES = {"fiber_length", "tendon_length", "normalized_fiber_length"}
+MOMENT_ARM_SUFFIX = "_moment_arm"
+# Περιθώριο πάνω στη μέγιστη |dL/dq| που μετράει το coordinate_sensitivity (λίγες
+# τυχαίες στάσεις υποεκτιμούν το πραγματικό μέγιστο στο range)
+ADAPTIVE_SENSITIVITY_MARGIN = 1.5
+
+
+def parse_quantity_arg(text):
+    """'length,fiber_length' / 'moment_arms' / 'all' -> λίστα ποσοτήτων (ValueError για άγνωστες)."""
+    if text is None:
+        return ["length"]
+    out = []
+    for item in (t.strip() for t in text.split(",")):
+        if not item:
+            continue
+        if item == "all":
+            expanded = QUANTITIES
+        elif item == "moment_arms":
+            expanded = [q for q in QUANTITIES if q.endswith(MOMENT_ARM_SUFFIX)]
+        elif item in QUANTITIES:
+            expanded = [item]
+        else:
+            raise ValueError(f"Unknown quantity '{item}'; choose from {QUANTITIES}, "
+                             "'moment_arms' or 'all'.")
+        out.extend(q for q in expanded if q not in out)
+    return out
+
+
+def parse_muscle_arg(text):
+    """'all' ή 'soleus_*,*_r' -> λίστα από ονόματα/patterns (None αν δεν δόθηκε)."""
+    if text is None:
+        return None
+    return [t.strip() for t in text.split(",") if t.strip()]
+
+
+def model_muscle_names(model):
+    """Όλοι οι μύες του μοντέλου, με τη σειρά του MuscleSet."""
+    muscles = model.getMuscles()
+    return [muscles.get(i).getName() for i in range(muscles.getSize())]
+
+
+def resolve_muscles(model, selection=MUSCLES):
+    """
+    Ονόματα μυών από ονόματα, fnmatch patterns (π.χ. '*_r', 'glut_*') ή 'all'.
+    Τα patterns δίνουν τους μύες με τη σειρά του μοντέλου, χωρίς διπλότυπα.
+    """
+    return resolve_muscle_names(model_muscle_names(model), selection)
+
+
+def resolve_muscle_names(available, selection=MUSCLES):
+    """Όπως το resolve_muscles, πάνω σε λίστα ονομάτων (με τη σειρά του MuscleSet)."""
+    present = set(available)
+    names = []
+    for item in selection:
+        if item == "all":
+            matched = available
+        elif any(ch in item for ch in "*?["):
+            matched = fnmatch.filter(available, item)
+            if not matched:
+                raise ValueError(f"Muscle pattern '{item}' matches no muscle in the model.")
+        else:
+            if item not in present:
+                raise ValueError(f"Muscle '{item}' not found in the model.")
+            matched = [item]
+        names.extend(m for m in matched if m not in names)
+    return names
+
+
+def osim_muscle_names(model_path):
+    """
+    Οι μύες του .osim (σειρά του ForceSet) από το XML, χωρίς OpenSim.
+    Κενή λίστα αν το αρχείο δεν διαβάζεται ως OpenSim XML.
+    """
+    try:
+        root = ElementTree.parse(model_path).getroot()
+    except (OSError, ElementTree.ParseError):
+        return []
+    names = []
+    for force_set in root.iter("ForceSet"):
+        for objects in force_set.findall("objects"):
+            names.extend(el.get("name") for el in objects
+                         if "Muscle" in el.tag and el.get("name"))
+    return names
+
+
+def cache_muscle_names(model_path, selection=MUSCLES):
+    """
+    Η λίστα μυών που μπαίνει στο cache_key: η επιλογή λυμένη σε ονόματα πάνω
+    στο XML του μοντέλου, ώστε 'all' / patterns και τα ίδια ονόματα γραμμένα
+    ρητά να μοιράζονται entries. Το ίδιο σε run_muscle_lengths και batch.
+    Αν το XML δεν δίνει μύες (ή η επιλογή δεν λύνεται), μένει η επιλογή όπως δόθηκε.
+    """
+    available = osim_muscle_names(model_path)
+    if not available:
+        return list(selection)
+    try:
+        return resolve_muscle_names(available, selection)
+    except ValueError:
+        return list(selection)
+
+
+def find_available_columns(df):
+    """
+    Ελέγχει ποιες στήλες γωνιών του COLUMN_MAP υπάρχουν στο df.
+
+    Returns:
+        available_map (dict): src_col -> coord_name για όσες βρέθηκαν
+        missing (list): src_col που λείπουν
+    """
+    available_map = {}
+    missing = []
+    for src_col, coord_name in COLUMN_MAP.items():
+        if src_col in df.columns:
+            available_map[src_col] = coord_name
+        else:
+            missing.append(src_col)
+    return available_map, missing
+
+
+def load_model(model_path):
+    """Φορτώνει το μοντέλο και επιστρέφει (model, state) έτοιμα για χρήση."""
+    if opensim is None:
+        raise ImportError("OpenSim is required to load a model "
+                          "(conda install -c opensim-org opensim).")
+    model = opensim.Model(model_path)
+    state = model.initSystem()
+    return model, state
+
+
+def angles_matrix(df, available_map):
+    """
+    Μετατρέπει τις στήλες γωνιών (deg) του available_map σε συνεχή πίνακα
+    (n_frames, n_coords) σε rad, με τη σειρά του available_map.
+
+    Returns:
+        coord_names (list), angles_rad (np.ndarray, C-contiguous float64)
+    """
+    src_cols = list(available_map.keys())
+    coord_names = [available_map[c] for c in src_cols]
+    angles_deg = df[src_cols].to_numpy(dtype=np.float64)
+    angles_rad = np.ascontiguousarray(np.deg2rad(angles_deg))
+    return coord_names, angles_rad
+
+
+class MuscleLengthMemo:
+    """
+    Bounded LRU cache ανά μυ για τα μήκη.
+
+    Το key κάθε μυός είναι μόνο οι συντεταγμένες από τις οποίες εξαρτάται,
+    κβαντισμένες σε βήμα tol (rad). Δύο frames με ίδιο key θεωρούνται ίδια
+    στάση για τον μυ, άρα το σφάλμα του cache φράσσεται από το tol.
+    """
+
+    def __init__(self, muscle_names, dependencies, tol, max_entries=100_000):
+        self.muscle_names = list(muscle_names)
+        self.dependencies = {m: list(dependencies[m]) for m in self.muscle_names}
+        self.tol = float(tol)
+        self.max_entries = int(max_entries)
+
+        n = len(self.muscle_names)
+        self.caches = [OrderedDict() for _ in range(n)]
+        self.hits = np.zeros(n, dtype=np.int64)
+        self.misses = np.zeros(n, dtype=np.int64)
+        self.evictions = np.zeros(n, dtype=np.int64)
+        self.frames_skipped = 0
+        self.frames_total = 0
+        self._coord_key = None
+
+    def bind(self, coord_names):
+        """
+        Δείκτες στηλών ανά μυ για τη δοσμένη σειρά συντεταγμένων. Αν αλλάξει το
+        σύνολο των διαθέσιμων συντεταγμένων (άλλο trial) τα caches αδειάζουν,
+        γιατί όσες λείπουν μένουν στη default τιμή και δεν είναι στο key.
+        """
+        coord_key = tuple(coord_names)
+        if coord_key != self._coord_key:
+            for cache in self.caches:
+                cache.clear()
+            self._coord_key = coord_key
+        return [[coord_names.index(c) for c in self.dependencies[m] if c in coord_names]
+                for m in self.muscle_names]
+
+    def quantize(self, angles_rad):
+        return np.round(angles_rad / self.tol).astype(np.int64)
+
+    def store(self, j, key, value):
+        cache = self.caches[j]
+        cache[key] = value
+        if len(cache) > self.max_entries:
+            cache.popitem(last=False)
+            self.evictions[j] += 1
+
+    def report(self):
+        """Λίστα από dicts ανά μυ: hits, misses, evictions, hit_rate, entries."""
+        rows = []
+        for j, m_name in enumerate(self.muscle_names):
+            total = self.hits[j] + self.misses[j]
+            rows.append({
+                "muscle": m_name,
+                "hits": int(self.hits[j]),
+                "misses": int(self.misses[j]),
+                "evictions": int(self.evictions[j]),
+                "hit_rate": float(self.hits[j] / total) if total else 0.0,
+                "entries": len(self.caches[j]),
+            })
+        return rows
+
+    def take_counts(self):
+        """Επιστρέφει και μηδενίζει τους μετρητές (για worker processes)."""
+        counts = (self.hits.copy(), self.misses.copy(), self.evictions.copy(),
+                  self.frames_skipped, self.frames_total)
+        self.hits[:] = 0
+        self.misses[:] = 0
+        self.evictions[:] = 0
+        self.frames_skipped = 0
+        self.frames_total = 0
+        return counts
+
+    def add_counts(self, counts):
+        hits, misses, evictions, skipped, total = counts
+        self.hits += hits
+        self.misses += misses
+        self.evictions += evictions
+        self.frames_skipped += skipped
+        self.frames_total += total
+
+
+class FrameEvaluator:
+    """
+    Υπολογίζει μήκη μυών frame-by-frame πάνω σε ένα warm μοντέλο.
+
+    Τα handles των συντεταγμένων και των μυών βρίσκονται μία φορά (όχι με
+    string lookup σε κάθε frame) και τα αποτελέσματα γράφονται κατευθείαν σε
+    έναν προ-δεσμευμένο πίνακα (n_frames, n_muscles).
+
+    Example:
+        ev = FrameEvaluator("gait2392_simbody.osim")
+        coord_names, angles = angles_matrix(df, available_map)
+        lengths = ev.evaluate(angles, coord_names)
+    """
+
+    def __init__(self, model_path=None, muscle_names=MUSCLES, model=None, state=None,
+                 dtype=np.float64, quantities=("length",)):
+        if model is None:
+            model, state = load_model(model_path)
+        self.model = model
+        self.state = state
+        # ονόματα, patterns ή "all" (βλ. resolve_muscles)
+        self.muscle_names = resolve_muscles(model, muscle_names)
+        self.dtype = np.dtype(dtype)
+
+        muscles = model.getMuscles()
+        self._muscles = [muscles.get(m_name) for m_name in self.muscle_names]
+        self._coord_set = model.getCoordinateSet()
+        self._coords = {}
+        # Όλες οι ποσότητες σε ένα πέρασμα: ένα setValue/realize ανά frame και μετά
+        # μόνο getters, με σειρά [ποσότητα][μυς] στις στήλες του αποτελέσματος
+        self.quantities = list(quantities)
+        self._equilibrate = any(q in EQUILIBRIUM_QUANTITIES for q in self.quantities)
+        # bound methods μία φορά: ~90 μύες χωρίς attribute lookup ανά frame
+        self._getters = [g for q in self.quantities for g in self._quantity_getters(q)]
+        # Συντεταγμένες που έχουμε πειράξει στο state (βλ. _reset_unused)
+        self._touched = set()
+        # Προαιρετικό MuscleLengthMemo (βλ. enable_memo)
+        self.memo = None
+        # Προαιρετικός StageTimer: χρόνοι setValue / realizePosition / getLength ανά frame
+        self.timer = None
+        # Handles για το evaluate_row (ίδια σειρά συντεταγμένων σε όλο το stream)
+        self._row_key = None
+        self._row_coords = []
+
+    def _quantity_getters(self, quantity):
+        """Ένα callable(state) ανά μυ για μία ποσότητα του QUANTITIES."""
+        if quantity == "length":
+            return [m.getLength for m in self._muscles]
+        if quantity == "fiber_length":
+            return [m.getFiberLength for m in self._muscles]
+        if quantity == "tendon_length":
+            return [m.getTendonLength for m in self._muscles]
+        if quantity == "normalized_fiber_length":
+            return [m.getNormalizedFiberLength for m in self._muscles]
+        if quantity.endswith(MOMENT_ARM_SUFFIX) and quantity in QUANTITIES:
+            coord = quantity[:-len(MOMENT_ARM_SUFFIX)]
+            getters = []
+            for m_name, m in zip(self.muscle_names, self._muscles):
+                side = m_name.rsplit("_", 1)[-1]
+                if side not in ("r", "l"):
+                    raise ValueError(f"Cannot tell the side of muscle '{m_name}' "
+                                     f"for {quantity}.")
+                handle = self.coordinates([f"{coord}_{side}"])[0]
+                getters.append(lambda s, m=m, c=handle: m.computeMomentArm(s, c))
+            return getters
+        raise ValueError(f"Unknown quantity '{quantity}'; choose from {QUANTITIES}.")
+
+    def split_quantities(self, values):
+        """(n_frames, n_quantities * n_muscles) -> dict ποσότητα -> (n_frames, n_muscles) view."""
+        n = len(self.muscle_names)
+        return {q: values[:, k * n:(k + 1) * n] for k, q in enumerate(self.quantities)}
+
+    def coordinates(self, coord_names):
+        """Handles των συντεταγμένων (cached ανά όνομα)."""
+        handles = []
+        for name in coord_names:
+            if name not in self._coords:
+                self._coords[name] = self._coord_set.get(name)
+            handles.append(self._coords[name])
+        return handles
+
+    def _reset_unused(self, coord_names):
+        """
+        Συντεταγμένες που έθεσε προηγούμενη κλήση αλλά λείπουν τώρα γυρίζουν
+        στη default τιμή, ώστε ο warm evaluator να δίνει ό,τι κι ένα φρέσκο μοντέλο.
+        """
+        for name in self._touched.difference(coord_names):
+            coord = self._coords[name]
+            coord.setValue(self.state, coord.getDefaultValue(), False)
+        self._touched = set(coord_names)
+        self._row_key = None
+
+    def enable_memo(self, coord_names, tol, max_entries=100_000):
+        """
+        Ενεργοποιεί το MuscleLengthMemo: οι εξαρτήσεις κάθε μυός βρίσκονται
+        εδώ μία φορά. tol σε rad. Μόνο για το μήκος MTU (quantities == ["length"]).
+        """
+        if self.quantities != ["length"]:
+            raise ValueError("The memo caches MTU lengths only; use it without extra quantities.")
+        self.memo = None
+        deps = self.coordinate_dependencies(coord_names)
+        self.memo = MuscleLengthMemo(self.muscle_names, deps, tol, max_entries)
+        return self.memo
+
+    def evaluate(self, angles_rad, coord_names, out=None, progress_every=0):
+        """
+        angles_rad: (n_frames, n_coords) σε rad, στήλες με τη σειρά του coord_names
+        out: προαιρετικός πίνακας (n_frames, n_quantities * n_muscles) για τα αποτελέσματα
+            (αλλιώς δεσμεύεται ένας με self.dtype, π.χ. float32)
+
+        Returns:
+            out (np.ndarray): μήκη μυών σε m (με επιπλέον quantities, οι στήλες είναι
+            [ποσότητα][μυς]· βλ. split_quantities)
+        """
+        n_frames = angles_rad.shape[0]
+        if out is None:
+            out = np.empty((n_frames, len(self._getters)), dtype=self.dtype)
+        if self.memo is not None:
+            return self._evaluate_memo(angles_rad, coord_names, out, progress_every)
+        if self.timer is not None:
+            return self._evaluate_timed(angles_rad, coord_names, out, progress_every)
+
+        model = self.model
+        state = self.state
+        coords = self.coordinates(coord_names)
+        self._reset_unused(coord_names)
+        getters = self._getters
+        equilibrate = self._equilibrate
+        # Python floats μία φορά, όχι float() ανά κελί
+        rows = angles_rad.tolist()
+
+        for i, row in enumerate(rows):
+            for coord, value in zip(coords, row):
+                coord.setValue(state, value, False)
+
+            # Οι υπόλοιπες συντεταγμένες μένουν στις default τιμές του μοντέλου
+            model.realizePosition(state)
+            if equilibrate:
+                # fiber/tendon: ίνες σε ισορροπία για τη στάση (μία φορά για όλους τους μύες)
+                model.equilibrateMuscles(state)
+
+            # μία ανάθεση γραμμής αντί για n_muscles ξεχωριστά out[i, j]
+            out[i] = [get(state) for get in getters]
+
+            if progress_every and i % progress_every == 0 and i > 0:
+                print(f"  ... processed {i}/{n_frames} frames")
+
+        return out
+
+    def evaluate_row(self, values, coord_names):
+        """
+        Ένα μόνο frame (για streaming): values σε rad με τη σειρά του coord_names.
+
+        Returns:
+            list με τα μήκη των μυών σε m
+        """
+        if tuple(coord_names) != self._row_key:
+            self._row_coords = self.coordinates(coord_names)
+            self._reset_unused(coord_names)
+            self._row_key = tuple(coord_names)
+
+        state = self.state
+        for coord, value in zip(self._row_coords, values):
+            coord.setValue(state, value, False)
+        self.model.realizePosition(state)
+        if self._equilibrate:
+            self.model.equilibrateMuscles(state)
+        return [get(state) for get in self._getters]
+
+    def evaluate_adaptive(self, angles_rad, coord_names, tol, stride=16, out=None,
+                          angle_tol=None):
+        """
+        OpenSim μόνο σε keyframes και γραμμική παρεμβολή ανάμεσα.
+
+        Ξεκινά με keyframes κάθε stride frames (+ το τελευταίο). Ένα διάστημα [a, b]
+        γίνεται δεκτό μόνο αν ισχύουν και τα δύο:
+          - η απόκλιση dev_k των γωνιών ΚΑΘΕ frame από την ευθεία ανάμεσα στις
+            γωνίες των a, b (χωρίς OpenSim) αλλάζει κάθε στήλη το πολύ tol / 2:
+            max_j sum_k S[j, k] * dev_k <= tol / 2, με S = coordinate_sensitivity
+            του μοντέλου (ή dev_k <= angle_tol σε rad, αν δοθεί)· έτσι ο θόρυβος
+            ή μια στενή κορυφή ανάμεσα στα σημεία ελέγχου σπάει το διάστημα
+          - το μέσο m, υπολογισμένο ακριβώς, απέχει <= tol / 2 από την παρεμβολή
+            (καμπυλότητα του μήκους κατά μήκος αυτής της ευθείας)
+        αλλιώς σπάει σε [a, m], [m, b] και ξαναελέγχεται. Όλα τα μέσα ενός
+        επιπέδου πάνε σε ένα evaluate.
+
+        Με το S το σφάλμα μένει ~<= tol όσο το μήκος είναι ομαλό κατά μήκος της
+        ευθείας. Θόρυβος σ στις γωνίες αλλάζει όμως πραγματικά τα ακριβή μήκη κατά
+        ~sum_k S[j, k] * σ, οπότε για tol κάτω από ~2-3 φορές αυτό σχεδόν κάθε
+        frame υπολογίζεται (φιλτράρισμα πριν, ή μεγαλύτερο tol / angle_tol).
+
+        Returns:
+            out: όπως το evaluate
+            evaluated (np.ndarray bool, n_frames): ποια frames υπολογίστηκαν ακριβώς
+        """
+        n_frames = angles_rad.shape[0]
+        if out is None:
+            out = np.empty((n_frames, len(self._getters)), dtype=self.dtype)
+        evaluated = np.zeros(n_frames, dtype=bool)
+        if n_frames == 0:
+            return out, evaluated
+        if angle_tol is None:
+            sens = self.coordinate_sensitivity(coord_names) * ADAPTIVE_SENSITIVITY_MARGIN
+
+        keys = np.unique(np.r_[np.arange(0, n_frames, max(1, stride)), n_frames - 1])
+        out[keys] = self.evaluate(angles_rad[keys], coord_names)
+        evaluated[keys] = True
+
+        # στοίβα διαστημάτων προς έλεγχο, ένα επίπεδο διχοτόμησης τη φορά
+        pending = [(a, b) for a, b in zip(keys[:-1], keys[1:]) if b - a > 1]
+        while pending:
+            mids = np.array([(a + b) // 2 for a, b in pending])
+            out[mids] = self.evaluate(angles_rad[mids], coord_names)
+            evaluated[mids] = True
+            refine = []
+            for (a, b), m in zip(pending, mids):
+                w = (m - a) / (b - a)
+                err = np.max(np.abs(out[a] + w * (out[b] - out[a]) - out[m]))
+                ok = err <= tol / 2  # και NaN -> refine
+                if ok:
+                    seg = angles_rad[a:b + 1]
+                    w_seg = (np.arange(b - a + 1) / (b - a))[:, None]
+                    dev = np.abs(seg - (seg[0] + w_seg * (seg[-1] - seg[0]))).max(axis=0)
+                    if angle_tol is None:
+                        ok = (sens @ dev).max() <= tol / 2
+                    else:
+                        ok = dev.max() <= angle_tol
+                if not ok:
+                    refine.extend(iv for iv in ((a, m), (m, b)) if iv[1] - iv[0] > 1)
+            pending = refine
+
+        # παρεμβολή ανάμεσα στα γειτονικά ακριβή frames (τα άκρα είναι πάντα keyframes)
+        known = np.flatnonzero(evaluated)
+        missing = np.flatnonzero(~evaluated)
+        if len(missing):
+            hi = known[np.searchsorted(known, missing)]
+            lo = known[np.searchsorted(known, missing) - 1]
+            w = ((missing - lo) / (hi - lo))[:, None]
+            out[missing] = out[lo] + w * (out[hi] - out[lo])
+        return out, evaluated
+
+    def _evaluate_timed(self, angles_rad, coord_names, out, progress_every):
+        """Όπως το evaluate, με χρονόμετρο γύρω από κάθε κομμάτι του frame (βλ. self.timer)."""
+        model = self.model
+        state = self.state
+        coords = self.coordinates(coord_names)
+        self._reset_unused(coord_names)
+        getters = self._getters
+        equilibrate = self._equilibrate
+        rows = angles_rad.tolist()
+        n_frames = len(rows)
+        perf = time.perf_counter
+        t_set = t_realize = t_get = 0.0
+
+        for i, row in enumerate(rows):
+            t0 = perf()
+            for coord, value in zip(coords, row):
+                coord.setValue(state, value, False)
+            t1 = perf()
+            model.realizePosition(state)
+            if equilibrate:
+                model.equilibrateMuscles(state)
+            t2 = perf()
+            out[i] = [get(state) for get in getters]
+            t3 = perf()
+            t_set += t1 - t0
+            t_realize += t2 - t1
+            t_get += t3 - t2
+
+            if progress_every and i % progress_every == 0 and i > 0:
+                print(f"  ... processed {i}/{n_frames} frames")
+
+        self.timer.add("muscle lengths: set coordinates", t_set, n_frames)
+        realize = "realize+equilibrate" if equilibrate else "realizePosition"
+        self.timer.add(f"muscle lengths: {realize}", t_realize, n_frames)
+        get_name = "getLength" if self.quantities == ["length"] else "getters"
+        self.timer.add(f"muscle lengths: {get_name}", t_get, n_frames * len(getters))
+        return out
+
+    def _evaluate_memo(self, angles_rad, coord_names, out, progress_every):
+        """Όπως το evaluate, αλλά frames που βρίσκονται όλα στο memo δεν κάνουν realizePosition."""
+        memo = self.memo
+        model = self.model
+        state = self.state
+        coords = self.coordinates(coord_names)
+        self._reset_unused(coord_names)
+        muscles = self._muscles
+        dep_idx = memo.bind(list(coord_names))
+        caches = memo.caches
+        n_frames = angles_rad.shape[0]
+
+        rows = angles_rad.tolist()
+        qrows = memo.quantize(angles_rad).tolist()
+        hits = np.zeros(len(muscles), dtype=np.int64)
+        misses = np.zeros(len(muscles), dtype=np.int64)
+        skipped = 0
+
+        for i, (row, qrow) in enumerate(zip(rows, qrows)):
+            missing = []
+            for j, idx in enumerate(dep_idx):
+                key = tuple([qrow[k] for k in idx])
+                value = caches[j].get(key)
+                if value is None:
+                    missing.append((j, key))
+                else:
+                    caches[j].move_to_end(key)
+                    out[i, j] = value
+                    hits[j] += 1
+
+            if missing:
+                for coord, value in zip(coords, row):
+                    coord.setValue(state, value, False)
+                model.realizePosition(state)
+                for j, key in missing:
+                    value = muscles[j].getLength(state)
+                    out[i, j] = value
+                    memo.store(j, key, value)
+                    misses[j] += 1
+            else:
+                skipped += 1
+
+            if progress_every and i % progress_every == 0 and i > 0:
+                print(f"  ... processed {i}/{n_frames} frames")
+
+        memo.hits += hits
+        memo.misses += misses
+        memo.frames_skipped += skipped
+        memo.frames_total += n_frames
+        return out
+
+    def coordinate_info(self, coord_names):
+        """
+        Returns:
+            dict coord_name -> (range_min, range_max, default_value) σε rad
+        """
+        info = {}
+        for name, coord in zip(coord_names, self.coordinates(coord_names)):
+            info[name] = (coord.getRangeMin(), coord.getRangeMax(),
+                          coord.getDefaultValue())
+        return info
+
+    def _perturbed(self, coord_names, n_poses, delta, seed):
+        """
+        n_poses τυχαίες στάσεις (μέσα στα ranges) + μία μετακινημένη εκδοχή τους
+        ανά συντεταγμένη (προς τα μέσα του range κατά delta rad).
+
+        Returns:
+            base (n_poses, n_cols), moved (n_coords, n_poses, n_cols),
+            steps (n_coords, n_poses) σε rad
+        """
+        info = self.coordinate_info(coord_names)
+        lo = np.array([info[c][0] for c in coord_names])
+        hi = np.array([info[c][1] for c in coord_names])
+        rng = np.random.default_rng(seed)
+        poses = lo + (hi - lo) * rng.random((n_poses, len(coord_names)))
+
+        batch = [poses]
+        steps = []
+        for k in range(len(coord_names)):
+            moved = poses.copy()
+            step = np.where(moved[:, k] + delta <= hi[k], delta, -delta)
+            moved[:, k] += step
+            batch.append(moved)
+            steps.append(step)
+        memo, self.memo = self.memo, None
+        try:
+            values = self.evaluate(np.ascontiguousarray(np.vstack(batch)), coord_names)
+        finally:
+            self.memo = memo
+        values = values.astype(float).reshape(len(coord_names) + 1, n_poses, -1)
+        return values[0], values[1:], np.array(steps).reshape(len(coord_names), n_poses)
+
+    def coordinate_dependencies(self, coord_names, n_poses=5, delta=0.05,
+                                tol=1e-9, seed=0):
+        """
+        Βρίσκει από ποιες συντεταγμένες εξαρτάται κάθε μυς: σε n_poses τυχαίες
+        στάσεις (μέσα στα ranges) μετακινεί κάθε συντεταγμένη κατά delta rad και
+        κοιτάει αν άλλαξε το μήκος περισσότερο από tol.
+
+        Returns:
+            dict muscle_name -> list των coord_names που τον επηρεάζουν
+        """
+        base, moved, _ = self._perturbed(coord_names, n_poses, delta, seed)
+        deps = {m_name: [] for m_name in self.muscle_names}
+        for k, c in enumerate(coord_names):
+            changed = np.abs(moved[k] - base).max(axis=0) > tol
+            for j, m_name in enumerate(self.muscle_names):
+                if changed[j]:
+                    deps[m_name].append(c)
+        return deps
+
+    def coordinate_sensitivity(self, coord_names, n_poses=16, delta=0.05, seed=0):
+        """
+        Μέγιστη |Δτιμή / Δq| κάθε στήλης εξόδου ως προς κάθε συντεταγμένη σε n_poses
+        τυχαίες στάσεις (για το μήκος: η |moment arm| σε m/rad). NaN -> 0.
+
+        Returns:
+            np.ndarray (n_cols, n_coords)
+        """
+        base, moved, steps = self._perturbed(coord_names, n_poses, delta, seed)
+        slopes = np.abs(moved - base) / np.abs(steps)[:, :, None]
+        return np.nan_to_num(slopes, nan=0.0).max(axis=1).T
+
+
+def output_meta(model_path, csv_path, quantity="length"):
+    """Το meta κάθε output (header.json στα .cols), ίδιο για φρέσκο run και cache hit."""
+    meta = {"model": os.path.basename(model_path), "input": os.path.basename(csv_path)}
+    return meta if quantity == "length" else {**meta, "quantity": quantity}
+
+
+def lengths_to_columns(time, lengths, muscle_names=MUSCLES, quantity="length"):
+    """(n_frames, n_muscles) -> dict 'time' + '<muscle>_<quantity>' για το output CSV."""
+    results = {"time": np.asarray(time).copy()}
+    for j, m_name in enumerate(muscle_names):
+        results[f"{m_name}_{quantity}"] = lengths[:, j]
+    return results
+
+
+def quantity_results(time, values, muscle_names, quantities):
+    """
+    Το fused (n_frames, n_quantities * n_muscles) ενός FrameEvaluator ->
+    dict ποσότητα -> columns ('time' + '<muscle>_<quantity>'), ένα output ανά ποσότητα.
+    """
+    n = len(muscle_names)
+    return {q: lengths_to_columns(time, values[:, k * n:(k + 1) * n], muscle_names, q)
+            for k, q in enumerate(quantities)}
+
+
+def quantity_output_path(out_path, quantity):
+    """TRIAL_muscles.csv -> TRIAL_muscles.csv (length) / TRIAL_muscles_fiber_length.csv"""
+    if quantity == "length":
+        return out_path
+    stem, ext = os.path.splitext(out_path)
+    return f"{stem}_{quantity}{ext}"
+
+
+def compute_muscle_lengths(model, state, df, available_map, muscle_names=MUSCLES,
+                           verbose=True):
+    """
+    Υπολογίζει τα μήκη μυών για κάθε frame του df.
+
+    Returns:
+        results (dict): 'time' + '<muscle>_length' -> np.ndarray
+    """
+    evaluator = FrameEvaluator(muscle_names=muscle_names, model=model, state=state)
+    coord_names, angles = angles_matrix(df, available_map)
+    lengths = evaluator.evaluate(angles, coord_names,
+                                 progress_every=1000 if verbose else 0)
+    return lengths_to_columns(df["time"].values, lengths, muscle_names)
+
+
+def print_memo_report(memo):
+    """Hit rates / evictions ανά μυ στο τέλος του run."""
+    print(f"➡ Memo (tol={np.rad2deg(memo.tol):g} deg, max {memo.max_entries} entries/muscle): "
+          f"{memo.frames_skipped}/{memo.frames_total} frames skipped realizePosition")
+    for r in memo.report():
+        print(f"  - {r['muscle']:<14} hit rate {r['hit_rate'] * 100:5.1f}%  "
+              f"(hits {r['hits']}, misses {r['misses']}, evictions {r['evictions']})")
+
+
+def print_adaptive_report(evaluated, tol, stride, angle_tol=None):
+    """Πόσα frames πέρασαν από το OpenSim στο --adaptive-tol mode (angle_tol σε rad ή None)."""
+    n = len(evaluated)
+    k = int(evaluated.sum())
+    angles = "model sensitivity" if angle_tol is None else f"±{np.rad2deg(angle_tol):.3g}°"
+    print(f"➡ Adaptive keyframes (tol={tol:g} m, angles: {angles}, "
+          f"stride {stride}): evaluated {k}/{n} frames "
+          f"({k / max(n, 1) * 100:.1f}%, {n / max(k, 1):.1f}x fewer OpenSim calls)")
+
+
+# Warm evaluator ανά worker process για το παράλληλο path (βλ. _init_chunk_worker)
+_WORKER_EVALUATOR = None
+
+
+def _init_chunk_worker(model_path, muscle_names, coord_names=None, memo_tol=None,
+                       memo_size=100_000, dtype=np.float64, quantities=("length",)):
+    global _WORKER_EVALUATOR
+    _WORKER_EVALUATOR = FrameEvaluator(model_path, muscle_names, dtype=dtype,
+                                       quantities=quantities)
+    if memo_tol:
+        _WORKER_EVALUATOR.enable_memo(coord_names, memo_tol, memo_size)
+
+
+def _compute_chunk(angles_chunk, coord_names):
+    lengths = _WORKER_EVALUATOR.evaluate(angles_chunk, coord_names)
+    memo = _WORKER_EVALUATOR.memo
+    return (lengths, (memo.take_counts() if memo is not None else None),
+            _WORKER_EVALUATOR.muscle_names)
+
+
+def compute_muscle_lengths_parallel(model_path, df, available_map, n_jobs,
+                                    muscle_names=MUSCLES, memo_tol=None,
+                                    memo_size=100_000, dtype=np.float64,
+                                    quantities=("length",)):
+    """
+    Ίδιο αποτέλεσμα με compute_muscle_lengths, αλλά το εύρος των frames
+    χωρίζεται σε n_jobs συνεχόμενα κομμάτια που υπολογίζονται σε ξεχωριστά
+    processes (το καθένα με δικό του model/State).
+
+    Κάθε frame θέτει ξανά όλες τις διαθέσιμες συντεταγμένες, άρα δεν εξαρτάται
+    από το προηγούμενο και τα κομμάτια δίνουν bit-identical τιμές με το serial path.
+    Με memo_tol (rad) κάθε worker έχει δικό του memo, οπότε οι τιμές μένουν
+    εντός tol αλλά εξαρτώνται από το πώς χωρίστηκαν τα frames.
+
+    Returns:
+        results (dict ποσότητα -> columns, βλ. quantity_results),
+        memo (MuscleLengthMemo με τους συνολικούς μετρητές ή None)
+    """
+    n_rows = len(df)
+    n_jobs = max(1, min(n_jobs, n_rows))
+    coord_names, angles = angles_matrix(df, available_map)
+    bounds = np.linspace(0, n_rows, n_jobs + 1).astype(int)
+    chunks = [angles[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=n_jobs,
+                             initializer=_init_chunk_worker,
+                             initargs=(model_path, list(muscle_names), coord_names,
+                                       memo_tol, memo_size, dtype,
+                                       list(quantities))) as pool:
+        # Το map κρατάει τη σειρά των κομματιών
+        parts = list(pool.map(_compute_chunk, chunks, [coord_names] * len(chunks)))
+
+    # τα patterns (π.χ. "all") τα έλυσαν οι workers πάνω στο μοντέλο
+    muscle_names = parts[0][2]
+    memo = None
+    if memo_tol:
+        # Μόνο για τους μετρητές· οι εξαρτήσεις δεν χρειάζονται εδώ
+        memo = MuscleLengthMemo(muscle_names, {m: [] for m in muscle_names},
+                                memo_tol, memo_size)
+        for _, counts, _ in parts:
+            memo.add_counts(counts)
+
+    # ένας προ-δεσμευμένος πίνακας (n_frames, n_quantities * n_muscles) για όλα τα κομμάτια
+    values = np.empty((n_rows, len(quantities) * len(muscle_names)), dtype=dtype)
+    for (a, b), (part, _, _) in zip(zip(bounds[:-1], bounds[1:]), parts):
+        values[a:b] = part
+    return quantity_results(df["time"].values, values, muscle_names, quantities), memo
+
+
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: python run_muscle_lengths.py <model.osim> <input_csv> <output_csv>")
+    parser = argparse.ArgumentParser(
+        usage="python run_muscle_lengths.py <model.osim> <input_csv> <output_csv> "
+              "[--muscles all|PATTERNS] [--quantities Q1,Q2|all] [--float32] "
+              "[--jobs N] [--memo-tol DEG] [--adaptive-tol M [--adaptive-stride N] [--adaptive-angle-tol DEG]] "
+              "[--memo-size N] [--cache-dir D | --no-cache] "
+              "[--profile REPORT.json] [--cprofile OUT.prof]")
+    parser.add_argument("model_path")
+    parser.add_argument("csv_path")
+    parser.add_argument("out_csv")
+    parser.add_argument("--muscles", default=None, metavar="PATTERNS",
+                        help="comma-separated muscle names / fnmatch patterns, or 'all' "
+                             "(default: the six right-side muscles in MUSCLES)")
+    parser.add_argument("--quantities", default=None, metavar="Q1,Q2",
+                        help="per-muscle quantities extracted in the same pass: "
+                             f"{', '.join(QUANTITIES)}, 'moment_arms' or 'all' "
+                             "(default: length); each extra quantity goes to "
+                             "<output>_<quantity>.<ext>")
+    parser.add_argument("--float32", action="store_true",
+                        help="store the muscle lengths as float32 instead of float64")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="split the frames into N contiguous chunks evaluated "
+                             "in parallel processes (default: 1, serial)")
+    parser.add_argument("--memo-tol", type=float, default=None, metavar="DEG",
+                        help="cache each muscle's length keyed on its own coordinates "
+                             "quantized to DEG degrees (default: off)")
+    parser.add_argument("--memo-size", type=int, default=100_000,
+                        help="max cached entries per muscle (LRU, default: 100000)")
+    parser.add_argument("--adaptive-tol", type=float, default=None, metavar="M",
+                        help="evaluate OpenSim only at keyframes and interpolate in between; "
+                             "an interval is kept only if its exact midpoint is within M/2 "
+                             "metres of the interpolation and every frame's angles are within "
+                             "--adaptive-angle-tol of the straight line between its endpoints, "
+                             "otherwise it is split (applies to every extracted column; "
+                             "default: off)")
+    parser.add_argument("--adaptive-stride", type=int, default=16, metavar="N",
+                        help="initial keyframe spacing in frames for --adaptive-tol "
+                             "(default: %(default)s)")
+    parser.add_argument("--adaptive-angle-tol", type=float, default=None, metavar="DEG",
+                        help="max deviation of any frame's joint angles from the linear path "
+                             "between interval endpoints for --adaptive-tol (default: derived "
+                             "per coordinate from the model's measured moment arms). Angle "
+                             "noise of sigma changes the exact lengths by about "
+                             "sum(moment arm) * sigma, so with M below 2-3 times that nearly "
+                             "every frame is evaluated; filter the angles or raise M/DEG")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="content-addressed result cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always recompute and do not store the result")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    info = {}
+    with profiling(args, extra=info) as timer:
+        run(args, timer, info)
+
+
+def run(args, timer, info):
+    """Το σώμα του main· timer: StageTimer, info: επιπλέον πεδία για το --profile report."""
+    memo_tol = np.deg2rad(args.memo_tol) if args.memo_tol else None
+    muscle_sel = parse_muscle_arg(args.muscles) or MUSCLES
+    dtype = np.float32 if args.float32 else np.float64
+    try:
+        quantities = parse_quantity_arg(args.quantities)
+    except ValueError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    if memo_tol and quantities != ["length"]:
+        print("❌ --memo-tol only applies to muscle lengths (--quantities length).")
+        sys.exit(1)
+    adaptive_angle_tol = None
+    if args.adaptive_tol is not None and args.adaptive_angle_tol is not None:
+        adaptive_angle_tol = float(np.deg2rad(args.adaptive_angle_tol))
+    if args.adaptive_tol is not None and args.jobs > 1:
+        print("❌ --adaptive-tol refines across the whole trial; run it without --jobs.")
         sys.exit(1)
+    out_paths = {q: quantity_output_path(args.out_csv, q) for q in quantities}
 
-    model_path = sys.argv[1]
-    csv_path = sys.argv[2]
-    out_csv = sys.argv[3]
+    model_path = args.model_path
+    csv_path = args.csv_path
 
     if not os.path.isfile(model_path):
         print(f"❌ Model not found: {model_path}")
         sys.exit(1)
-    if not os.path.isfile(csv_path):
+    if not os.path.exists(csv_path):
         print(f"❌ CSV not found: {csv_path}")
         sys.exit(1)
 
     print(f"📄 Model: {model_path}")
     print(f"📄 Input CSV: {csv_path}")
-    print(f"📄 Output CSV: {out_csv}")
+    for q, path in out_paths.items():
+        print(f"📄 Output CSV: {path}" if q == "length" else f"📄 Output ({q}): {path}")
 
-    # Διαβάζουμε το NONAN CSV
-    df = pd.read_csv(csv_path)
-    if "time" not in df.columns:
+    # Ίδιο μοντέλο + ίδιο CSV + ίδιες ρυθμίσεις -> έτοιμο αποτέλεσμα από το cache
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_dir)
+        extra = {}
+        if memo_tol:
+            extra = {"memo_tol": args.memo_tol, "memo_size": args.memo_size,
+                     "jobs": args.jobs}
+        if args.float32:
+            extra["dtype"] = "float32"
+        if args.adaptive_tol is not None:
+            extra["adaptive_tol"] = args.adaptive_tol
+            extra["adaptive_stride"] = args.adaptive_stride
+            extra["adaptive_angle_tol"] = adaptive_angle_tol
+        timer.start("cache lookup")
+        # ένα entry ανά ποσότητα· το key του length είναι το ίδιο όπως πριν
+        key_muscles = cache_muscle_names(model_path, muscle_sel)
+        keys = {q: cache_key(model_path, csv_path, COLUMN_MAP, key_muscles,
+                             extra if q == "length" else {**extra, "quantity": q})
+                for q in quantities}
+        cached = {}
+        for q, k in keys.items():
+            cached[q] = cache.get_frame(k)
+            if cached[q] is None:
+                break
+        timer.stop()
+        if all(cached.get(q) is not None for q in quantities):
+            # ίδιοι dtypes/τιμές/meta με ένα φρέσκο run, σε όποια μορφή ζητήθηκε
+            with timer.stage("save"):
+                for q, path in out_paths.items():
+                    save_table(path, cached[q], meta=output_meta(model_path, csv_path, q))
+            info["cache_hit"] = True
+            for q, path in out_paths.items():
+                print(f"\n✅ Cache hit ({keys[q][:12]}): wrote muscle {q} to {path}")
+            return
+
+    # Διαβάζουμε από το NONAN CSV (ή .cols/.parquet) μόνο time + γωνίες (βλ. trial_loader)
+    try:
+        with timer.stage("load csv"):
+            df = load_trial(csv_path, ["time"], optional=list(COLUMN_MAP))
+    except ValueError:
         print("❌ Column 'time' not found in CSV.")
         sys.exit(1)
 
     # Ελέγχουμε ποιες στήλες γωνιών υπάρχουν
-    available_map = {}
-    missing = []
-    for src_col, coord_name in COLUMN_MAP.items():
-        if src_col in df.columns:
-            available_map[src_col] = coord_name
-        else:
-            missing.append(src_col)
+    available_map, missing = find_available_columns(df)
 
     if missing:
         print("⚠ Warning: Missing expected angle columns:")
@@ -73,47 +972,76 @@ def main():
             print("  -", m)
         print("Θα συνεχίσουμε με όσες στήλες βρέθηκαν.\n")
 
-    # Φορτώνουμε το μοντέλο
-    model = opensim.Model(model_path)
-    state = model.initSystem()
-    coord_set = model.getCoordinateSet()
-    muscles = model.getMuscles()
+    n_rows = len(df)
+    info["frames"] = n_rows
 
-    print(f"✅ Loaded model with {muscles.getSize()} muscles.")
+    if args.jobs > 1:
+        print(f"➡ Frames: {n_rows} (parallel, {args.jobs} chunks)")
+        # οι workers φορτώνουν το μοντέλο μέσα σε αυτό το στάδιο
+        with timer.stage("muscle lengths"):
+            results, memo = compute_muscle_lengths_parallel(
+                model_path, df, available_map, args.jobs, muscle_names=muscle_sel,
+                memo_tol=memo_tol, memo_size=args.memo_size, dtype=dtype,
+                quantities=quantities)
+    else:
+        # Φορτώνουμε το μοντέλο
+        try:
+            with timer.stage("model load"):
+                evaluator = FrameEvaluator(model_path, muscle_sel, dtype=dtype,
+                                           quantities=quantities)
+        except ValueError as exc:
+            print(f"❌ {exc}")
+            sys.exit(1)
+        muscles = evaluator.model.getMuscles()
 
-    n_rows = len(df)
-    print(f"➡ Frames: {n_rows}")
-
-    # Προετοιμάζουμε results dict
-    results = {"time": df["time"].values.copy()}
-    for m_name in MUSCLES:
-        results[m_name + "_length"] = np.zeros(n_rows)
-
-    # Βρόχος στο χρόνο
-    for i, row in df.iterrows():
-        # Set coordinates for όσες γωνίες έχουμε
-        for src_col, coord_name in available_map.items():
-            angle_deg = row[src_col]
-            angle_rad = np.deg2rad(angle_deg)
-            coord = coord_set.get(coord_name)
-            coord.setValue(state, float(angle_rad), False)
-
-        # Οι υπόλοιπες συντεταγμένες μένουν στις default τιμές του μοντέλου
-        model.realizePosition(state)
-
-        # Υπολογισμός μυϊκού μήκους
-        for m_name in MUSCLES:
-            m = muscles.get(m_name)
-            results[m_name + "_length"][i] = m.getLength(state)
-
-        if i % 1000 == 0 and i > 0:
-            print(f"  ... processed {i}/{n_rows} frames")
-
-    # Αποθήκευση σε CSV
-    out_df = pd.DataFrame(results)
-    out_df.to_csv(out_csv, index=False)
-    print(f"\n✅ Saved muscle lengths to: {out_csv}")
-    print("   Columns:", list(out_df.columns))
+        print(f"✅ Loaded model with {muscles.getSize()} muscles "
+              f"({len(evaluator.muscle_names)} selected).")
+        print(f"➡ Frames: {n_rows}")
+
+        coord_names, angles = angles_matrix(df, available_map)
+        memo = None
+        if memo_tol:
+            with timer.stage("memo setup"):
+                memo = evaluator.enable_memo(coord_names, memo_tol, args.memo_size)
+        if args.profile:
+            # χρόνοι ανά κομμάτι του frame· μόνο με --profile (κοστίζει 4 perf_counter/frame)
+            evaluator.timer = timer
+        with timer.stage("muscle lengths"):
+            if args.adaptive_tol is not None:
+                values, evaluated = evaluator.evaluate_adaptive(
+                    angles, coord_names, args.adaptive_tol, args.adaptive_stride,
+                    angle_tol=adaptive_angle_tol)
+            else:
+                values = evaluator.evaluate(angles, coord_names, progress_every=1000)
+        if args.adaptive_tol is not None:
+            info["frames_evaluated"] = int(evaluated.sum())
+            print_adaptive_report(evaluated, args.adaptive_tol, args.adaptive_stride,
+                                  adaptive_angle_tol)
+        results = quantity_results(df["time"].values, values, evaluator.muscle_names,
+                                   quantities)
+
+    if memo is not None:
+        print_memo_report(memo)
+
+    # Αποθήκευση σε CSV (ή binary .cols/.parquet από την κατάληξη), ένα αρχείο ανά ποσότητα
+    out_dfs = {}
+    for q, path in out_paths.items():
+        timer.start("save")
+        out_df = out_dfs[q] = pd.DataFrame(results[q])
+        save_table(path, out_df, meta=output_meta(model_path, csv_path, q))
+        timer.stop()
+        label = "lengths" if q == "length" else q
+        print(f"\n✅ Saved muscle {label} to: {path}")
+        if len(out_df.columns) <= 16:
+            print("   Columns:", list(out_df.columns))
+        else:
+            print(f"   Columns: time + {len(out_df.columns) - 1} muscle {label}")
+
+    if cache is not None:
+        with timer.stage("cache store"):
+            for q, out_df in out_dfs.items():
+                cache.put_frame(keys[q], out_df, {"model": os.path.abspath(model_path),
+                                                  "input_csv": os.path.abspath(csv_path)})
 
 
 if __name__ == "__main__":
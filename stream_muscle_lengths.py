@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Streaming mode: μήκη μυών για ζωντανά IMU frames, γραμμή-γραμμή.
+
+Διαβάζει NONAN-formatted CSV γραμμές σταδιακά (stdin ή αρχείο που μεγαλώνει),
+υπολογίζει κάθε frame σε warm μοντέλο και γράφει αμέσως τη γραμμή του output.
+Στο τέλος τυπώνει (στο stderr) latency percentiles ανά frame ώστε να φαίνεται
+αν προλαβαίνουμε τη συχνότητα δειγματοληψίας των IMU.
+
+Usage:
+    python stream_muscle_lengths.py <model.osim> [input_csv | -] [--out out.csv]
+        [--follow] [--idle-timeout S] [--cycles-out cycles.csv] [--muscles all|PATTERNS]
+        [--profile REPORT.json] [--cprofile OUT.prof]
+
+Παράδειγμα (live):
+    noraxon_export | python stream_muscle_lengths.py gait2392_simbody.osim - > live_muscles.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from gait_cycle_muscle_lengths import OnlineCycleNormalizer
+from instrumentation import add_profile_args, profiling
+from run_muscle_lengths import COLUMN_MAP, MUSCLES, FrameEvaluator, parse_muscle_arg
+
+
+def read_lines(source, follow=False, poll=0.02, idle_timeout=None):
+    """
+    Generator γραμμών από file object. Με follow=True συνεχίζει να περιμένει
+    νέες γραμμές στο EOF (όπως το tail -f) μέχρι να περάσουν idle_timeout
+    δευτερόλεπτα χωρίς δεδομένα (None = για πάντα).
+
+    Yields:
+        (line, t_received) με t_received από time.perf_counter()
+    """
+    partial = ""
+    last_data = time.perf_counter()
+    while True:
+        line = source.readline()
+        if line:
+            last_data = time.perf_counter()
+            if not line.endswith("\n") and follow:
+                # μισή γραμμή: ο writer δεν την έχει τελειώσει ακόμη
+                partial += line
+                continue
+            yield partial + line, last_data
+            partial = ""
+            continue
+
+        if not follow:
+            if partial:
+                yield partial, time.perf_counter()
+            return
+        if idle_timeout is not None and time.perf_counter() - last_data > idle_timeout:
+            return
+        time.sleep(poll)
+
+
+def parse_rows(lines):
+    """
+    Η πρώτη γραμμή είναι το header του NONAN CSV. Για κάθε επόμενη δίνει
+    το time, τις γωνίες του COLUMN_MAP σε rad και το Contact RT (None αν λείπει).
+
+    Yields:
+        ("header", coord_names, has_contact, None) μία φορά,
+        μετά (time, angles_rad_list, contact, t_received)
+    """
+    header = None
+    for line, t_received in lines:
+        line = line.strip()
+        if not line:
+            continue
+        fields = line.split(",")
+
+        if header is None:
+            header = [f.strip().strip('"') for f in fields]
+            if "time" not in header:
+                raise ValueError("Column 'time' not found in stream header.")
+            time_idx = header.index("time")
+            src_idx = []
+            coord_names = []
+            for src_col, coord_name in COLUMN_MAP.items():
+                if src_col in header:
+                    src_idx.append(header.index(src_col))
+                    coord_names.append(coord_name)
+            if not coord_names:
+                raise ValueError("None of the expected angle columns are in the stream.")
+            contact_idx = header.index("Contact RT") if "Contact RT" in header else None
+            yield "header", coord_names, contact_idx is not None, None
+            continue
+
+        try:
+            t = float(fields[time_idx])
+            angles = [float(np.deg2rad(float(fields[k]))) for k in src_idx]
+            contact = float(fields[contact_idx]) if contact_idx is not None else None
+        except (ValueError, IndexError):
+            # χαλασμένη/μισή γραμμή από το stream: την προσπερνάμε
+            continue
+        yield t, angles, contact, t_received
+
+
+def stream_lengths(evaluator, rows):
+    """
+    Yields:
+        ("header", coord_names, has_contact, None) και μετά
+        (time, lengths_list, contact, latency_s)
+    """
+    coord_names = None
+    for t, values, contact, t_received in rows:
+        if t == "header":
+            coord_names = values
+            yield t, values, contact, None
+            continue
+        lengths = evaluator.evaluate_row(values, coord_names)
+        yield t, lengths, contact, time.perf_counter() - t_received
+
+
+def latency_report(latencies, times):
+    """Dict με p50/p99/max latency (ms) και τον ρυθμό δειγματοληψίας του stream."""
+    lat = np.asarray(latencies) * 1000.0
+    report = {
+        "frames": int(len(lat)),
+        "p50_ms": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+        "p99_ms": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+        "max_ms": float(lat.max()) if len(lat) else 0.0,
+    }
+    if len(times) > 1:
+        dt = float(np.median(np.diff(times)))
+        report["sample_period_ms"] = dt * 1000.0
+        report["keeps_up"] = bool(report["p99_ms"] < dt * 1000.0)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream muscle lengths for live IMU frames.")
+    parser.add_argument("model")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="NONAN CSV to read incrementally, or - for stdin (default)")
+    parser.add_argument("--out", default=None, help="output CSV (default: stdout)")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep reading a growing file (like tail -f)")
+    parser.add_argument("--idle-timeout", type=float, default=None, metavar="S",
+                        help="with --follow, stop after S seconds without new rows")
+    parser.add_argument("--cycles-out", default=None,
+                        help="also write each gait cycle (0–100%%, from Contact RT) "
+                             "as soon as it closes")
+    parser.add_argument("--muscles", default=None, metavar="PATTERNS",
+                        help="comma-separated muscle names / fnmatch patterns, or 'all'")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.model):
+        print(f"❌ Model not found: {args.model}", file=sys.stderr)
+        sys.exit(1)
+
+    info = {}
+    # το stdout είναι το stream των δεδομένων: report και μηνύματα στο stderr
+    with profiling(args, extra=info, file=sys.stderr) as timer:
+        run(args, timer, info)
+
+
+def run(args, timer, info):
+    """Το σώμα του main· timer: StageTimer, info: επιπλέον πεδία για το --profile report."""
+    with timer.stage("model load"):
+        evaluator = FrameEvaluator(args.model, parse_muscle_arg(args.muscles) or MUSCLES)
+    print(f"✅ Model ready: {args.model}", file=sys.stderr)
+
+    src = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.out is None else open(args.out, "w")
+
+    cycles_out = None
+    cycles = None
+    if args.cycles_out:
+        cycles_out = open(args.cycles_out, "w")
+        cycles = OnlineCycleNormalizer()
+
+    latencies = []
+    times = []
+    timer.start("stream")
+    try:
+        rows = parse_rows(read_lines(src, follow=args.follow, idle_timeout=args.idle_timeout))
+        for t, values, contact, latency in stream_lengths(evaluator, rows):
+            if t == "header":
+                columns = [m + "_length" for m in evaluator.muscle_names]
+                out.write(",".join(["time"] + columns) + "\n")
+                if cycles is not None:
+                    if not contact:
+                        raise ValueError("--cycles-out needs a 'Contact RT' column in the stream.")
+                    cycles_out.write(",".join(["cycle", "phase"] + columns) + "\n")
+            else:
+                out.write(",".join([repr(t)] + [repr(v) for v in values]) + "\n")
+                latencies.append(latency)
+                times.append(t)
+                done = cycles.push(t, contact, values) if cycles is not None else None
+                if done is not None:
+                    cycle, resampled = done
+                    for phase, row in zip(cycles.phase.tolist(), resampled.tolist()):
+                        cycles_out.write(",".join([str(cycle), repr(phase)]
+                                                  + [repr(v) for v in row]) + "\n")
+                    cycles_out.flush()
+            out.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+        if cycles_out is not None:
+            cycles_out.close()
+        timer.stop()
+
+    rep = latency_report(latencies, times)
+    info["latency"] = rep
+    print(f"➡ Frames: {rep['frames']}  latency p50 {rep['p50_ms']:.3f} ms, "
+          f"p99 {rep['p99_ms']:.3f} ms, max {rep['max_ms']:.3f} ms", file=sys.stderr)
+    if "sample_period_ms" in rep:
+        status = "keeps up with" if rep["keeps_up"] else "is SLOWER than"
+        print(f"➡ p99 {status} the sample period ({rep['sample_period_ms']:.3f} ms)",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
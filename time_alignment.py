@@ -0,0 +1,92 @@
+"""
+Ευθυγράμμιση δύο χρονικών βάσεων (π.χ. NONAN CSV και *_muscles.csv).
+
+Αντί για pd.merge πάνω σε float 'time' (hash join που πετάει σιωπηλά γραμμές
+όταν ένα CSV round-trip αλλάξει τα τελευταία ψηφία), κάθε δείγμα αντιστοιχίζεται
+στο πλησιέστερο δείγμα της άλλης βάσης με searchsorted, εφόσον η διαφορά είναι
+μέσα σε ένα tolerance. Επιστρέφονται index arrays, όχι αντίγραφο όλων των στηλών.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+DEFAULT_TIME_TOL = 1e-6  # s· πολύ μικρότερο από το dt (10 ms στα 100 Hz)
+
+
+class Alignment(NamedTuple):
+    """Ζεύγη δεικτών left_idx[k] <-> right_idx[k] (αύξοντα) και πόσα δείγματα έμειναν έξω."""
+    left_idx: np.ndarray
+    right_idx: np.ndarray
+    n_left: int
+    n_right: int
+    max_offset: float
+
+    @property
+    def n_matched(self):
+        return len(self.left_idx)
+
+    @property
+    def dropped_left(self):
+        return self.n_left - len(self.left_idx)
+
+    @property
+    def dropped_right(self):
+        return self.n_right - len(self.right_idx)
+
+    def summary(self, left_name="left", right_name="right"):
+        return (f"{self.n_matched} samples aligned, dropped {self.dropped_left} {left_name} "
+                f"and {self.dropped_right} {right_name} (max |dt| {self.max_offset:.2e} s)")
+
+
+def check_sorted(t, name="time"):
+    """ValueError αν το t δεν είναι αυστηρά αύξον (ή έχει NaN)."""
+    t = np.asarray(t, dtype=float)
+    if np.isnan(t).any():
+        raise ValueError(f"'{name}' contains NaN values.")
+    if len(t) > 1 and not np.all(np.diff(t) > 0):
+        raise ValueError(f"'{name}' must be strictly increasing.")
+    return t
+
+
+def align_time_bases(t_left, t_right, tol=DEFAULT_TIME_TOL,
+                     left_name="left", right_name="right"):
+    """
+    Inner join δύο ταξινομημένων χρονικών βάσεων με tolerance.
+
+    Κάθε δείγμα του t_left παίρνει το πλησιέστερο του t_right· κρατιέται αν
+    |Δt| <= tol. Αν δύο δείγματα διεκδικούν το ίδιο right δείγμα, κρατιέται
+    το πιο κοντινό, ώστε το ζεύγος να είναι ένα-προς-ένα.
+
+    Returns:
+        Alignment
+    """
+    t_left = check_sorted(t_left, left_name)
+    t_right = check_sorted(t_right, right_name)
+    n_left, n_right = len(t_left), len(t_right)
+    empty = np.empty(0, dtype=np.intp)
+    if n_left == 0 or n_right == 0:
+        return Alignment(empty, empty, n_left, n_right, 0.0)
+
+    pos = np.searchsorted(t_right, t_left)
+    lo = np.clip(pos - 1, 0, n_right - 1)
+    hi = np.clip(pos, 0, n_right - 1)
+    d_lo = np.abs(t_left - t_right[lo])
+    d_hi = np.abs(t_right[hi] - t_left)
+    nearest = np.where(d_hi < d_lo, hi, lo)
+    offset = np.minimum(d_lo, d_hi)
+
+    left_idx = np.flatnonzero(offset <= tol)
+    right_idx = nearest[left_idx]
+    offset = offset[left_idx]
+
+    # ένα-προς-ένα: τα right_idx είναι μη φθίνοντα, οπότε τα διπλά είναι γειτονικά
+    if len(right_idx) > 1 and np.any(right_idx[1:] == right_idx[:-1]):
+        order = np.lexsort((offset, right_idx))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = right_idx[order][1:] != right_idx[order][:-1]
+        keep = np.sort(order[first])
+        left_idx, right_idx, offset = left_idx[keep], right_idx[keep], offset[keep]
+
+    max_offset = float(offset.max()) if len(offset) else 0.0
+    return Alignment(left_idx.astype(np.intp), right_idx.astype(np.intp),
+                     n_left, n_right, max_offset)
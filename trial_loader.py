@@ -0,0 +1,127 @@
+"""
+Κοινός loader για τα NONAN trials: διαβάζει μόνο τις στήλες που ζητάει κάθε στάδιο.
+
+Το header/schema κάθε αρχείου διαβάζεται μία φορά και κρατιέται σε cache
+(ανά path + mtime + μέγεθος). Οι στήλες φορτώνονται με ρητό float dtype
+(float64 ή float32 για τα σήματα· το 'time' μένει πάντα float64) και
+υποστηρίζεται διάβασμα σε κομμάτια. Δουλεύει και με .cols/.parquet (columnar_io).
+"""
+import csv
+import fnmatch
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar_io import iter_table_chunks, load_table, table_columns, table_format
+
+TIME_COLUMN = "time"
+LENGTH_SUFFIX = "_length"
+
+_SCHEMA_CACHE = {}
+
+
+def read_schema(path):
+    """Λίστα με τα ονόματα στηλών του αρχείου (cached)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    schema = _SCHEMA_CACHE.get(key)
+    if schema is None:
+        if table_format(path) == "csv":
+            with open(path, newline="") as f:
+                schema = next(csv.reader(f), [])
+        else:
+            schema = table_columns(path)
+        _SCHEMA_CACHE[key] = schema
+    return list(schema)
+
+
+def resolve_columns(path, columns, optional=()):
+    """
+    columns: υποχρεωτικές στήλες (ValueError αν λείπει κάποια)
+    optional: στήλες που φορτώνονται μόνο αν υπάρχουν
+
+    Returns:
+        λίστα στηλών προς φόρτωση (με τη σειρά του αρχείου), λίστα optional που λείπουν
+    """
+    schema = read_schema(path)
+    present = set(schema)
+    missing = [c for c in columns if c not in present]
+    if missing:
+        raise ValueError(f"Column(s) {missing} not found in {path}.")
+    wanted = set(columns) | {c for c in optional if c in present}
+    missing_optional = [c for c in optional if c not in present]
+    return [c for c in schema if c in wanted], missing_optional
+
+
+def length_columns(path, muscles=None):
+    """
+    Οι '<muscle>_length' στήλες ενός muscles output, με τη σειρά του αρχείου.
+
+    muscles: ονόματα μυών ή fnmatch patterns (π.χ. ['*_l', 'soleus_r'])·
+        None ή 'all' -> όλες. Δέχεται και ονόματα με το '_length'.
+    """
+    cols = [c for c in read_schema(path) if c.endswith(LENGTH_SUFFIX)]
+    if not muscles or "all" in muscles:
+        return cols
+    names = {c: c[:-len(LENGTH_SUFFIX)] for c in cols}
+    wanted = []
+    for item in muscles:
+        if item.endswith(LENGTH_SUFFIX):
+            item = item[:-len(LENGTH_SUFFIX)]
+        matched = [c for c in cols if fnmatch.fnmatchcase(names[c], item)]
+        if not matched:
+            raise ValueError(f"No '{item}{LENGTH_SUFFIX}' column in {path}.")
+        wanted.extend(c for c in matched if c not in wanted)
+    return wanted
+
+
+def _dtypes(cols, dtype):
+    return {c: (np.float64 if c == TIME_COLUMN else dtype) for c in cols}
+
+
+def load_trial(path, columns, optional=(), dtype=np.float64):
+    """
+    Φορτώνει μόνο τις ζητούμενες στήλες ενός trial σε DataFrame.
+
+    dtype: float dtype για όλες τις στήλες εκτός του 'time' (π.χ. np.float32)
+    """
+    cols, _ = resolve_columns(path, columns, optional)
+    if table_format(path) == "csv":
+        return pd.read_csv(path, usecols=cols, dtype=_dtypes(cols, dtype),
+                           engine="c")[cols]
+
+    df = load_table(path, cols)
+    # astype(copy=False): τα memmaps του .cols μένουν zero-copy όταν ο dtype ταιριάζει
+    return df.astype(_dtypes(cols, dtype), copy=False)
+
+
+def iter_trial_chunks(path, columns, optional=(), dtype=np.float64, chunksize=50_000):
+    """Όπως το load_trial, αλλά δίνει DataFrames των chunksize γραμμών."""
+    cols, _ = resolve_columns(path, columns, optional)
+    dtypes = _dtypes(cols, dtype)
+    if table_format(path) == "csv":
+        yield from pd.read_csv(path, usecols=cols, dtype=dtypes, engine="c",
+                               chunksize=chunksize)
+        return
+    for chunk in iter_table_chunks(path, cols, chunksize):
+        yield chunk.astype(dtypes, copy=False)
+
+
+def trial_summary(path):
+    """
+    Σύντομα στοιχεία ενός trial (για το inspect_trial): στήλες, γραμμές,
+    διάρκεια και συχνότητα δειγματοληψίας από το 'time'.
+    """
+    schema = read_schema(path)
+    info = {"path": path, "columns": schema, "n_columns": len(schema)}
+    if TIME_COLUMN in schema:
+        t = load_trial(path, [TIME_COLUMN])[TIME_COLUMN].to_numpy()
+        info["n_rows"] = len(t)
+        if len(t) > 1:
+            dt = np.diff(t)
+            info["duration_s"] = float(t[-1] - t[0])
+            info["sample_rate_hz"] = float(1.0 / np.median(dt))
+            info["dt_min_s"] = float(dt.min())
+            info["dt_max_s"] = float(dt.max())
+    return info
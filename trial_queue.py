@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Resumable ουρά εργασιών για όλο το NONAN dataset.
+
+1) discover: βρίσκει τα S*/S*_G*_D*_B*_T*.csv κάτω από ένα dataset root και
+   γράφει manifest (ένα CSV ανά γραμμή, ίδιο format με το batch_muscle_lengths).
+2) work: τοπικοί workers (ή πολλά μηχανήματα με κοινό filesystem) παίρνουν
+   trials από την ουρά. Το claim είναι ένα lock file που δημιουργείται
+   ατομικά (O_CREAT | O_EXCL)· όταν τελειώσει ένα trial γράφεται done marker.
+   Μετά από διακοπή, τα trials με done marker δεν ξανατρέχουν, και τα claims
+   νεκρών workers (ίδιο host, pid που δεν υπάρχει, ή χωρίς heartbeat για
+   --stale-after δευτερόλεπτα) ξαναδίνονται. Όσο ένας worker δουλεύει ένα trial,
+   ανανεώνει το mtime του lock του (heartbeat), άρα ένα μεγάλο trial δεν γίνεται stale.
+3) status: πόσα trials είναι done / failed / claimed / pending.
+
+Usage:
+    python trial_queue.py discover <dataset_root> <queue_dir> [--pattern P]
+        [--profile REPORT.json] [--cprofile OUT.prof]
+    python trial_queue.py work <queue_dir> <model.osim> <out_dir>
+        [--workers N] [--format csv|cols|parquet] [--stale-after SEC]
+        [--retry-failed] [--muscles all|PATTERNS] [--float32] [--cache-dir D | --no-cache]
+        [--profile REPORT.json] [--cprofile OUT.prof]
+    python trial_queue.py status <queue_dir>
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+import batch_muscle_lengths as bml
+from batch_csv_to_mot import DEFAULT_PATTERN, find_trials
+from instrumentation import add_profile_args, profiling
+from result_cache import DEFAULT_CACHE_DIR
+from run_muscle_lengths import parse_muscle_arg
+
+MANIFEST_FILE = "manifest.txt"
+DEFAULT_STALE_AFTER = 6 * 3600  # s χωρίς heartbeat· αρκεί να είναι > HEARTBEAT_MAX
+HEARTBEAT_MAX = 60.0  # s· το heartbeat τρέχει κάθε min(HEARTBEAT_MAX, stale_after / 4)
+
+
+def discover_trials(dataset_root, pattern=DEFAULT_PATTERN):
+    """Ταξινομημένα paths (dataset_root/...) των trials που ταιριάζουν στο pattern."""
+    return [os.path.join(dataset_root, rel) for rel in find_trials(dataset_root, pattern)]
+
+
+def group_by_subject(trials):
+    """{subject: [trial stem, ...]} από paths της μορφής .../S135/S135_..._T01.csv"""
+    out = {}
+    for path in trials:
+        subject = os.path.basename(os.path.dirname(path))
+        stem = os.path.splitext(os.path.basename(path))[0]
+        out.setdefault(subject, []).append(stem)
+    return out
+
+
+def trial_id(csv_path):
+    """S135/S135_G03_D01_B01_T01.csv -> S135_G03_D01_B01_T01 (μοναδικό στο NONAN)"""
+    return os.path.splitext(os.path.basename(csv_path.rstrip("/\\")))[0]
+
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+class TrialQueue:
+    """
+    <queue_dir>/manifest.txt       ένα trial ανά γραμμή
+    <queue_dir>/claims/<id>.lock   ποιος δουλεύει το trial (host, pid, token, time)
+    <queue_dir>/done/<id>.json     record του ολοκληρωμένου trial
+    <queue_dir>/failed/<id>.json   record αποτυχίας (ξανατρέχει με retry_failed)
+    """
+
+    def __init__(self, queue_dir, stale_after=DEFAULT_STALE_AFTER):
+        self.queue_dir = queue_dir
+        self.stale_after = stale_after
+        self.host = socket.gethostname()
+        self._tokens = {}  # trial -> token των claims αυτού του process
+        for sub in ("claims", "done", "failed"):
+            os.makedirs(os.path.join(queue_dir, sub), exist_ok=True)
+
+    def _path(self, kind, trial):
+        ext = ".lock" if kind == "claims" else ".json"
+        return os.path.join(self.queue_dir, kind, trial_id(trial) + ext)
+
+    # ---------- manifest ----------
+
+    def write_manifest(self, trials):
+        tmp = os.path.join(self.queue_dir, MANIFEST_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            for t in trials:
+                f.write(t + "\n")
+        os.replace(tmp, os.path.join(self.queue_dir, MANIFEST_FILE))
+
+    def trials(self):
+        with open(os.path.join(self.queue_dir, MANIFEST_FILE)) as f:
+            return [line.strip() for line in f
+                    if line.strip() and not line.startswith("#")]
+
+    # ---------- claims ----------
+
+    def is_done(self, trial):
+        return os.path.exists(self._path("done", trial))
+
+    def is_failed(self, trial):
+        return os.path.exists(self._path("failed", trial))
+
+    def _read_claim(self, lock_path):
+        """(stat, owner dict) ενός lock, ή (None, {}) αν δεν υπάρχει."""
+        try:
+            st = os.stat(lock_path)
+        except FileNotFoundError:
+            return None, {}
+        try:
+            with open(lock_path) as f:
+                owner = json.load(f)
+        except (OSError, ValueError):
+            # μισογραμμένο ή μόλις σβησμένο lock: stale μόνο αν είναι και παλιό
+            owner = {}
+        return st, owner
+
+    @staticmethod
+    def _snapshot(st, owner):
+        """Ταυτότητα ενός συγκεκριμένου claim: inode, mtime (heartbeat) και token."""
+        return st.st_ino, st.st_mtime_ns, owner.get("token")
+
+    def _stale_claim(self, lock_path):
+        """Το snapshot του lock αν είναι stale, αλλιώς None."""
+        st, owner = self._read_claim(lock_path)
+        if st is None:
+            return None
+        stale = time.time() - st.st_mtime > self.stale_after
+        if not stale and owner.get("host") == self.host:
+            try:
+                os.kill(int(owner["pid"]), 0)
+            except ProcessLookupError:
+                stale = True  # ο worker που το είχε δεν υπάρχει πια
+            except (OSError, KeyError, ValueError):
+                pass
+        return self._snapshot(st, owner) if stale else None
+
+    @staticmethod
+    def _restore(grave, lock_path):
+        """Ξαναβάζει ένα lock που πήραμε κατά λάθος, χωρίς να σβήσει νεότερο claim."""
+        try:
+            os.link(grave, lock_path)
+        except FileExistsError:
+            pass  # κάποιος άλλος έχει ήδη νέο claim
+        except OSError:  # filesystem χωρίς hard links
+            if not os.path.exists(lock_path):
+                os.rename(grave, lock_path)
+                return
+        try:
+            os.remove(grave)
+        except FileNotFoundError:
+            pass
+
+    def claim(self, trial):
+        """True αν αυτό το process πήρε το trial (ατομικά, μέσω O_EXCL)."""
+        lock_path = self._path("claims", trial)
+        for _ in range(2):
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                snap = self._stale_claim(lock_path)
+                if snap is None:
+                    return False
+                # takeover: παίρνουμε το lock με rename και ελέγχουμε ότι είναι το ίδιο
+                # stale claim που είδαμε. Αν άλλος worker πρόλαβε να το αντικαταστήσει με
+                # φρέσκο claim (ή ο owner έκανε heartbeat), το επιστρέφουμε και φεύγουμε.
+                grave = f"{lock_path}.stale.{self.host}.{os.getpid()}"
+                try:
+                    os.rename(lock_path, grave)
+                except FileNotFoundError:
+                    return False
+                st, owner = self._read_claim(grave)
+                if st is None or self._snapshot(st, owner) != snap:
+                    if st is not None:
+                        self._restore(grave, lock_path)
+                    return False
+                os.remove(grave)
+                continue
+            token = uuid.uuid4().hex
+            with os.fdopen(fd, "w") as f:
+                json.dump({"host": self.host, "pid": os.getpid(), "token": token,
+                           "claimed": time.strftime("%Y-%m-%d %H:%M:%S")}, f)
+            self._tokens[trial] = token
+            return True
+        return False
+
+    def owns(self, trial):
+        """True αν το lock του trial είναι ακόμη το claim αυτού του process."""
+        token = self._tokens.get(trial)
+        _, owner = self._read_claim(self._path("claims", trial))
+        return token is not None and owner.get("token") == token
+
+    def touch(self, trial):
+        """Heartbeat: ανανεώνει το mtime του lock, μόνο αν είναι ακόμη δικό μας."""
+        if not self.owns(trial):
+            return False
+        try:
+            os.utime(self._path("claims", trial))
+        except FileNotFoundError:  # ένας takeover το έχει στιγμιαία μετονομάσει
+            pass
+        return True
+
+    @contextmanager
+    def heartbeat(self, trial, interval=None):
+        """Thread που κάνει touch στο lock όσο τρέχει το trial."""
+        if interval is None:
+            interval = min(HEARTBEAT_MAX, self.stale_after / 4)
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                if not self.touch(trial):
+                    print(f"  ⚠ {trial}: claim was taken over by another worker", flush=True)
+                    return
+
+        thread = threading.Thread(target=beat, name=f"heartbeat-{trial_id(trial)}",
+                                  daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def release(self, trial):
+        # μόνο το δικό μας claim· ένα lock που πήρε άλλος worker μένει ανέγγιχτο
+        token = self._tokens.pop(trial, None)
+        _, owner = self._read_claim(self._path("claims", trial))
+        if token is None or owner.get("token") != token:
+            return
+        try:
+            os.remove(self._path("claims", trial))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, trial, record):
+        _write_json_atomic(self._path("done", trial), record)
+        failed = self._path("failed", trial)
+        if os.path.exists(failed):
+            os.remove(failed)
+        self.release(trial)
+
+    def fail(self, trial, record):
+        _write_json_atomic(self._path("failed", trial), record)
+        self.release(trial)
+
+    def next_trial(self, retry_failed=False):
+        """Claims και επιστρέφει το επόμενο διαθέσιμο trial (ή None αν δεν υπάρχει)."""
+        for trial in self.trials():
+            if self.is_done(trial):
+                continue
+            if self.is_failed(trial) and not retry_failed:
+                continue
+            if self.claim(trial):
+                # ξανακοιτάμε: κάποιος μπορεί να το τελείωσε ανάμεσα στον έλεγχο και στο claim
+                if self.is_done(trial):
+                    self.release(trial)
+                    continue
+                return trial
+        return None
+
+    def status(self):
+        counts = {"total": 0, "done": 0, "failed": 0, "claimed": 0, "pending": 0}
+        for trial in self.trials():
+            counts["total"] += 1
+            if self.is_done(trial):
+                counts["done"] += 1
+            elif os.path.exists(self._path("claims", trial)):
+                counts["claimed"] += 1
+            elif self.is_failed(trial):
+                counts["failed"] += 1
+            else:
+                counts["pending"] += 1
+        return counts
+
+
+def work_loop(queue_dir, model_path, out_dir, ext=".csv", cache_dir=None,
+              stale_after=DEFAULT_STALE_AFTER, retry_failed=False, muscles=None,
+              dtype=np.float64):
+    """
+    Ένας worker: warm μοντέλο, και trials από την ουρά μέχρι να αδειάσει.
+
+    Returns:
+        λίστα από records (βλ. batch_muscle_lengths.process_trial)
+    """
+    queue = TrialQueue(queue_dir, stale_after)
+    bml._init_worker(model_path, cache_dir, muscles, dtype)
+    records = []
+    while True:
+        trial = queue.next_trial(retry_failed)
+        if trial is None:
+            return records
+        try:
+            with queue.heartbeat(trial):
+                record = bml.process_trial(trial, bml.output_path_for(trial, out_dir, ext))
+        except BaseException:
+            queue.release(trial)  # Ctrl-C κ.λπ.: το trial μένει pending
+            raise
+        record["host"] = queue.host
+        record["pid"] = os.getpid()
+        if record["status"] == "failed":
+            queue.fail(trial, record)
+            print(f"  ❌ {trial}: {record['error']}")
+        else:
+            queue.complete(trial, record)
+            print(f"  ✅ {trial}: {record['status']}, {record['frames']} frames in "
+                  f"{record['seconds']:.1f} s", flush=True)
+        records.append(record)
+
+
+def run_workers(queue_dir, model_path, out_dir, workers=1, **kwargs):
+    """workers τοπικά processes πάνω στην ίδια ουρά. Returns: όλα τα records."""
+    os.makedirs(out_dir, exist_ok=True)
+    if workers <= 1:
+        return work_loop(queue_dir, model_path, out_dir, **kwargs)
+    records = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(work_loop, queue_dir, model_path, out_dir, **kwargs)
+                   for _ in range(workers)]
+        for fut in futures:
+            records.extend(fut.result())
+    return records
+
+
+def print_status(queue):
+    c = queue.status()
+    print(f"📄 Queue: {queue.queue_dir}")
+    print(f"➡ {c['done']}/{c['total']} done, {c['failed']} failed, "
+          f"{c['claimed']} claimed, {c['pending']} pending")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discover NONAN trials and process them "
+                                                 "from a resumable file-based queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("discover", help="scan a dataset root and write the manifest")
+    p.add_argument("dataset_root")
+    p.add_argument("queue_dir")
+    p.add_argument("--pattern", default=DEFAULT_PATTERN,
+                   help="glob relative to dataset_root (default: %(default)s)")
+    add_profile_args(p)
+
+    p = sub.add_parser("work", help="claim and process trials until the queue is empty")
+    p.add_argument("queue_dir")
+    p.add_argument("model")
+    p.add_argument("out_dir")
+    p.add_argument("--workers", type=int, default=1, help="local worker processes")
+    p.add_argument("--format", choices=["csv", "cols", "parquet"], default="csv")
+    p.add_argument("--stale-after", type=float, default=DEFAULT_STALE_AFTER, metavar="SEC",
+                   help="claims without a heartbeat for this long are taken over; live "
+                        "workers refresh their lock every min(60, SEC/4) s "
+                        "(default: %(default)s)")
+    p.add_argument("--retry-failed", action="store_true", help="also re-run failed trials")
+    p.add_argument("--muscles", default=None, metavar="PATTERNS",
+                   help="comma-separated muscle names / fnmatch patterns, or 'all'")
+    p.add_argument("--float32", action="store_true",
+                   help="store the muscle lengths as float32")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                   help="content-addressed result cache (default: %(default)s)")
+    p.add_argument("--no-cache", action="store_true")
+    add_profile_args(p)
+
+    p = sub.add_parser("status", help="print queue progress")
+    p.add_argument("queue_dir")
+
+    args = parser.parse_args()
+
+    if args.command == "discover":
+        if not os.path.isdir(args.dataset_root):
+            print(f"❌ Folder not found: {args.dataset_root}")
+            sys.exit(1)
+        info = {}
+        with profiling(args, extra=info) as timer:
+            with timer.stage("discover"):
+                trials = discover_trials(args.dataset_root, args.pattern)
+            with timer.stage("write manifest"):
+                queue = TrialQueue(args.queue_dir)
+                queue.write_manifest(trials)
+            info["trials"] = len(trials)
+            subjects = group_by_subject(trials)
+            print(f"✅ Found {len(trials)} trials from {len(subjects)} subjects "
+                  f"-> {os.path.join(args.queue_dir, MANIFEST_FILE)}")
+        return
+
+    if args.command == "status":
+        print_status(TrialQueue(args.queue_dir))
+        return
+
+    if not os.path.isfile(args.model):
+        print(f"❌ Model not found: {args.model}")
+        sys.exit(1)
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    t0 = time.perf_counter()
+    info = {}
+    # με --workers > 1 οι workers είναι άλλα processes: μετράμε το σύνολο (+ children peak RSS)
+    with profiling(args, extra=info) as timer:
+        with timer.stage("work"):
+            records = run_workers(args.queue_dir, args.model, args.out_dir, args.workers,
+                                  ext="." + args.format, cache_dir=cache_dir,
+                                  stale_after=args.stale_after,
+                                  retry_failed=args.retry_failed,
+                                  muscles=parse_muscle_arg(args.muscles),
+                                  dtype=np.float32 if args.float32 else np.float64)
+        info["trials"] = records
+    print(f"\n➡ This run processed {len(records)} trials in {time.perf_counter() - t0:.1f} s")
+    queue = TrialQueue(args.queue_dir)
+    print_status(queue)
+    if queue.status()["failed"]:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()